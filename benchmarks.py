@@ -0,0 +1,480 @@
+"""
+Microbenchmarks for hot paths in simple-evals.
+
+Run with, e.g.:
+    python -m simple-evals.benchmarks --bench=mmlu_answer_extraction
+"""
+
+import argparse
+import gzip
+import json
+import os
+import random
+import re
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Callable
+
+import jinja2
+import numpy as np
+
+from . import common, drop_eval, healthbench_eval, healthbench_meta_eval
+from .eval_types import SingleEvalResult
+
+BENCHMARKS: dict[str, Callable[[argparse.Namespace], None]] = {}
+
+
+def benchmark(fn: Callable[[argparse.Namespace], None]):
+    BENCHMARKS[fn.__name__.removeprefix("bench_")] = fn
+    return fn
+
+
+def timeit(fn: Callable[[], object], repeats: int) -> float:
+    """
+    Best wall-clock time of `repeats` calls to fn, in seconds.
+    """
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _synthetic_cot_responses(num_responses: int, length: int, seed: int = 0) -> list[str]:
+    rng = random.Random(seed)
+    words = "therefore because the option we consider value answer choice step".split()
+    prefixes = [
+        regex.replace("\\", "") for regex in common.MULTILINGUAL_ANSWER_REGEXES
+    ]
+    responses = []
+    for _ in range(num_responses):
+        reasoning = " ".join(rng.choice(words) for _ in range(length))
+        # some responses end with an answer in one language, some have none at all
+        if rng.random() < 0.9:
+            reasoning += f"\n{rng.choice(prefixes)}: {rng.choice('ABCD')}"
+        responses.append(common.normalize_response(reasoning))
+    return responses
+
+
+def _legacy_multilingual_extract(response_text: str) -> str | None:
+    for answer_regex in common.MULTILINGUAL_ANSWER_REGEXES:
+        regex = common.MULTILINGUAL_ANSWER_PATTERN_TEMPLATE.format(answer_regex)
+        match = re.search(regex, response_text)
+        if match:
+            return common.normalize_extracted_answer(match.group(1))
+    return None
+
+
+@benchmark
+def bench_mmlu_answer_extraction(args: argparse.Namespace) -> None:
+    responses = _synthetic_cot_responses(args.num_examples, length=args.length)
+    legacy = [_legacy_multilingual_extract(response) for response in responses]
+    extracted = [common.extract_multilingual_answer(response) for response in responses]
+    assert extracted == legacy, "Extractor disagrees with the per-regex loop"
+
+    legacy_time = timeit(
+        lambda: [_legacy_multilingual_extract(response) for response in responses],
+        args.repeats,
+    )
+    extractor_time = timeit(
+        lambda: [common.extract_multilingual_answer(response) for response in responses],
+        args.repeats,
+    )
+    per_response = 1e6 / len(responses)
+    print(f"{len(responses)} responses of ~{args.length} words")
+    print(f"per-regex loop: {legacy_time * per_response:.1f} us/response")
+    print(f"extractor:      {extractor_time * per_response:.1f} us/response")
+    print(f"speed-up:       {legacy_time / extractor_time:.1f}x")
+
+
+@benchmark
+def bench_mmlu_postprocessing(args: argparse.Namespace) -> None:
+    raw_responses = [
+        f"**{response}** $\\boxed{{x}}$"
+        for response in _synthetic_cot_responses(args.num_examples, length=args.length)
+    ]
+
+    def per_response():
+        return [
+            _legacy_multilingual_extract(common.normalize_response(response))
+            for response in raw_responses
+        ]
+
+    def batched():
+        return common.extract_answers(
+            common.normalize_responses(raw_responses),
+            common.MULTILINGUAL_ANSWER_EXTRACTOR,
+            normalize=True,
+            num_processes=args.num_processes,
+        )
+
+    assert batched() == per_response(), "Batch pipeline disagrees with per-response pipeline"
+    per_response_time = timeit(per_response, args.repeats)
+    batched_time = timeit(batched, args.repeats)
+    print(f"{len(raw_responses)} responses of ~{args.length} words")
+    print(f"per response (regex loop): {per_response_time:.3f}s")
+    print(f"batched ({args.num_processes} processes): {batched_time:.3f}s")
+    print(f"speed-up:     {per_response_time / batched_time:.1f}x")
+
+
+@benchmark
+def bench_drop_scoring(args: argparse.Namespace) -> None:
+    with gzip.GzipFile(
+        fileobj=common.url_to_fileobj(drop_eval.DEV_JSONL_URL, binary=True), mode="rb"
+    ) as f:
+        examples = list(map(json.loads, f.readlines()))
+    references = [example["ref_text"].split("|") for example in examples]
+    # a mix of correct answers, answers to other questions and answers in a sentence
+    rng = random.Random(0)
+    samples = []
+    for reference in references:
+        answer = rng.choice(rng.choice(references) if rng.random() < 0.5 else reference)
+        samples.append(f"The answer is {answer}." if rng.random() < 0.3 else answer)
+
+    def clear_caches():
+        drop_eval._normalize_answer.cache_clear()
+        drop_eval._is_number.cache_clear()
+
+    def per_example():
+        clear_caches()
+        return [
+            drop_eval.drop_metric(sample, reference)
+            for sample, reference in zip(samples, references)
+        ]
+
+    def cold():
+        clear_caches()
+        return drop_eval.DropScorer().score_batch(samples, references)
+
+    # scoring more samples against the same references, e.g. with repeats
+    warm_scorer = drop_eval.DropScorer()
+    expected = per_example()
+    assert cold() == expected, "DropScorer disagrees with drop_metric"
+    assert warm_scorer.score_batch(samples, references) == expected
+
+    per_example_time = timeit(per_example, args.repeats)
+    cold_time = timeit(cold, args.repeats)
+    warm_time = timeit(lambda: warm_scorer.score_batch(samples, references), args.repeats)
+    print(f"{len(samples)} dev set examples")
+    print(f"drop_metric per example:        {per_example_time:.3f}s")
+    print(f"DropScorer.score_batch (cold):  {cold_time:.3f}s")
+    print(f"DropScorer.score_batch (warm):  {warm_time:.3f}s")
+
+
+def _legacy_clipped_stats(values: list, stat: str):
+    if stat == "mean":
+        return np.clip(np.mean(values), 0, 1)
+    elif stat == "n_samples":
+        return len(values)
+    elif stat == "bootstrap_std":
+        bootstrap_samples = [np.random.choice(values, len(values)) for _ in range(1000)]
+        bootstrap_means = [_legacy_clipped_stats(list(s), "mean") for s in bootstrap_samples]
+        return np.std(bootstrap_means)
+
+
+def _synthetic_healthbench_results(num_examples: int, num_tags: int, seed: int = 0) -> list[SingleEvalResult]:
+    rng = random.Random(seed)
+    tags = [f"axis:tag_{i}" for i in range(num_tags)]
+    results = []
+    for _ in range(num_examples):
+        score = rng.uniform(-0.3, 1.0)
+        metrics = {"overall_score": score}
+        # every example has a few of the tags, as in HealthBench
+        metrics.update({tag: rng.uniform(-0.5, 1.0) for tag in rng.sample(tags, k=min(8, num_tags))})
+        results.append(SingleEvalResult(score=score, metrics=metrics))
+    return results
+
+
+@benchmark
+def bench_healthbench_aggregation(args: argparse.Namespace) -> None:
+    results = _synthetic_healthbench_results(args.num_examples, args.num_tags)
+
+    def legacy():
+        name2values = defaultdict(list)
+        for result in results:
+            for name, value in result.metrics.items():
+                name2values[name].append(value)
+            name2values["score"].append(result.score)
+        return {
+            name if stat == "mean" else f"{name}:{stat}": _legacy_clipped_stats(values, stat)
+            for name, values in name2values.items()
+            for stat in ("mean", "n_samples", "bootstrap_std")
+        }
+
+    def vectorised():
+        eval_result = healthbench_eval._aggregate_get_clipped_mean(results)
+        return {**eval_result.metrics, "score": eval_result.score}
+
+    expected, actual = legacy(), vectorised()
+    assert expected.keys() == actual.keys()
+    std_keys = [key for key in expected if key.endswith(":bootstrap_std")]
+    for key in expected:
+        if key not in std_keys:
+            assert np.isclose(expected[key], actual[key]), key
+    # the bootstrap draws differ, so only the spread of the estimates can be compared
+    relative_errors = [abs(actual[key] / expected[key] - 1) for key in std_keys if expected[key]]
+    legacy_time = timeit(legacy, args.repeats)
+    vectorised_time = timeit(vectorised, args.repeats)
+    print(f"{len(results)} examples, {len(std_keys)} metrics")
+    print(f"bootstrap std relative difference: median {np.median(relative_errors):.3f}")
+    print(f"per-metric bootstrap: {legacy_time:.3f}s")
+    print(f"vectorised bootstrap: {vectorised_time:.3f}s")
+    print(f"speed-up:             {legacy_time / vectorised_time:.1f}x")
+
+
+def _legacy_metrics_for_rater_by_class(
+    self_pred_list: list[bool],
+    other_preds_list: list[list[bool]],
+    cluster_list: list[str],
+    model_or_physician: str,
+) -> dict[str, dict[str, float | None]]:
+    # get all the metrics for each cluster
+    metric_lists = defaultdict(list)
+    for self_pred, other_preds, cluster in zip(
+        self_pred_list, other_preds_list, cluster_list, strict=True
+    ):
+        self_pred_str = "pos" if self_pred else "neg"
+        for other_pred in other_preds:
+            # precision. based on the grader's labels -
+            # i.e., calculated as TP / (TP + FP)
+            # so a prediction should be recorded whenever self_pred is True
+            precision_index_str = healthbench_meta_eval.INDEX_STR_TEMPLATE.format(
+                model_or_physician=model_or_physician,
+                metric="precision",
+                pred_str=self_pred_str,
+            )
+            metric_lists[precision_index_str].append(self_pred == other_pred)
+            precision_cluster_str = healthbench_meta_eval.CLUSTER_STR_TEMPLATE.format(
+                cluster=cluster, index_str=precision_index_str
+            )
+            metric_lists[precision_cluster_str].append(self_pred == other_pred)
+
+            # recall. based on the ground truth labels -
+            # i.e., calculated as TP / (TP + FN)
+            # so a prediction should be recorded whenever other_pred is True
+            other_pred_str = "pos" if other_pred else "neg"
+            recall_index_str = healthbench_meta_eval.INDEX_STR_TEMPLATE.format(
+                model_or_physician=model_or_physician,
+                metric="recall",
+                pred_str=other_pred_str,
+            )
+            metric_lists[recall_index_str].append(self_pred == other_pred)
+            recall_cluster_str = healthbench_meta_eval.CLUSTER_STR_TEMPLATE.format(
+                cluster=cluster, index_str=recall_index_str
+            )
+            metric_lists[recall_cluster_str].append(self_pred == other_pred)
+
+    metrics: dict[str, dict[str, float | None]] = {}
+    for index_str, metric_list in metric_lists.items():
+        n = len(metric_list)
+        metric = sum(metric_list) / n if n > 0 else None
+        metrics[index_str] = {
+            "n": n,
+            "value": metric,
+        }
+
+    f1_metrics = healthbench_meta_eval.get_f1_metrics(metrics)
+    metrics.update(f1_metrics)
+
+    balanced_metrics = healthbench_meta_eval.get_balanced_metrics(metrics)
+    metrics.update(balanced_metrics)
+
+    return metrics
+
+
+
+@benchmark
+def bench_healthbench_meta_agreement(args: argparse.Namespace) -> None:
+    # examples rated by 2-4 of 50 physicians, as in the HealthBench meta-eval data
+    rng = random.Random(0)
+    examples = []
+    for _ in range(args.num_examples):
+        num_raters = rng.randint(2, 4)
+        examples.append(
+            {
+                "binary_labels": [rng.random() < 0.6 for _ in range(num_raters)],
+                "anonymized_physician_ids": rng.sample(range(50), num_raters),
+                "category": f"cluster_{rng.randrange(7)}",
+            }
+        )
+
+    def legacy():
+        physician_rating_lists = defaultdict(lambda: ([], [], []))
+        for example in examples:
+            labels = example["binary_labels"]
+            for i, physician_id in enumerate(example["anonymized_physician_ids"]):
+                physician_rating_lists[physician_id][0].append(labels[i])
+                physician_rating_lists[physician_id][1].append(labels[:i] + labels[i + 1 :])
+                physician_rating_lists[physician_id][2].append(example["category"])
+        return {
+            physician_id: _legacy_metrics_for_rater_by_class(*lists, "physician")
+            for physician_id, lists in physician_rating_lists.items()
+        }
+
+    def vectorised():
+        rater_ids, self_preds, other_preds, clusters = [], [], [], []
+        for example in examples:
+            labels = example["binary_labels"]
+            for i, physician_id in enumerate(example["anonymized_physician_ids"]):
+                for j in range(len(labels)):
+                    if j != i:
+                        rater_ids.append(physician_id)
+                        self_preds.append(labels[i])
+                        other_preds.append(labels[j])
+                        clusters.append(example["category"])
+        return healthbench_meta_eval.compute_metrics_for_raters_by_class(
+            rater_ids, self_preds, other_preds, clusters, "physician"
+        )
+
+    assert legacy() == vectorised()
+    legacy_time = timeit(legacy, args.repeats)
+    vectorised_time = timeit(vectorised, args.repeats)
+    print(f"{len(examples)} examples")
+    print(f"per-pair loop:    {legacy_time:.3f}s")
+    print(f"confusion counts: {vectorised_time:.3f}s")
+    print(f"speed-up:         {legacy_time / vectorised_time:.1f}x")
+
+
+def _synthetic_report_results(num_examples: int, seed: int = 0) -> list[SingleEvalResult]:
+    rng = random.Random(seed)
+    words = "the patient should consider option answer because dose".split()
+    results = []
+    for i in range(num_examples):
+        prompt = [
+            {"role": "system", "content": "You are a helpful assistant."},
+            {"role": "user", "content": " ".join(rng.choice(words) for _ in range(50))},
+        ]
+        response = " ".join(rng.choice(words) for _ in range(200))
+        if i % 2:
+            # HealthBench-style example with rubric grades as a template variable
+            grades = "\n".join(f"[{rng.random() < 0.5}] rubric item {j}" for j in range(10))
+            results.append(
+                SingleEvalResult(
+                    score=rng.random(),
+                    prompt=prompt,
+                    response=response,
+                    extracted_answer=response,
+                    html_template=healthbench_eval.HEALTHBENCH_HTML_JINJA,
+                    html_fields={"rubric_grades": grades},
+                )
+            )
+        else:
+            results.append(
+                SingleEvalResult(
+                    score=float(rng.random() < 0.5),
+                    prompt=prompt,
+                    response=response,
+                    extracted_answer=rng.choice("ABCD"),
+                    correct_answer=rng.choice("ABCD"),
+                )
+            )
+    return results
+
+
+@benchmark
+def bench_html_rendering(args: argparse.Namespace) -> None:
+    results = _synthetic_report_results(args.num_examples)
+    # the previous rendering path compiled every fragment on every call
+    legacy_env = jinja2.Environment(
+        loader=jinja2.BaseLoader(),
+        undefined=jinja2.StrictUndefined,
+        autoescape=jinja2.select_autoescape(["html", "xml"]),
+    )
+    legacy_env.globals["message_to_html"] = lambda message: legacy_env.from_string(
+        common._message_template
+    ).render(
+        role=message["role"],
+        content=message["content"],
+        variant=message.get("variant", None),
+    )
+    rubric_grades_expr = '{{ rubric_grades | replace("\\n", "<br>") | safe }}'
+
+    def legacy():
+        htmls = []
+        for result in results:
+            variables = dict(
+                prompt_messages=result.prompt,
+                next_message=dict(content=result.response, role="assistant"),
+                score=result.score,
+                extracted_answer=result.extracted_answer,
+            )
+            if result.html_fields:
+                template = result.html_template.replace(
+                    rubric_grades_expr,
+                    result.html_fields["rubric_grades"].replace("\n", "<br>"),
+                )
+            else:
+                template = common.HTML_JINJA
+                variables["correct_answer"] = result.correct_answer
+            htmls.append(legacy_env.from_string(template).render(**variables))
+        return htmls
+
+    def compiled():
+        return list(common.ExampleHtmls(results))
+
+    assert rubric_grades_expr in healthbench_eval.HEALTHBENCH_HTML_JINJA
+    assert legacy() == compiled()
+    legacy_time = timeit(legacy, args.repeats)
+    compiled_time = timeit(compiled, args.repeats)
+    per_10k = 10_000 / len(results)
+    print(f"{len(results)} examples, times per 10k examples")
+    print(f"compile per call:   {legacy_time * per_10k:.3f}s")
+    print(f"compiled templates: {compiled_time * per_10k:.3f}s")
+    print(f"speed-up:           {legacy_time / compiled_time:.1f}x")
+
+
+def _interpreter_time(code: str, repeats: int) -> float:
+    """
+    Best wall-clock time of running code in a fresh interpreter, in seconds.
+    """
+    env = os.environ | {"PYTHONPATH": os.pathsep.join(sys.path)}
+    # clients are only constructed, never called
+    env.setdefault("OPENAI_API_KEY", "benchmark")
+    env.setdefault("ANTHROPIC_API_KEY", "benchmark")
+    return timeit(
+        lambda: subprocess.run([sys.executable, "-c", code], env=env, check=True),
+        repeats,
+    )
+
+
+@benchmark
+def bench_sampler_startup(args: argparse.Namespace) -> None:
+    registry = f"from {__package__} import sampler_registry as r"
+    startup = {
+        "interpreter": "pass",
+        "--list-models": f"{registry}; list(r.MODELS)",
+        "--model gpt-4o": f"{registry}; r.build('gpt-4o')",
+        "--model claude-3-haiku": f"{registry}; r.build('claude-3-haiku-20240307')",
+        # what every invocation used to pay for
+        "all models (eager dict)": f"{registry}; [r.build(name) for name in r.MODELS]",
+    }
+    print("startup time in a fresh interpreter")
+    for name, code in startup.items():
+        print(f"{name + ':':<28}{_interpreter_time(code, args.repeats):.3f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run simple-evals microbenchmarks.")
+    parser.add_argument(
+        "--bench",
+        choices=sorted(BENCHMARKS),
+        action="append",
+        help="Benchmarks to run (default: all)",
+    )
+    parser.add_argument("--num-examples", type=int, default=1000)
+    parser.add_argument("--length", type=int, default=600, help="Words per synthetic response")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--num-processes", type=int, default=1)
+    parser.add_argument("--num-tags", type=int, default=100, help="Tag metrics per HealthBench run")
+    args = parser.parse_args()
+
+    for name in args.bench or sorted(BENCHMARKS):
+        print(f"== {name} ==")
+        BENCHMARKS[name](args)
+
+
+if __name__ == "__main__":
+    main()
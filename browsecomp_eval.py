@@ -5,12 +5,17 @@ https://openai.com/index/browsecomp/
 """ 
 
 import base64
+import functools
 import hashlib
+import json
+import os
 import random
 import re
+import numpy as np
 import pandas
 from . import common
 from .eval_types import Eval, EvalResult, SamplerBase, SingleEvalResult
+from .grader_cache import GraderCache
 
 # from: https://github.com/centerforaisafety/hle/blob/7b6be5aad6f9b43af3857de7867f3b52f6e4acb3/hle_eval/run_model_predictions.py#L11
 QUERY_TEMPLATE = """
@@ -44,6 +49,22 @@ correct: Answer 'yes' if extracted_final_answer matches the [correct_answer] giv
 confidence: The extracted confidence score between 0|\%| and 100|\%| from [response]. Put 100 if there is no confidence score available.
 """.strip()
 
+BATCH_GRADER_TEMPLATE = """
+Judge whether each of the following [response]s to its [question] is correct or not based on the precise and unambiguous [correct_answer] given with it. Judge each item on its own, exactly as if it were the only one.
+
+{items}
+
+For each item, your judgement must follow the format and criteria specified below:
+
+extracted_final_answer: The final exact answer extracted from the [response]. Put the extracted answer as 'None' if there is no exact, final answer to extract from the response.
+
+reasoning: Explain why the extracted_final_answer is correct or incorrect based on [correct_answer], focusing only on if there are meaningful differences between [correct_answer] and the extracted_final_answer. Do not comment on any background to the problem, do not attempt to solve the problem, do not argue for any answer different than [correct_answer], focus only on whether the answers match.
+
+correct: Answer 'yes' if extracted_final_answer matches the [correct_answer] given above, or is within a small margin of error for numerical problems. Answer 'no' otherwise, i.e. if there if there is any inconsistency, ambiguity, non-equivalency, or if the extracted answer is incorrect.
+
+Return a JSON object mapping every item ID to its judgement, for example {{"1": {{"extracted_final_answer": "...", "reasoning": "...", "correct": "yes"}}}}, with no text around it.
+""".strip()
+
 CHOICE_STRINGS = ["yes", "no"]
 
 
@@ -55,28 +76,74 @@ def derive_key(password: str, length: int) -> bytes:
     return key * (length // len(key)) + key[: length % len(key)]
 
 
+@functools.lru_cache(maxsize=None)
+def _key_block(password: str) -> np.ndarray:
+    return np.frombuffer(hashlib.sha256(password.encode()).digest(), dtype=np.uint8)
+
+
 def decrypt(ciphertext_b64: str, password: str) -> str:
     """Decrypt base64-encoded ciphertext with XOR."""
-    encrypted = base64.b64decode(ciphertext_b64)
-    key = derive_key(password, len(encrypted))
-    decrypted = bytes(a ^ b for a, b in zip(encrypted, key))
-    return decrypted.decode()
+    encrypted = np.frombuffer(base64.b64decode(ciphertext_b64), dtype=np.uint8)
+    # the key stream is the SHA256 digest repeated, see derive_key
+    key = np.resize(_key_block(password), len(encrypted))
+    return (encrypted ^ key).tobytes().decode()
+
+
+DATASET_URL = "https://openaipublic.blob.core.windows.net/simple-evals/browse_comp_test_set.csv"
+
+
+def load_examples(url: str = DATASET_URL) -> list[dict]:
+    """
+    Load the dataset and decrypt every row once. The decrypted rows are cached in the
+    local cache directory under a hash of the url, so neither the cache key nor the
+    encrypted "problem"/"answer" fields used in reports contain plaintext.
+    """
+    cache_file = common.cache_path(
+        "datasets", f"browsecomp-{hashlib.sha256(url.encode()).hexdigest()[:16]}.jsonl"
+    )
+    if os.path.exists(cache_file):
+        with open(cache_file, "r") as f:
+            return [json.loads(line) for line in f]
+
+    df = pandas.read_csv(url)
+    examples = [row.to_dict() for _, row in df.iterrows()]
+    for example in examples:
+        example["decrypted_problem"] = decrypt(example.get("problem", ""), example.get("canary", ""))
+        example["decrypted_answer"] = decrypt(example.get("answer", ""), example.get("canary", ""))
+    tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+    with open(os.open(tmp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "w") as f:
+        f.writelines(json.dumps(example) + "\n" for example in examples)
+    os.replace(tmp_file, cache_file)
+    return examples
 
 
 class BrowseCompEval(Eval):
-    def __init__(self, grader_model: SamplerBase, num_examples: int | None = None, n_repeats: int = 1):
-        df = pandas.read_csv(
-            "https://openaipublic.blob.core.windows.net/simple-evals/browse_comp_test_set.csv"
-        )
-        examples = [row.to_dict() for _, row in df.iterrows()]
+    def __init__(
+        self,
+        grader_model: SamplerBase,
+        num_examples: int | None = None,
+        n_repeats: int = 1,
+        grader_batch_size: int = 1,  # examples graded per grader request
+        grader_cache: GraderCache | None = None,  # reuse verdicts from earlier runs
+    ):
+        examples = load_examples()
         if num_examples:
             assert n_repeats == 1, "n_repeats only supported when max_examples = None"
             rng = random.Random(0)
             examples = rng.sample(examples, num_examples)
-        self.examples = examples * n_repeats
+        self.examples = common.RepeatedExamples(examples, n_repeats)
         self.grader_model = grader_model
+        self.grader_batch_size = grader_batch_size
+        self.grader_cache = grader_cache
 
     def grade_sample(self, question: str, correct_answer: str, response: str) -> str:
+        cache_key = GraderCache.key(
+            self.grader_model, GRADER_TEMPLATE, question, correct_answer, response
+        )
+        if self.grader_cache is not None:
+            cached = self.grader_cache.get(cache_key)
+            if cached is not None:
+                return cached
         grader_prompt = GRADER_TEMPLATE.format(
             question=question,
             correct_answer=correct_answer,
@@ -90,19 +157,78 @@ class BrowseCompEval(Eval):
         grading_response = sampler_response.response_text
 
         match = re.search(r"correct: (yes|no)", grading_response)
-        return match.group(0) if match else "no"  # Default to "no" if no match
+        if match and self.grader_cache is not None:
+            self.grader_cache.set(cache_key, match.group(1))
+        return match.group(1) if match else "no"  # Default to "no" if no match
 
-    def __call__(self, sampler: SamplerBase) -> EvalResult:
+    def grade_samples(self, samples: list[tuple[str, str, str]]) -> list[str]:
+        """
+        Grade (question, correct_answer, response) triples in one grader request,
+        falling back to grade_sample for every item without a valid judgement.
+        """
+        if len(samples) == 1:
+            return [self.grade_sample(*samples[0])]
+        cache_keys = [
+            GraderCache.key(self.grader_model, BATCH_GRADER_TEMPLATE, *sample)
+            for sample in samples
+        ]
+        grades = [
+            self.grader_cache.get(cache_key) if self.grader_cache is not None else None
+            for cache_key in cache_keys
+        ]
+        indices = [i for i, grade in enumerate(grades) if grade is None]
+        if not indices:
+            return grades
+        items = [
+            f"[question]: {question}\n[response]: {response}\n[correct_answer]: {correct_answer}"
+            for question, correct_answer, response in (samples[i] for i in indices)
+        ]
+        grader_prompt = BATCH_GRADER_TEMPLATE.format(items=common.format_grading_items(items))
+        prompt_messages = [
+            self.grader_model._pack_message(content=grader_prompt, role="user")
+        ]
+        grading_response = self.grader_model(prompt_messages).response_text
+        verdicts = common.parse_grading_verdicts(grading_response, len(items))
+        for item_id, i in enumerate(indices, start=1):
+            verdict = verdicts.get(item_id)
+            correct = verdict.get("correct") if isinstance(verdict, dict) else None
+            if correct in CHOICE_STRINGS:
+                grades[i] = correct
+                if self.grader_cache is not None:
+                    self.grader_cache.set(cache_keys[i], correct)
+            else:
+                grades[i] = self.grade_sample(*samples[i])
+        return grades
+
+    def run(self, sampler: SamplerBase, examples: list[dict]) -> list[SingleEvalResult]:
             def fn(row: dict):
-                problem = decrypt(row.get("problem", ""), row.get("canary", ""))
-                answer = decrypt(row.get("answer", ""), row.get("canary", ""))
                 prompt_messages = [
-                    sampler._pack_message(content=QUERY_TEMPLATE.format(Question=problem), role="user")
+                    sampler._pack_message(
+                        content=QUERY_TEMPLATE.format(Question=row["decrypted_problem"]), role="user"
+                    )
                 ]
-                sampler_response = sampler(prompt_messages)
+                return sampler(prompt_messages)
+
+            sampler_responses = common.map_with_progress(fn, examples)
+            # grade grader_batch_size examples per grader request
+            samples = [
+                (row["decrypted_problem"], row["decrypted_answer"], sampler_response.response_text)
+                for row, sampler_response in zip(examples, sampler_responses)
+            ]
+            grade_results = [
+                grade_result
+                for batch in common.map_with_progress(
+                    self.grade_samples, common.chunks(samples, self.grader_batch_size)
+                )
+                for grade_result in batch
+            ]
+
+            results = []
+            for row, sampler_response, grade_result in zip(
+                examples, sampler_responses, grade_results, strict=True
+            ):
                 response_text = sampler_response.response_text
                 actual_queried_prompt_messages = sampler_response.actual_queried_message_list
-                grade_result = self.grade_sample(problem, answer, response_text)
 
                 # Metrics based on grading response
                 is_correct = grade_result == "yes"
@@ -110,23 +236,16 @@ class BrowseCompEval(Eval):
                 
                 score = is_correct
 
-                # Create HTML for each sample result
-                html = common.jinja_env.from_string(common.HTML_JINJA).render(
-                    prompt_messages=actual_queried_prompt_messages,
-                    next_message=dict(content=response_text, role="assistant"),
-                    score=score,
-                    correct_answer=row["answer"],
-                    extracted_answer=response_text,
-                )
                 convo = actual_queried_prompt_messages + [dict(content=response_text, role="assistant")]
-                return SingleEvalResult(html=html, score=score, convo=convo, metrics={
+                results.append(SingleEvalResult(score=score, convo=convo, metrics={
                     "is_correct": is_correct,
                     "is_incorrect": is_incorrect,
-                })
+                }, prompt=actual_queried_prompt_messages, response=response_text,
+                extracted_answer=response_text, correct_answer=row["answer"]))
 
-            # Run evaluation and collect results
-            results = common.map_with_progress(fn, self.examples)
+            return results
 
+    def aggregate(self, results: list[SingleEvalResult]) -> EvalResult:
             # Aggregate metrics
             aggregate_metrics = {
                 "is_correct": sum(result.metrics["is_correct"] for result in results) / len(results),
@@ -142,4 +261,6 @@ class BrowseCompEval(Eval):
             
             print(f"Accuracy: {output_d['accuracy']:.3f}")
             
-            return common.aggregate_results(results)
+            eval_result = common.aggregate_results(results)
+            eval_result.metrics.update(common.repeat_metrics(results, self.examples))
+            return eval_result
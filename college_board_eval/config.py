@@ -109,3 +109,9 @@ def get_json_extraction_model() -> str:
     """Get the configured model name for JSON extraction from images"""
     config = get_config()
     return config["json_extraction_model"]
+
+
+def get_scorer_verdict_cache_path() -> str:
+    """Get the SQLite file for cached scorer verdicts; empty disables the cache"""
+    config = get_config()
+    return config.get("scorer_verdict_cache_path", "")
@@ -5,72 +5,216 @@ Reads all result JSON files and generates an HTML dashboard with performance met
 """
 
 import argparse
-import glob
+import hashlib
 import json
 import os
+import re
 import subprocess
 from datetime import datetime
 from typing import Any, Dict, List, Optional, Tuple
 
+# Sidecar index of every result file's mtime, size, content hash and summary, so
+# unchanged files are never read again.
+SIDECAR_INDEX_NAME = ".collator_index.json"
+SIDECAR_INDEX_VERSION = 2
+EXAM_METADATA_KEY = re.compile(r'"exam_metadata"\s*:\s*')
+
+
+def read_exam_metadata(path: str, chunk_size: int = 1 << 16) -> Optional[Dict[str, Any]]:
+    """Read only the exam_metadata object of a result file, or None if it has none.
+
+    The file is read in chunks until the object can be decoded, without parsing the
+    questions. run.py writes exam_metadata first, but the key is found anywhere in
+    the file; only the tail of the chunks read so far is kept while searching.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    with open(path, "r") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            buffer += chunk
+            match = EXAM_METADATA_KEY.search(buffer)
+            if match:
+                try:
+                    value, _ = decoder.raw_decode(buffer, match.end())
+                    return value if isinstance(value, dict) and value else None
+                except json.JSONDecodeError:
+                    if not chunk:
+                        raise
+            else:
+                if not chunk:
+                    return None
+                # the key may straddle two chunks
+                buffer = buffer[-32:]
+
+
+def file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def summarize_exam_metadata(filename: str, exam_meta: Dict[str, Any]) -> Dict[str, Any]:
+    """Key metrics of one result file from its exam_metadata"""
+    return {
+        "filename": filename,
+        "exam_identifier": exam_meta.get("exam_identifier", "Unknown"),
+        "model_name": exam_meta.get("model_name", "Unknown"),
+        "model_provider": exam_meta.get("model_provider", "Unknown"),
+        "score": exam_meta.get("score", 0),
+        "score_average": exam_meta.get("score_average", 0.0),
+        "questions_count": exam_meta.get("questions_count", 0),
+        "total_possible": exam_meta.get("total_possible", exam_meta.get("questions_count", 0)),
+        "time_total_generation": exam_meta.get("time_total_generation", 0.0),
+        "time_timestamp": exam_meta.get("time_timestamp", ""),
+        "accuracy_percentage": (
+            round(
+                (
+                    exam_meta.get("score", 0)
+                    / exam_meta.get(
+                        "total_possible",
+                        exam_meta.get("questions_count", 0),
+                    )
+                )
+                * 100,
+                1,
+            )
+            if exam_meta.get("total_possible", exam_meta.get("questions_count", 0)) > 0
+            else 0.0
+        ),
+        "questions_per_minute": round(
+            exam_meta.get("questions_count", 1) / (exam_meta.get("time_total_generation", 1) / 60),
+            2,
+        ),
+    }
+
+
+def is_better_run(result: Dict[str, Any], current: Dict[str, Any]) -> bool:
+    """Higher accuracy wins, then the faster run"""
+    if result["accuracy_percentage"] != current["accuracy_percentage"]:
+        return result["accuracy_percentage"] > current["accuracy_percentage"]
+    return result["time_total_generation"] < current["time_total_generation"]
+
 
 class ResultsCollator:
-    def __init__(self, results_dir: str = "college_board_eval/results"):
+    def __init__(self, results_dir: str = "college_board_eval/results", sidecar_path: Optional[str] = None):
         self.results_dir = results_dir
+        self.sidecar_path = sidecar_path or os.path.join(results_dir, SIDECAR_INDEX_NAME)
         self.results_data: List[Dict[str, Any]] = []
+        # filename -> {"mtime_ns", "size", "sha256", "summary"}; summary is None for
+        # files without exam_metadata, which are skipped until they change
+        self.file_index: Dict[str, Dict[str, Any]] = {}
+        # exam_identifier -> filename of its best run
+        self.best_runs_index: Dict[str, str] = {}
+        self.changed = False
 
-    def load_all_results(self) -> List[Dict[str, Any]]:
-        """Load all JSON result files from the results directory"""
-        json_files = glob.glob(os.path.join(self.results_dir, "*.json"))
-        # Filter out index.json and Results.json
-        json_files = [f for f in json_files if os.path.basename(f) not in ("index.json")]
+    def _load_sidecar(self) -> None:
+        try:
+            with open(self.sidecar_path, "r") as f:
+                sidecar = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return
+        if sidecar.get("version") != SIDECAR_INDEX_VERSION:
+            return
+        self.file_index = sidecar.get("files", {})
+        self.best_runs_index = sidecar.get("best_runs", {})
 
-        for json_file in json_files:
-            try:
-                with open(json_file, "r") as f:
-                    data = json.load(f)
-
-                # Extract key metrics
-                exam_meta = data.get("exam_metadata", {})
-
-                result_summary = {
-                    "filename": os.path.basename(json_file),
-                    "exam_identifier": exam_meta.get("exam_identifier", "Unknown"),
-                    "model_name": exam_meta.get("model_name", "Unknown"),
-                    "model_provider": exam_meta.get("model_provider", "Unknown"),
-                    "score": exam_meta.get("score", 0),
-                    "score_average": exam_meta.get("score_average", 0.0),
-                    "questions_count": exam_meta.get("questions_count", 0),
-                    "total_possible": exam_meta.get("total_possible", exam_meta.get("questions_count", 0)),
-                    "time_total_generation": exam_meta.get("time_total_generation", 0.0),
-                    "time_timestamp": exam_meta.get("time_timestamp", ""),
-                    "accuracy_percentage": (
-                        round(
-                            (
-                                exam_meta.get("score", 0)
-                                / exam_meta.get(
-                                    "total_possible",
-                                    exam_meta.get("questions_count", 0),
-                                )
-                            )
-                            * 100,
-                            1,
-                        )
-                        if exam_meta.get("total_possible", exam_meta.get("questions_count", 0)) > 0
-                        else 0.0
-                    ),
-                    "questions_per_minute": round(
-                        exam_meta.get("questions_count", 1) / (exam_meta.get("time_total_generation", 1) / 60),
-                        2,
-                    ),
-                }
+    def _save_sidecar(self) -> None:
+        tmp_path = self.sidecar_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(
+                {"version": SIDECAR_INDEX_VERSION, "files": self.file_index, "best_runs": self.best_runs_index}, f
+            )
+        os.replace(tmp_path, self.sidecar_path)
 
-                self.results_data.append(result_summary)
+    def load_all_results(self) -> List[Dict[str, Any]]:
+        """Load the summaries of all JSON result files in the results directory.
 
+        Only files that are new or whose mtime or size changed are read, and of
+        those only files whose content hash changed are parsed, and then only up to
+        their exam_metadata. Files without exam_metadata are skipped. The sidecar is
+        only rewritten if the index changed.
+        """
+        self._load_sidecar()
+        with os.scandir(self.results_dir) as entries:
+            stats = {
+                entry.name: entry.stat()
+                for entry in entries
+                # same files as glob("*.json"), which skips dotfiles such as the sidecar
+                if entry.is_file()
+                and entry.name.endswith(".json")
+                and not entry.name.startswith(".")
+                and entry.name != "index.json"
+            }
+
+        changed_exams = set()
+        index_changed = False
+        for filename in sorted(set(self.file_index) - set(stats)):
+            summary = self.file_index.pop(filename)["summary"]
+            index_changed = True
+            if summary is not None:
+                changed_exams.add(summary["exam_identifier"])
+        for filename, stat in sorted(stats.items()):
+            entry = self.file_index.get(filename)
+            if entry is not None and entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+                continue
+            old_summary = entry["summary"] if entry is not None else None
+            json_file = os.path.join(self.results_dir, filename)
+            index_changed = True
+            try:
+                sha256 = file_hash(json_file)
+                if entry is None or entry["sha256"] != sha256:
+                    exam_meta = read_exam_metadata(json_file)
+                    if exam_meta is None:
+                        print(f"Skipping {json_file}: no exam_metadata")
+                        summary = None
+                    else:
+                        summary = summarize_exam_metadata(filename, exam_meta)
+                        changed_exams.add(summary["exam_identifier"])
+                    if old_summary is not None:
+                        changed_exams.add(old_summary["exam_identifier"])
+                else:
+                    # touched but unchanged
+                    summary = old_summary
             except Exception as e:
                 print(f"Error loading {json_file}: {e}")
+                self.file_index.pop(filename, None)
+                if old_summary is not None:
+                    changed_exams.add(old_summary["exam_identifier"])
+                continue
+            self.file_index[filename] = {
+                "mtime_ns": stat.st_mtime_ns,
+                "size": stat.st_size,
+                "sha256": sha256,
+                "summary": summary,
+            }
 
+        self.results_data = [
+            self.file_index[filename]["summary"]
+            for filename in sorted(self.file_index)
+            if self.file_index[filename]["summary"] is not None
+        ]
+        self._update_best_runs(changed_exams)
+        self.changed = bool(changed_exams)
+        if index_changed:
+            self._save_sidecar()
         return self.results_data
 
+    def _update_best_runs(self, changed_exams: set) -> None:
+        """Re-select the best run of exams whose result files were added, changed or removed"""
+        for exam_id in changed_exams:
+            self.best_runs_index.pop(exam_id, None)
+        best_runs: Dict[str, Dict[str, Any]] = {}
+        for result in self.results_data:
+            exam_id = result["exam_identifier"]
+            if exam_id not in changed_exams and exam_id in self.best_runs_index:
+                continue
+            if exam_id not in best_runs or is_better_run(result, best_runs[exam_id]):
+                best_runs[exam_id] = result
+        self.best_runs_index.update({exam_id: result["filename"] for exam_id, result in best_runs.items()})
+
     def calculate_combined_stats(self) -> Dict[str, Any]:
         """Calculate combined statistics across all exams"""
         if not self.results_data:
@@ -91,21 +235,17 @@ class ResultsCollator:
 
     def get_best_runs(self) -> Dict[str, Dict[str, Any]]:
         """Get the best single run (highest accuracy, then fastest time) for each test."""
+        if self.file_index:
+            return {
+                exam_id: self.file_index[filename]["summary"]
+                for exam_id, filename in self.best_runs_index.items()
+                if filename in self.file_index
+            }
         best_runs: Dict[str, Dict[str, Any]] = {}
         for result in self.results_data:
             exam_id = result["exam_identifier"]
-            if exam_id not in best_runs:
+            if exam_id not in best_runs or is_better_run(result, best_runs[exam_id]):
                 best_runs[exam_id] = result
-            else:
-                current = best_runs[exam_id]
-                # Compare by accuracy, then by time
-                if result["accuracy_percentage"] > current["accuracy_percentage"]:
-                    best_runs[exam_id] = result
-                elif (
-                    result["accuracy_percentage"] == current["accuracy_percentage"]
-                    and result["time_total_generation"] < current["time_total_generation"]
-                ):
-                    best_runs[exam_id] = result
         return best_runs
 
     @staticmethod
@@ -152,8 +292,6 @@ class ResultsCollator:
         }
         os.makedirs(os.path.dirname(output_file), exist_ok=True)
         with open(output_file, "w") as f:
-            import json
-
             json.dump(output, f, indent=2)
         print("Distilled results saved to:", output_file)
 
@@ -177,7 +315,10 @@ def main() -> None:
         print("No result files found!")
         return
     print(f"Loaded {len(collator.results_data)} result files")
-    collator.write_index_json(args.output)
+    if collator.changed or not os.path.exists(args.output):
+        collator.write_index_json(args.output)
+    else:
+        print("No result files changed, keeping:", args.output)
     # Print summary
     combined_stats = collator.calculate_combined_stats()
     print("\nSummary:")
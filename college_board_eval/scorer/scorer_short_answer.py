@@ -8,6 +8,7 @@ from college_board_eval.config import (
     get_system_level_scoring_guide,
 )
 from college_board_eval.scorer.scorer_base import ScorerBase
+from college_board_eval.scorer.verdict_cache import VerdictCache, get_verdict_cache
 
 
 class ScorerShortAnswer(ScorerBase):
@@ -103,7 +104,18 @@ class ScorerShortAnswer(ScorerBase):
 
         # Try OpenAI if configured
         if provider == "openai":
-            return self._call_openai_model(prompt, model, image_content)
+            # Reuse the verdict of an earlier run with the same model, template and inputs
+            verdict_cache = get_verdict_cache()
+            if verdict_cache is None:
+                return self._call_openai_model(prompt, model, image_content)
+            cache_key = VerdictCache.key(provider, model, self.prompt_template, prompt, image_content)
+            cached = verdict_cache.get(cache_key)
+            if cached is not None:
+                return cached[0], cached[1]
+            score, explanation = self._call_openai_model(prompt, model, image_content)
+            if not explanation.startswith("[OpenAI scoring failed"):
+                verdict_cache.set(cache_key, [score, explanation])
+            return score, explanation
 
         # Fallback: placeholder
         score = 2.5  # Placeholder score
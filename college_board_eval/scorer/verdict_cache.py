@@ -0,0 +1,52 @@
+import functools
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from typing import Any, Optional
+
+from college_board_eval.config import get_scorer_verdict_cache_path
+
+
+class VerdictCache:
+    """
+    Persistent cache of parsed scorer verdicts, shared across runs.
+    Keys hash the scorer provider, model, prompt template and the scored item, so editing
+    a template invalidates its verdicts. Raw scorer text is not stored.
+    """
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=60)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS verdicts (key TEXT PRIMARY KEY, verdict TEXT NOT NULL)")
+
+    @staticmethod
+    def key(provider: str, model: str, template: str, *item: Any) -> str:
+        """Hash everything that determines the scorer's verdict"""
+        payload = json.dumps([provider, model, template, item], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            row = self._conn.execute("SELECT verdict FROM verdicts WHERE key = ?", (key,)).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def set(self, key: str, verdict: Any) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO verdicts VALUES (?, ?)", (key, json.dumps(verdict)))
+
+
+@functools.lru_cache(maxsize=None)
+def _open_verdict_cache(path: str) -> VerdictCache:
+    return VerdictCache(path)
+
+
+def get_verdict_cache() -> Optional[VerdictCache]:
+    """Get the configured verdict cache, or None if caching is disabled"""
+    path = get_scorer_verdict_cache_path()
+    return _open_verdict_cache(path) if path else None
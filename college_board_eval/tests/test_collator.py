@@ -0,0 +1,99 @@
+import json
+import os
+from unittest.mock import patch
+
+from college_board_eval.results.collator.run import ResultsCollator, read_exam_metadata
+
+
+def write_result(path, exam, model, score, total, time_taken):
+    exam_metadata = {
+        "exam_identifier": exam,
+        "model_name": model,
+        "model_provider": "openai",
+        "score": score,
+        "total_possible": total,
+        "time_total_generation": time_taken,
+        "questions_count": total,
+    }
+    with open(path, "w") as f:
+        json.dump({"exam_metadata": exam_metadata, "questions": [{"id": i} for i in range(100)]}, f, indent=2)
+
+
+class TestResultsCollator:
+
+    def test_read_exam_metadata_stops_at_header(self, tmp_path):
+        """Test that exam_metadata is decoded across chunk boundaries"""
+        path = str(tmp_path / "AP_X_openai_gpt-4o.json")
+        write_result(path, "AP_X", "gpt-4o", 3, 4, 10.0)
+        assert read_exam_metadata(path, chunk_size=7)["score"] == 3
+
+    def test_read_exam_metadata_after_questions(self, tmp_path):
+        """Test that a late exam_metadata is found and a missing one gives None"""
+        late = str(tmp_path / "late.json")
+        with open(late, "w") as f:
+            json.dump({"questions": [{"id": i} for i in range(100)], "exam_metadata": {"score": 2}}, f)
+        assert read_exam_metadata(late, chunk_size=7) == {"score": 2}
+
+        missing = str(tmp_path / "missing.json")
+        with open(missing, "w") as f:
+            json.dump({"questions": [{"id": i} for i in range(100)]}, f)
+        assert read_exam_metadata(missing, chunk_size=7) is None
+
+    def test_only_new_and_changed_files_are_read(self, tmp_path):
+        """Test that collation reuses the sidecar index and re-selects best runs"""
+        results_dir = str(tmp_path)
+        write_result(os.path.join(results_dir, "a.json"), "AP_X", "gpt-4o", 3, 4, 10.0)
+        write_result(os.path.join(results_dir, "b.json"), "AP_X", "gpt-4", 2, 4, 10.0)
+        write_result(os.path.join(results_dir, "c.json"), "AP_Y", "gpt-4", 1, 4, 10.0)
+
+        collator = ResultsCollator(results_dir)
+        assert len(collator.load_all_results()) == 3
+        assert collator.changed
+        assert {exam: r["filename"] for exam, r in collator.get_best_runs().items()} == {
+            "AP_X": "a.json",
+            "AP_Y": "c.json",
+        }
+
+        # nothing changed: no result file is opened
+        with patch("college_board_eval.results.collator.run.read_exam_metadata") as read:
+            collator = ResultsCollator(results_dir)
+            collator.load_all_results()
+        read.assert_not_called()
+        assert not collator.changed
+
+        # nor is the sidecar rewritten
+        with patch.object(ResultsCollator, "_save_sidecar") as save:
+            ResultsCollator(results_dir).load_all_results()
+        save.assert_not_called()
+
+        # b.json improves and a.json is removed
+        write_result(os.path.join(results_dir, "b.json"), "AP_X", "gpt-4", 4, 4, 10.0)
+        os.remove(os.path.join(results_dir, "a.json"))
+        collator = ResultsCollator(results_dir)
+        results = collator.load_all_results()
+        assert [r["filename"] for r in results] == ["b.json", "c.json"]
+        assert collator.changed
+        assert collator.get_best_runs()["AP_X"]["accuracy_percentage"] == 100.0
+
+        output = os.path.join(results_dir, "index.json")
+        collator.write_index_json(output)
+        with open(output) as f:
+            rows = json.load(f)["results"]
+        assert [row["is_best"] for row in rows] == [True, True]
+
+    def test_files_without_exam_metadata_are_skipped(self, tmp_path, capsys):
+        """Test that a file without exam_metadata is logged once and left out of the index"""
+        results_dir = str(tmp_path)
+        write_result(os.path.join(results_dir, "a.json"), "AP_X", "gpt-4o", 3, 4, 10.0)
+        with open(os.path.join(results_dir, "b.json"), "w") as f:
+            json.dump({"questions": []}, f)
+
+        collator = ResultsCollator(results_dir)
+        assert [r["filename"] for r in collator.load_all_results()] == ["a.json"]
+        assert "Skipping" in capsys.readouterr().out
+        assert list(collator.get_best_runs()) == ["AP_X"]
+
+        # the skipped file is not read again until it changes
+        with patch("college_board_eval.results.collator.run.read_exam_metadata") as read:
+            ResultsCollator(results_dir).load_all_results()
+        read.assert_not_called()
@@ -0,0 +1,38 @@
+from unittest.mock import Mock, patch
+
+from college_board_eval.scorer.scorer_short_answer import ScorerShortAnswer
+from college_board_eval.scorer.verdict_cache import VerdictCache
+
+
+class TestVerdictCache:
+
+    def test_round_trip_and_persistence(self, tmp_path):
+        """Test that verdicts survive reopening the cache file"""
+        path = str(tmp_path / "verdicts.sqlite")
+        key = VerdictCache.key("openai", "gpt-4o", "template", "prompt")
+        VerdictCache(path).set(key, [2.0, "Good"])
+
+        assert VerdictCache(path).get(key) == [2.0, "Good"]
+        assert VerdictCache(path).get(VerdictCache.key("openai", "gpt-4o", "new template", "prompt")) is None
+
+    def test_short_answer_scorer_reuses_verdicts(self, tmp_path):
+        """Test that a cached verdict is returned without calling the scorer model"""
+        cache = VerdictCache(str(tmp_path / "verdicts.sqlite"))
+        scorer = ScorerShortAnswer()
+        question = Mock()
+        question.short_answer_question_rubric_question = None
+        question.rubric = {}
+        question.question_image = None
+        question.question_text = "Explain one cause of the war."
+        question.max_points = 3
+        response = Mock()
+        response.answer = "Tariffs."
+
+        with patch("college_board_eval.scorer.scorer_short_answer.get_verdict_cache", return_value=cache), patch(
+            "college_board_eval.scorer.scorer_short_answer.get_short_answer_question_scorer_provider",
+            return_value="openai",
+        ), patch.object(scorer, "_call_openai_model", return_value=(2.0, "Partly correct")) as mock_openai:
+            assert scorer._call_scorer_model(question, response) == (2.0, "Partly correct")
+            assert scorer._call_scorer_model(question, response) == (2.0, "Partly correct")
+
+        assert mock_openai.call_count == 1
@@ -1,7 +1,15 @@
+import dataclasses
+import functools
 import io
+import json
+import math
 import os
+import random
+import re
 from collections import defaultdict
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections.abc import Sequence
+from fractions import Fraction
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from multiprocessing.pool import ThreadPool
 from typing import Any, Callable
 
@@ -75,6 +83,125 @@ MULTILINGUAL_ANSWER_REGEXES = [
 ]
 
 
+class AnswerExtractor:
+    """
+    Extract an answer with regexes that each have one capture group, in priority order:
+    the result is group 1 of the first pattern that matches anywhere in the text,
+    exactly as if re.search were called on each pattern in turn.
+
+    Patterns are compiled once, and the literal text that every match of a pattern
+    must contain (e.g. "Answer" and ":" in r"(?i)Answer\s*:") is checked with plain
+    substring searches first, so patterns that cannot match are skipped without a
+    regex scan. When a pattern starts with a literal, the regex is only tried at the
+    places that literal occurs. This matters most for case-insensitive patterns,
+    which re cannot search with its fast literal-prefix path.
+    """
+
+    def __init__(self, patterns: list[str]):
+        self.patterns = [re.compile(pattern) for pattern in patterns]
+        for compiled in self.patterns:
+            if compiled.groups < 1:
+                raise ValueError(f"Pattern {compiled.pattern!r} has no capture group")
+        self._literals = [
+            (bool(compiled.flags & re.IGNORECASE), _required_literals(compiled))
+            for compiled in self.patterns
+        ]
+
+    def extract(self, text: str) -> str | None:
+        folded = text.lower()
+        # str.lower() agrees with re.IGNORECASE, character by character, unless the
+        # text has characters with multi-character, context-dependent or
+        # non-roundtripping case mappings
+        prefilter = text.isascii() or (
+            len(folded) == len(text) and "ς" not in folded and folded.upper().lower() == folded
+        )
+        for pattern, (ignorecase, literals) in zip(self.patterns, self._literals):
+            if not prefilter:
+                match = pattern.search(text)
+            else:
+                haystack = folded if ignorecase else text
+                if not all([literal in haystack for literal in literals]):
+                    continue
+                match = _search_from_prefix(pattern, text, haystack, literals[0])
+            if match:
+                return match.group(1)
+        return None
+
+
+def _search_from_prefix(
+    pattern: re.Pattern, text: str, haystack: str, prefix: str
+) -> re.Match | None:
+    """
+    pattern.search(text), trying only the positions where the pattern's literal
+    prefix occurs in haystack (text, or text.lower() of the same length).
+    """
+    if not prefix:
+        return pattern.search(text)
+    start = haystack.find(prefix)
+    while start != -1:
+        match = pattern.match(text, start)
+        if match:
+            return match
+        start = haystack.find(prefix, start + 1)
+    return None
+
+
+def _required_literals(compiled: re.Pattern) -> list[str]:
+    """
+    Literal substrings that every match of the pattern contains: the runs of plain
+    characters outside groups, classes and quantifiers. Lowercased for
+    case-insensitive patterns, keeping only characters whose case mapping is stable.
+    The first item is the literal prefix of the pattern and may be empty.
+    """
+    pattern = re.sub(r"^\(\?[aiLmsux]+\)", "", compiled.pattern)
+    if compiled.flags & re.VERBOSE:
+        return [""]
+    runs, run = [], ""
+    depth, closing, escaped = 0, "", False
+    for i, char in enumerate(pattern):
+        if escaped:
+            escaped = False
+        elif closing:
+            # skip classes and {m,n} quantifiers; "]" right after "[" or "[^" is literal
+            escaped = char == "\\"
+            if char == closing and not (
+                closing == "]" and (pattern[i - 1] == "[" or pattern[i - 2 : i] == "[^")
+            ):
+                closing = ""
+        elif char == "|" and depth == 0:
+            return [""]  # top-level alternation: no literal is required
+        elif char in "\\[()^$.|*+?{":
+            if char in "*+?{":
+                run = run[:-1]  # the quantified character is optional
+            runs.append(run)
+            run = ""
+            escaped = char == "\\"
+            closing = {"[": "]", "{": "}"}.get(char, "")
+            depth += {"(": 1, ")": -1}.get(char, 0)
+        elif depth == 0:
+            run += char
+    runs.append(run)
+    if compiled.flags & re.IGNORECASE:
+        # split runs at characters whose case mapping str.lower() cannot reproduce
+        folded_runs = []
+        for run in runs:
+            folded_runs.append("")
+            for char in run:
+                lower = char.lower()
+                if len(lower) == 1 and lower.upper().lower() == lower:
+                    folded_runs[-1] += lower
+                else:
+                    folded_runs.append("")
+        runs = folded_runs
+    return runs[:1] + [run for run in runs[1:] if run]
+
+
+MULTICHOICE_ANSWER_EXTRACTOR = AnswerExtractor([ANSWER_PATTERN_MULTICHOICE])
+MULTILINGUAL_ANSWER_EXTRACTOR = AnswerExtractor(
+    [MULTILINGUAL_ANSWER_PATTERN_TEMPLATE.format(regex) for regex in MULTILINGUAL_ANSWER_REGEXES]
+)
+
+
 EQUALITY_TEMPLATE = r"""
 Look at the following two expressions (answers to a math problem) and judge whether they are equivalent. Only perform trivial simplifications
 
@@ -161,25 +288,341 @@ def check_equality(sampler: SamplerBase, expr1: str, expr2: str):
     return response_text.lower().strip() == "yes"
 
 
-def _compute_stat(values: list, stat: str):
-    if stat == "mean":
-        return np.mean(values)
-    elif stat == "std":
-        return np.std(values)
-    elif stat == "min":
-        return np.min(values)
-    elif stat == "max":
-        return np.max(values)
-    elif stat == "n_samples":
-        return len(values)
-    elif stat == "bootstrap_std":
-        return np.std(
-            [np.mean(np.random.choice(values, len(values))) for _ in range(1000)]
+# whitespace is only kept between two alphanumerics, where it may separate tokens
+_LATEX_NOISE = re.compile(
+    r"\$|\\left|\\right|\\[!,;:]|\\displaystyle|\.$|(?<![0-9a-zA-Z])\s+|\s+(?![0-9a-zA-Z])"
+)
+_DECIMAL = re.compile(r"[+-]?(\d{1,3}(,\d{3})+|\d+)?(\.\d+)?")
+# single-letter variables, numbers, arithmetic and grouping only: anything else
+# (functions, constants, units, sets, ...) is left to the grader
+_SIMPLE_EXPRESSION = re.compile(r"[0-9a-zA-Z.+\-*/^(){} ]+")
+_MAX_SYMPY_EXPRESSION_LENGTH = 64
+_MAX_SYMPY_EXPONENT = 20
+
+
+def _normalize_math_answer(expr: str) -> str:
+    """
+    Remove formatting that never changes the meaning of an answer: dollar signs,
+    whitespace, \left/\right, LaTeX spacing commands and a trailing period.
+    """
+    expr = expr.replace("\\dfrac", "\\frac").replace("\\tfrac", "\\frac")
+    return _LATEX_NOISE.sub("", expr.strip())
+
+
+def _parse_decimal(expr: str) -> Fraction | None:
+    if not _DECIMAL.fullmatch(expr) or not any(c.isdigit() for c in expr):
+        return None
+    return Fraction(expr.replace(",", ""))
+
+
+def _latex_to_sympy_input(expr: str) -> str | None:
+    expr = re.sub(r"\\frac\{([^{}]*)\}\{([^{}]*)\}", r"((\1)/(\2))", expr)
+    expr = expr.replace("\\cdot", "*").replace("\\times", "*")
+    if not _SIMPLE_EXPRESSION.fullmatch(expr) or re.search(r"[a-zA-Z]{2}", expr):
+        return None
+    return expr.replace("{", "(").replace("}", ")").replace("^", "**")
+
+
+def _sympy_equivalent(expr1: str, expr2: str) -> bool | None:
+    """
+    True if two expressions in the same variables expand to the same polynomial or
+    rational expression, i.e. are equal up to trivial simplifications. Numbers
+    without variables are left undecided, since the grader only accepts trivial
+    arithmetic (3/2 is 1.5, but 3245/5 is not 649). Requires sympy.
+    """
+    try:
+        import sympy
+        from sympy.parsing.sympy_parser import (
+            implicit_multiplication_application,
+            parse_expr,
+            standard_transformations,
         )
+    except ImportError:
+        return None
+    inputs = [_latex_to_sympy_input(expr) for expr in (expr1, expr2)]
+    if None in inputs or max(len(expr) for expr in inputs) > _MAX_SYMPY_EXPRESSION_LENGTH:
+        return None
+    transformations = standard_transformations + (implicit_multiplication_application,)
+    # every letter is a plain symbol, never a sympy builtin such as E, I, N or S
+    symbols = {name: sympy.Symbol(name) for name in set(re.findall("[a-zA-Z]", "".join(inputs)))}
+    try:
+        parsed1, parsed2 = (
+            parse_expr(expr, local_dict=symbols, transformations=transformations, evaluate=False)
+            for expr in inputs
+        )
+        if not parsed1.free_symbols or parsed1.free_symbols != parsed2.free_symbols:
+            return None
+        for power in (parsed1 - parsed2).atoms(sympy.Pow):
+            # (x+1)^1000 or 9^9^9 would take far too long to expand
+            if not power.exp.is_Integer or abs(power.exp) > _MAX_SYMPY_EXPONENT:
+                return None
+        return True if sympy.expand(parsed1 - parsed2) == 0 else None
+    except Exception:
+        return None
+
+
+def check_equality_locally(expr1: str, expr2: str | None) -> bool | None:
+    """
+    Decide the cases check_equality would send to the grader that can be settled
+    without it, from cheapest to most expensive: identical strings, a missing
+    answer, identical strings after removing formatting, two plain decimal numbers,
+    and expressions that sympy expands to the same result. Returns None when the
+    grader has to decide.
+    """
+    if expr2 is None:
+        return False
+    if expr1 == expr2:
+        return True
+    normalized1, normalized2 = _normalize_math_answer(expr1), _normalize_math_answer(expr2)
+    if normalized1 == normalized2:
+        return True
+    number1, number2 = _parse_decimal(normalized1), _parse_decimal(normalized2)
+    if number1 is not None and number2 is not None:
+        return number1 == number2
+    return _sympy_equivalent(normalized1, normalized2)
+
+
+BOOTSTRAP_STATS = ("bootstrap_std", "bootstrap_ci_lower", "bootstrap_ci_upper")
+# resample counts are drawn in blocks of at most this many cells to bound memory
+_BOOTSTRAP_BLOCK_CELLS = 2**22
+
+
+def bootstrap_iterations() -> int:
+    return int(os.environ.get("SIMPLE_EVALS_BOOTSTRAP_ITERATIONS", "1000"))
+
+
+def bootstrap_confidence() -> float | None:
+    """
+    Confidence level of the bootstrap intervals reported next to bootstrap_std, from
+    SIMPLE_EVALS_BOOTSTRAP_CONFIDENCE (e.g. 0.95). None if intervals are off.
+    """
+    confidence = os.environ.get("SIMPLE_EVALS_BOOTSTRAP_CONFIDENCE")
+    return float(confidence) if confidence else None
+
+
+def bootstrap_reservoir_size() -> int:
+    """
+    Values kept per metric for bootstrap stats, from SIMPLE_EVALS_BOOTSTRAP_RESERVOIR.
+    Metrics with more values are bootstrapped from a uniform sample of this size.
+    """
+    return int(os.environ.get("SIMPLE_EVALS_BOOTSTRAP_RESERVOIR", "100000"))
+
+
+class MetricAccumulator:
+    """
+    Running count, mean and variance (Welford), min and max of one metric, updated
+    in O(1) per value. Accumulators of disjoint sets of results can be merged, e.g.
+    across shards. With reservoir_size > 0, a uniform sample of at most that many
+    values is kept for bootstrap stats; it holds every value, in order, until full.
+    """
+
+    def __init__(self, reservoir_size: int = 0, seed: int = 0):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0  # sum of squared differences from the mean
+        self.min = math.inf
+        self.max = -math.inf
+        self.reservoir_size = reservoir_size
+        self.reservoir: list[float] = []
+        self._rng = random.Random(seed)
+
+    def add(self, value: float) -> None:
+        value = float(value)
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if len(self.reservoir) < self.reservoir_size:
+            self.reservoir.append(value)
+        elif self.reservoir_size:
+            # algorithm R: keep the new value with probability reservoir_size / count
+            i = self._rng.randrange(self.count)
+            if i < self.reservoir_size:
+                self.reservoir[i] = value
+
+    def merge(self, other: "MetricAccumulator") -> None:
+        """
+        Fold in the values of other, as if they had been added to this accumulator.
+        """
+        if other.count == 0:
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta**2 * self.count * other.count / count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        if len(self.reservoir) + len(other.reservoir) <= self.reservoir_size:
+            self.reservoir = self.reservoir + other.reservoir
+        elif self.reservoir_size:
+            # take each side's share of a uniform sample of the combined values
+            num_own = sum(
+                i < self.count
+                for i in self._rng.sample(range(count), self.reservoir_size)
+            )
+            # neither side can give more values than its reservoir holds, e.g. if
+            # other was built with a smaller reservoir_size
+            num_own = min(
+                max(num_own, self.reservoir_size - len(other.reservoir)),
+                len(self.reservoir),
+            )
+            self.reservoir = self._rng.sample(self.reservoir, num_own) + self._rng.sample(
+                other.reservoir, self.reservoir_size - num_own
+            )
+        self.count = count
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.m2 / self.count) if self.count else math.nan
+
+    def stat(self, stat: str) -> float:
+        if stat == "mean":
+            return self.mean if self.count else math.nan
+        elif stat == "std":
+            return self.std
+        elif stat == "min":
+            return self.min
+        elif stat == "max":
+            return self.max
+        elif stat == "n_samples":
+            return self.count
+        else:
+            raise ValueError(f"Unknown {stat =}")
+
+
+def bootstrap_means(
+    name2values: dict[str, Sequence[float]],
+    num_iterations: int | None = None,
+    seed: int = 0,
+    sample_sizes: dict[str, int] | None = None,
+) -> dict[str, np.ndarray]:
+    """
+    Bootstrap distribution of the mean of every metric, as arrays of num_iterations
+    resampled means. Metrics with the same number of values share one matrix of
+    resample counts, so each group costs one matrix product. The RNG is seeded per
+    group, so a metric's distribution does not depend on the other metrics.
+    sample_sizes gives the size of each resample where the values are a subsample
+    (such as a reservoir) of a larger sample; by default it is the number of values.
+    """
+    num_iterations = num_iterations or bootstrap_iterations()
+    sample_sizes = sample_sizes or {}
+    names_by_shape = defaultdict(list)
+    for name, values in name2values.items():
+        names_by_shape[len(values), sample_sizes.get(name, len(values))].append(name)
+    name2means = {}
+    for (m, n), names in names_by_shape.items():
+        if m == 0:
+            name2means.update({name: np.full(num_iterations, np.nan) for name in names})
+            continue
+        values = np.array([name2values[name] for name in names], dtype=float)
+        means = np.empty((len(names), num_iterations))
+        rng = np.random.default_rng([seed, m, n])
+        block_size = max(1, _BOOTSTRAP_BLOCK_CELLS // max(m, n))
+        for start in range(0, num_iterations, block_size):
+            size = min(block_size, num_iterations - start)
+            indices = rng.integers(0, m, (size, n)) + m * np.arange(size)[:, None]
+            counts = np.bincount(indices.ravel(), minlength=size * m).reshape(size, m)
+            means[:, start : start + size] = values @ counts.T / n
+        name2means.update(zip(names, means))
+    return name2means
+
+
+def _compute_bootstrap_stat(
+    means: np.ndarray, stat: str, confidence: float | None = None
+):
+    if stat == "bootstrap_std":
+        return np.std(means)
+    alpha = (1 - (confidence or 0.95)) / 2
+    if stat == "bootstrap_ci_lower":
+        return np.quantile(means, alpha)
+    elif stat == "bootstrap_ci_upper":
+        return np.quantile(means, 1 - alpha)
     else:
         raise ValueError(f"Unknown {stat =}")
 
 
+def with_bootstrap_intervals(
+    stats: tuple[str, ...], confidence: float | None
+) -> tuple[str, ...]:
+    """
+    Add the bootstrap interval bounds to stats that include bootstrap_std.
+    """
+    if confidence is None or "bootstrap_std" not in stats:
+        return stats
+    return stats + tuple(
+        stat for stat in ("bootstrap_ci_lower", "bootstrap_ci_upper") if stat not in stats
+    )
+
+
+def accumulate_metrics(
+    single_eval_results: list[SingleEvalResult],
+    name2stats: Callable[[str], tuple[str, ...]],
+) -> dict[str, MetricAccumulator]:
+    """
+    One accumulator per metric (and "score") of the results. Only metrics with
+    bootstrap stats among name2stats(name) keep a reservoir of values.
+    """
+    reservoir_size = bootstrap_reservoir_size()
+    accumulators: dict[str, MetricAccumulator] = {}
+
+    def add(name: str, value: float) -> None:
+        accumulator = accumulators.get(name)
+        if accumulator is None:
+            bootstrapped = any(stat in BOOTSTRAP_STATS for stat in name2stats(name))
+            accumulator = accumulators[name] = MetricAccumulator(
+                reservoir_size if bootstrapped else 0
+            )
+        accumulator.add(value)
+
+    for single_eval_result in single_eval_results:
+        for name, value in single_eval_result.metrics.items():
+            add(name, value)
+        if single_eval_result.score is not None:
+            add("score", single_eval_result.score)
+    return accumulators
+
+
+def compute_stats(
+    name2accumulator: dict[str, MetricAccumulator],
+    name2stats: dict[str, tuple[str, ...]],
+    bootstrap_confidence: float | None = None,
+    clip: tuple[float, float] | None = None,
+) -> dict[str, float]:
+    """
+    Compute the requested stats of every metric, keyed "name" for the mean and
+    "name:stat" otherwise. All bootstrap stats come from one bootstrap_means pass
+    over the accumulators' reservoirs. With clip, the mean and every resampled mean
+    are clipped to that range.
+    """
+    bootstrapped = [
+        name
+        for name in name2accumulator
+        if any(stat in BOOTSTRAP_STATS for stat in name2stats[name])
+    ]
+    name2means = bootstrap_means(
+        {name: name2accumulator[name].reservoir for name in bootstrapped},
+        sample_sizes={name: name2accumulator[name].count for name in bootstrapped},
+    )
+    final_metrics = {}
+    for name, accumulator in name2accumulator.items():
+        for stat in name2stats[name]:
+            key = name if stat == "mean" else f"{name}:{stat}"
+            if stat in BOOTSTRAP_STATS:
+                means = name2means[name]
+                if clip is not None:
+                    means = np.clip(means, *clip)
+                final_metrics[key] = _compute_bootstrap_stat(
+                    means, stat, bootstrap_confidence
+                )
+            elif stat == "mean" and clip is not None:
+                final_metrics[key] = np.clip(accumulator.mean, *clip)
+            else:
+                final_metrics[key] = accumulator.stat(stat)
+    return final_metrics
+
+
 def aggregate_results(
     single_eval_results: list[SingleEvalResult],
     default_stats: tuple[str, ...] = ("mean", "std"),
@@ -189,43 +632,198 @@ def aggregate_results(
     Aggregate results from multiple evaluations into a single EvalResult.
     """
     name2stats = name2stats or {}
-    name2values = defaultdict(list)
-    htmls = []
-    convos = []
-    metadata = []
-    for single_eval_result in single_eval_results:
-        for name, value in single_eval_result.metrics.items():
-            name2values[name].append(value)
-        if single_eval_result.score is not None:
-            name2values["score"].append(single_eval_result.score)
-        htmls.append(single_eval_result.html)
-        convos.append(single_eval_result.convo)
-        metadata.append(single_eval_result.example_level_metadata)
-    final_metrics = {}
-    for name, values in name2values.items():
-        stats = name2stats.get(name, default_stats)
-        for stat in stats:
-            key = name if stat == "mean" else f"{name}:{stat}"
-            final_metrics[key] = _compute_stat(values, stat)
+    confidence = bootstrap_confidence()
+
+    def stats_for(name: str) -> tuple[str, ...]:
+        return with_bootstrap_intervals(name2stats.get(name, default_stats), confidence)
+
+    name2accumulator = accumulate_metrics(single_eval_results, stats_for)
+    final_metrics = compute_stats(
+        name2accumulator,
+        {name: stats_for(name) for name in name2accumulator},
+        bootstrap_confidence=confidence,
+    )
     return EvalResult(
         score=final_metrics.pop("score", None),
         metrics=final_metrics,
-        htmls=htmls,
-        convos=convos,
-        metadata={"example_level_metadata": metadata},
+        htmls=ExampleHtmls(single_eval_results),
+        convos=[single_eval_result.convo for single_eval_result in single_eval_results],
+        metadata={
+            "example_level_metadata": [
+                single_eval_result.example_level_metadata
+                for single_eval_result in single_eval_results
+            ]
+        },
     )
 
 
+class RepeatedExamples(Sequence):
+    """
+    Virtual view of `examples * n_repeats` that does not copy any rows.
+    Index i is example i % len(examples) in repeat i // len(examples), the same order
+    as list multiplication. If given, `variation(row, example_id, repeat_id)` lazily
+    builds the per-repeat variant of a row (e.g. a shuffled choice order) and must
+    be deterministic.
+    """
+
+    def __init__(
+        self,
+        examples: list[Any],
+        n_repeats: int = 1,
+        variation: Callable[[Any, int, int], Any] | None = None,
+    ):
+        self.base_examples = examples
+        self.n_repeats = n_repeats
+        self.variation = variation
+
+    def __len__(self) -> int:
+        return len(self.base_examples) * self.n_repeats
+
+    def locate(self, index: int) -> tuple[int, int]:
+        """
+        Map a flat index to (example_id, repeat_id).
+        """
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(f"index {index} out of range")
+        repeat_id, example_id = divmod(index, len(self.base_examples))
+        return example_id, repeat_id
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        example_id, repeat_id = self.locate(index)
+        row = self.base_examples[example_id]
+        if self.variation is not None:
+            row = self.variation(row, example_id, repeat_id)
+        return row
+
+
+def repeat_metrics(
+    results: list[SingleEvalResult], examples: RepeatedExamples
+) -> dict[str, float]:
+    """
+    Statistics over repeats, with results grouped per example: the std of the score
+    across repeats, the mean within-example std and, for 0/1 scores, unbiased pass@k.
+    """
+    if examples.n_repeats <= 1 or any(r.score is None for r in results):
+        return {}
+    n = examples.n_repeats
+    # rows are repeats, columns are examples (see RepeatedExamples)
+    scores = np.array([float(r.score) for r in results]).reshape(n, -1)
+    metrics = {
+        "score:repeat_std": float(np.std(scores.mean(axis=1))),
+        "score:example_std": float(np.mean(scores.std(axis=0))),
+    }
+    if np.isin(scores, (0.0, 1.0)).all():
+        num_correct = scores.sum(axis=0).astype(int)
+        ks = sorted({2**i for i in range(n.bit_length()) if 2**i <= n} | {n})
+        for k in ks:
+            metrics[f"pass@{k}"] = float(
+                np.mean([1 - math.comb(n - c, k) / math.comb(n, k) for c in num_correct])
+            )
+    return metrics
+
+
+def shard_indices(num_examples: int, shard_index: int, num_shards: int) -> list[int]:
+    """
+    Deterministically select the example indices that belong to one shard.
+    Indices are strided, so repeated copies of an example are spread across shards.
+    """
+    if not 0 <= shard_index < num_shards:
+        raise ValueError(f"Invalid shard index {shard_index} for {num_shards} shards")
+    return list(range(shard_index, num_examples, num_shards))
+
+
+def _json_default(obj: Any) -> Any:
+    if isinstance(obj, (np.generic, np.ndarray)):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def write_shard_results(
+    path: str,
+    results: list[SingleEvalResult],
+    indices: list[int],
+    eval_name: str,
+    model_name: str,
+    shard_index: int,
+    num_shards: int,
+    num_examples: int,
+) -> None:
+    """
+    Write the raw per-example results of one shard so they can be merged later.
+    """
+    shard = {
+        "eval_name": eval_name,
+        "model_name": model_name,
+        "shard_index": shard_index,
+        "num_shards": num_shards,
+        "num_examples": num_examples,
+        "results": [
+            {"index": index, **dataclasses.asdict(result)}
+            for index, result in zip(indices, results, strict=True)
+        ],
+    }
+    with open(path, "w") as f:
+        f.write(json.dumps(shard, default=_json_default))
+
+
+def merge_shard_results(
+    paths: list[str],
+) -> dict[tuple[str, str], tuple[int, list[SingleEvalResult]]]:
+    """
+    Merge shard files written by write_shard_results. Returns, for each
+    (eval_name, model_name), the number of examples and the per-example results
+    in the same order as a single-node run.
+    """
+    shards = defaultdict(list)
+    for path in paths:
+        with open(path, "r") as f:
+            shard = json.load(f)
+        shards[(shard["eval_name"], shard["model_name"])].append(shard)
+
+    merged = {}
+    for key, key_shards in shards.items():
+        num_examples = key_shards[0]["num_examples"]
+        num_shards = key_shards[0]["num_shards"]
+        shard_ids = sorted(shard["shard_index"] for shard in key_shards)
+        if shard_ids != list(range(num_shards)):
+            raise ValueError(f"Expected shards 0..{num_shards - 1} for {key}, got {shard_ids}")
+        index2result = {}
+        for shard in key_shards:
+            if shard["num_examples"] != num_examples or shard["num_shards"] != num_shards:
+                raise ValueError(f"Shards for {key} come from different runs")
+            for row in shard["results"]:
+                index = row.pop("index")
+                assert index not in index2result, f"Duplicate example {index} for {key}"
+                index2result[index] = SingleEvalResult(**row)
+        if sorted(index2result) != list(range(num_examples)):
+            raise ValueError(f"Shards for {key} do not cover all {num_examples} examples")
+        merged[key] = (num_examples, [index2result[i] for i in range(num_examples)])
+    return merged
+
+
+def default_num_threads() -> int:
+    """
+    Threads used by map_with_progress, from SIMPLE_EVALS_NUM_THREADS (default: the
+    number of CPUs). Run specs raise it to match their provider concurrency budgets.
+    """
+    return int(os.environ.get("SIMPLE_EVALS_NUM_THREADS") or os.cpu_count() or 10)
+
+
 def map_with_progress(
     f: Callable,
     xs: list[Any],
-    num_threads: int = os.cpu_count() or 10,
+    num_threads: int | None = None,
     pbar: bool = True,
 ):
     """
     Apply f to each element of xs, using a ThreadPool, and show progress.
     """
     pbar_fn = tqdm if pbar else lambda x, *args, **kwargs: x
+    num_threads = num_threads or default_num_threads()
 
     if os.getenv("debug"):
         return list(map(f, pbar_fn(xs, total=len(xs))))
@@ -234,11 +832,55 @@ def map_with_progress(
             return list(pbar_fn(pool.imap(f, xs), total=len(xs)))
 
 
+def format_grading_items(items: list[str]) -> str:
+    """
+    Number the items of a batched grader request, starting from 1.
+    """
+    return "\n\n".join(
+        f'<item id="{item_id}">\n{item}\n</item>' for item_id, item in enumerate(items, start=1)
+    )
+
+
+def parse_grading_verdicts(response_text: str, num_items: int) -> dict[int, Any]:
+    """
+    Per-item verdicts from a batched grader response holding a JSON object keyed by
+    item ID. IDs outside 1..num_items are dropped, and a response that cannot be
+    parsed gives no verdicts, so callers can fall back to grading items one by one.
+    """
+    match = re.search(r"\{.*\}", response_text, re.DOTALL)
+    try:
+        verdicts = json.loads(match.group(0)) if match else {}
+    except json.JSONDecodeError:
+        return {}
+    if not isinstance(verdicts, dict):
+        return {}
+    return {
+        int(item_id): verdict
+        for item_id, verdict in verdicts.items()
+        if item_id.isdigit() and 1 <= int(item_id) <= num_items
+    }
+
+
+def chunks(xs: Sequence[Any], size: int) -> list[Sequence[Any]]:
+    return [xs[i : i + size] for i in range(0, len(xs), size)]
+
+
 jinja_env = jinja2.Environment(
     loader=jinja2.BaseLoader(),
     undefined=jinja2.StrictUndefined,
     autoescape=jinja2.select_autoescape(["html", "xml"]),
 )
+
+
+@functools.lru_cache(maxsize=None)
+def compiled_template(source: str) -> jinja2.Template:
+    """
+    Compiled template for a template source, compiled once per process. Report
+    fragments are rendered per example and per message, so anything that varies
+    per example must be passed as a variable rather than spliced into the source.
+    """
+    return jinja_env.from_string(source)
+
 _message_template = """
 <div class="message {{ role }}">
     <div class="role">
@@ -256,7 +898,7 @@ def message_to_html(message: Message) -> str:
     """
     Generate HTML snippet (inside a <div>) for a message.
     """
-    return jinja_env.from_string(_message_template).render(
+    return compiled_template(_message_template).render(
         role=message["role"],
         content=message["content"],
         variant=message.get("variant", None),
@@ -266,7 +908,7 @@ def message_to_html(message: Message) -> str:
 jinja_env.globals["message_to_html"] = message_to_html
 
 
-_report_template = """<!DOCTYPE html>
+_report_head = """<!DOCTYPE html>
 <html>
     <head>
         <style>
@@ -303,7 +945,9 @@ _report_template = """<!DOCTYPE html>
         </style>
     </head>
     <body>
-    {% if metrics %}
+"""
+
+_report_metrics = """    {% if metrics %}
     <h1>Metrics</h1>
     <table>
     <tr>
@@ -322,7 +966,12 @@ _report_template = """<!DOCTYPE html>
     {% endfor %}
     </table>
     {% endif %}
-    <h1>Examples</h1>
+"""
+
+_report_template = (
+    _report_head
+    + _report_metrics
+    + """    <h1>Examples</h1>
     {% for html in htmls %}
     {{ html | safe }}
     <hr>
@@ -330,13 +979,182 @@ _report_template = """<!DOCTYPE html>
     </body>
 </html>
 """
+)
+
+_report_page_nav = """    <p>
+    <a href="index.html">Index</a> | {{ title }}: page {{ page }} of {{ num_pages }}
+    {% if previous_file %}| <a href="{{ previous_file }}">Previous</a>{% endif %}
+    {% if next_file %}| <a href="{{ next_file }}">Next</a>{% endif %}
+    </p>
+"""
+
+_report_page_template = (
+    _report_head
+    + _report_page_nav
+    + """    {% for html in htmls %}
+    {{ html | safe }}
+    <hr>
+    {% endfor %}
+"""
+    + _report_page_nav
+    + """    </body>
+</html>
+"""
+)
+
+_report_index_template = (
+    _report_head
+    + _report_metrics
+    + """    <h1>Examples</h1>
+    <ul>
+    {% for view in views %}
+    <li>
+    {{ view.title }} ({{ view.num_examples }} examples), pages:
+    {% for file in view.files %}<a href="{{ file }}">{{ loop.index }}</a> {% endfor %}
+    </li>
+    {% endfor %}
+    </ul>
+    </body>
+</html>
+"""
+)
+
+
+def render_example_html(result: SingleEvalResult) -> str:
+    """
+    HTML snippet for one example, from its structured fields unless it was
+    rendered up front.
+    """
+    if result.html is not None:
+        return result.html
+    return compiled_template(result.html_template or HTML_JINJA).render(
+        prompt_messages=result.prompt or [],
+        next_message=dict(content=result.response, role="assistant"),
+        score=result.score,
+        correct_answer=result.correct_answer,
+        extracted_answer=result.extracted_answer,
+        **(result.html_fields or {}),
+    )
+
+
+class ExampleHtmls(Sequence):
+    """
+    The example HTML snippets of a list of results, rendered only when a report
+    is made rather than while the eval runs.
+    """
+
+    def __init__(self, results: list[SingleEvalResult]):
+        self.results = results
+
+    def __len__(self) -> int:
+        return len(self.results)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return render_example_html(self.results[index])
+
+
+def _stream_template(path: str, source: str, **variables: Any) -> None:
+    # generate() yields the output piece by piece, so each example's HTML is
+    # rendered, written and dropped before the next one
+    with open(path, "w") as fh:
+        fh.writelines(compiled_template(source).generate(**variables))
+
+
+def write_report(path: str, eval_result: EvalResult) -> None:
+    """
+    Stream the report of eval_result to path without holding it in memory. Can
+    be run in a separate process after the eval, since example HTML is rendered
+    here.
+    """
+    _stream_template(
+        path,
+        _report_template,
+        score=eval_result.score,
+        metrics=eval_result.metrics,
+        htmls=eval_result.htmls,
+    )
+
+
+def report_views(results: list[SingleEvalResult]) -> list[tuple[str, list[int]]]:
+    """
+    Orderings of the examples for a paginated report, as (title, example indices):
+    all examples in eval order, lowest scores (wrong answers) first, and lowest
+    scores first within each category.
+    """
+
+    def lowest_scores_first(indices: list[int]) -> list[int]:
+        # stable, so ties keep eval order; unscored examples go last
+        return sorted(
+            indices,
+            key=lambda i: (results[i].score is None, float(results[i].score or 0)),
+        )
+
+    all_indices = list(range(len(results)))
+    views = [("All examples", all_indices)]
+    if any(result.score is not None for result in results):
+        views.append(("Lowest scores first", lowest_scores_first(all_indices)))
+    category2indices = defaultdict(list)
+    for i, result in enumerate(results):
+        if result.category is not None:
+            category2indices[result.category].append(i)
+    for category in sorted(category2indices):
+        views.append(
+            (f"Category {category}", lowest_scores_first(category2indices[category]))
+        )
+    return views
+
+
+def write_paginated_report(
+    directory: str, eval_result: EvalResult, page_size: int = 500
+) -> str:
+    """
+    Write the report of eval_result as an index page with the metrics, plus pages
+    of at most page_size examples for each of report_views. Pages are streamed to
+    disk one at a time. Returns the path of the index page.
+    """
+    os.makedirs(directory, exist_ok=True)
+    htmls = eval_result.htmls
+    if isinstance(htmls, ExampleHtmls):
+        views = report_views(htmls.results)
+    else:
+        # pre-rendered HTML carries no scores or categories to order by
+        views = [("All examples", list(range(len(htmls))))]
+
+    index_views = []
+    for view_id, (title, indices) in enumerate(views):
+        pages = chunks(indices, page_size)
+        files = [f"view{view_id}_page{page + 1}.html" for page in range(len(pages))]
+        for page, page_indices in enumerate(pages):
+            _stream_template(
+                os.path.join(directory, files[page]),
+                _report_page_template,
+                title=title,
+                page=page + 1,
+                num_pages=len(pages),
+                previous_file=files[page - 1] if page > 0 else None,
+                next_file=files[page + 1] if page + 1 < len(pages) else None,
+                htmls=(htmls[i] for i in page_indices),
+            )
+        index_views.append({"title": title, "num_examples": len(indices), "files": files})
+
+    index_path = os.path.join(directory, "index.html")
+    _stream_template(
+        index_path,
+        _report_index_template,
+        score=eval_result.score,
+        metrics=eval_result.metrics,
+        views=index_views,
+    )
+    return index_path
 
 
 def make_report(eval_result: EvalResult) -> str:
     """
     Create a standalone HTML report from an EvalResult.
     """
-    return jinja_env.from_string(_report_template).render(
+    return compiled_template(_report_template).render(
         score=eval_result.score,
         metrics=eval_result.metrics,
         htmls=eval_result.htmls,
@@ -347,7 +1165,7 @@ def make_report_from_example_htmls(htmls: list[str]):
     """
     Create a standalone HTML report from a list of example htmls
     """
-    return jinja_env.from_string(_report_template).render(
+    return compiled_template(_report_template).render(
         score=None, metrics={}, htmls=htmls
     )
 
@@ -374,25 +1192,98 @@ def normalize_response(response: str) -> str:
     )
 
 
+def normalize_responses(responses: list[str]) -> list[str]:
+    """
+    normalize_response over a list of responses, aligned by index.
+    """
+    # joining the batch and running the replacement chain once is not faster: the
+    # joined string is as wide as its widest response, and str.replace is already C
+    return [normalize_response(response) for response in responses]
+
+
+# letters used for A-D in multiple choice questions in other scripts
+EXTRACTED_ANSWER_TRANSLATION = str.maketrans(
+    {
+        # Arabic
+        "أ": " A",
+        "ب": " B",
+        "ج": " C",
+        "د": " D",
+        # Bengali
+        "অ": " A",
+        "ব": " B",
+        "ড": " C",
+        "ঢ": " D",
+        # Japanese (full-width)
+        "Ａ": " A",
+        "Ｂ": " B",
+        "Ｃ": " C",
+        "Ｄ": " D",
+    }
+)
+
+
 def normalize_extracted_answer(extracted_answer: str) -> str:
-    return (
-        # In arabic these are the letters used for A-D in multiple choice questions
-        extracted_answer.replace("أ", " A")
-        .replace("ب", " B")
-        .replace("ج", " C")
-        .replace("د", " D")
-        # In Bengali these are the letters used for A-D in multiple choice questions
-        .replace("অ", " A")
-        .replace("ব", " B")
-        .replace("ড", " C")
-        .replace("ঢ", " D")
-        # In Japanese these are the letters sometimes used for A-D in multiple choice questions
-        .replace("Ａ", " A")
-        .replace("Ｂ", " B")
-        .replace("Ｃ", " C")
-        .replace("Ｄ", " D")
-        .strip()
-    )
+    return extracted_answer.translate(EXTRACTED_ANSWER_TRANSLATION).strip()
+
+
+def _extract_answers_chunk(
+    extractor: AnswerExtractor, normalize: bool, responses: list[str]
+) -> list[str | None]:
+    extracted_answers = [extractor.extract(response) for response in responses]
+    if normalize:
+        extracted_answers = [
+            None if answer is None else normalize_extracted_answer(answer)
+            for answer in extracted_answers
+        ]
+    return extracted_answers
+
+
+def extract_answers(
+    responses: list[str],
+    extractor: AnswerExtractor,
+    normalize: bool = False,
+    num_processes: int | None = None,
+    chunk_size: int = 1000,
+) -> list[str | None]:
+    """
+    Extract answers from a list of responses, aligned by index (None where nothing
+    matched), optionally passing them through normalize_extracted_answer.
+
+    With num_processes > 1 (default: the SIMPLE_EVALS_EXTRACTION_PROCESSES env var, or
+    1), batches larger than chunk_size are split across a process pool.
+    """
+    if num_processes is None:
+        num_processes = int(os.environ.get("SIMPLE_EVALS_EXTRACTION_PROCESSES", "1"))
+    extract_chunk = functools.partial(_extract_answers_chunk, extractor, normalize)
+    if num_processes <= 1 or len(responses) <= chunk_size:
+        return extract_chunk(responses)
+    chunks = [responses[i : i + chunk_size] for i in range(0, len(responses), chunk_size)]
+    with ProcessPoolExecutor(num_processes) as executor:
+        return [answer for chunk in executor.map(extract_chunk, chunks) for answer in chunk]
+
+
+CACHE_DIR = os.environ.get(
+    "SIMPLE_EVALS_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "simple-evals")
+)
+
+
+def cache_path(*parts: str) -> str:
+    """
+    Path inside the local cache directory (SIMPLE_EVALS_CACHE_DIR), creating parents.
+    """
+    path = os.path.join(CACHE_DIR, *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
+
+def extract_multilingual_answer(response_text: str) -> str | None:
+    """
+    Extract a multiple choice letter from a (normalized) response in any of the
+    languages in MULTILINGUAL_ANSWER_REGEXES.
+    """
+    extracted_answer = MULTILINGUAL_ANSWER_EXTRACTOR.extract(response_text)
+    return None if extracted_answer is None else normalize_extracted_answer(extracted_answer)
 
 
 def url_to_fileobj(url: str, binary=False) -> Any:
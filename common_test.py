@@ -0,0 +1,250 @@
+import math
+import os
+import random
+import re
+import statistics
+import tempfile
+
+from . import common
+from .eval_types import SingleEvalResult
+
+
+def test_shard_indices_partition():
+    num_examples, num_shards = 11, 3
+    shards = [
+        common.shard_indices(num_examples, shard_index, num_shards)
+        for shard_index in range(num_shards)
+    ]
+    assert sorted(i for shard in shards for i in shard) == list(range(num_examples))
+    assert shards[1] == [1, 4, 7, 10]
+
+
+def test_merge_shard_results():
+    results = [
+        SingleEvalResult(score=float(i % 2), metrics={"chars": i}, html=f"<p>{i}</p>")
+        for i in range(5)
+    ]
+    with tempfile.TemporaryDirectory() as tmpdir:
+        paths = []
+        for shard_index in range(2):
+            indices = common.shard_indices(len(results), shard_index, 2)
+            path = os.path.join(tmpdir, f"shard{shard_index}.json")
+            common.write_shard_results(
+                path,
+                [results[i] for i in indices],
+                indices,
+                eval_name="mmlu",
+                model_name="gpt-4.1",
+                shard_index=shard_index,
+                num_shards=2,
+                num_examples=len(results),
+            )
+            paths.append(path)
+        merged = common.merge_shard_results(paths)
+
+    num_examples, merged_results = merged[("mmlu", "gpt-4.1")]
+    assert num_examples == len(results)
+    assert [r.score for r in merged_results] == [r.score for r in results]
+    assert [r.metrics for r in merged_results] == [r.metrics for r in results]
+    assert [r.html for r in merged_results] == [r.html for r in results]
+
+
+def test_repeated_examples():
+    examples = [{"id": "a"}, {"id": "b"}, {"id": "c"}]
+    repeated = common.RepeatedExamples(
+        examples,
+        n_repeats=2,
+        variation=lambda row, example_id, repeat_id: row | {"repeat": repeat_id},
+    )
+    assert len(repeated) == 6
+    assert [row["id"] for row in repeated] == [row["id"] for row in examples * 2]
+    assert repeated.locate(4) == (1, 1)
+    assert repeated[4] == {"id": "b", "repeat": 1}
+    assert repeated[-1] == {"id": "c", "repeat": 1}
+
+
+def test_repeat_metrics():
+    repeated = common.RepeatedExamples([{}, {}], n_repeats=2)
+    # example 0 is right in both repeats, example 1 only in the second repeat
+    results = [SingleEvalResult(score=s) for s in (1.0, 0.0, 1.0, 1.0)]
+    metrics = common.repeat_metrics(results, repeated)
+    assert metrics["pass@1"] == 0.75
+    assert metrics["pass@2"] == 1.0
+    assert metrics["score:repeat_std"] == 0.25
+    assert metrics["score:example_std"] == 0.25
+
+
+def test_answer_extractor_keeps_pattern_priority():
+    extractor = common.AnswerExtractor([r"(?i)Final: ([A-D])", r"(?i)Answer: ([A-D])"])
+    # the lower-priority pattern matches first in the text, but the first pattern wins
+    assert extractor.extract("Answer: B ... Final: C") == "C"
+    assert extractor.extract("answer: d") == "d"
+    assert extractor.extract("no answer here") is None
+    # re.IGNORECASE matches the long s against "s", which str.lower() does not
+    assert common.MULTICHOICE_ANSWER_EXTRACTOR.extract("Anſwer: B") == "B"
+
+    text = "Some reasoning.\nRéponse : B\nAnswer: C"
+    legacy = None
+    for regex in common.MULTILINGUAL_ANSWER_REGEXES:
+        match = re.search(common.MULTILINGUAL_ANSWER_PATTERN_TEMPLATE.format(regex), text)
+        if match:
+            legacy = common.normalize_extracted_answer(match.group(1))
+            break
+    assert common.extract_multilingual_answer(text) == legacy
+
+
+def test_extract_answers_is_aligned_by_index():
+    responses = ["**Answer: $\\boxed{B}$**", "no answer", "Réponse : ব", "答案：Ｃ", ""]
+    assert common.extract_answers(
+        common.normalize_responses(responses), common.MULTILINGUAL_ANSWER_EXTRACTOR, normalize=True
+    ) == ["B", None, "B", "C", None]
+
+
+def test_check_equality_locally():
+    assert common.check_equality_locally("5", "5") is True
+    assert common.check_equality_locally("5", None) is False
+    assert common.check_equality_locally("\\dfrac{1}{2}", "$\\frac{1}{2}$") is True
+    assert common.check_equality_locally("1,000", "1000.0") is True
+    assert common.check_equality_locally("1.5", "2") is False
+    # nontrivial arithmetic, units and anything unparsed are left to the grader
+    assert common.check_equality_locally("3245/5", "649") is None
+    assert common.check_equality_locally("72 degrees", "72") is None
+
+
+def test_parse_grading_verdicts():
+    response = 'Here you go:\n```json\n{"1": "A", "2": {"correct": "no"}, "7": "C", "x": "B"}\n```'
+    assert common.parse_grading_verdicts(response, 3) == {1: "A", 2: {"correct": "no"}}
+    # unparseable responses give no verdicts, so every item is graded on its own
+    assert common.parse_grading_verdicts('{"1": "A",', 3) == {}
+    assert common.parse_grading_verdicts("A", 1) == {}
+
+
+def test_bootstrap_means():
+    values = [0.0, 1.0, 1.0, 0.0, 1.0, 1.0, 1.0, 0.0]
+    name2means = common.bootstrap_means(
+        {"a": values, "b": [1.0 - v for v in values], "c": [2.0]}, num_iterations=2000
+    )
+    # one resample matrix per length, seeded, so results are reproducible and
+    # metrics of the same length are resampled jointly
+    assert (name2means["a"] == common.bootstrap_means({"a": values}, 2000)["a"]).all()
+    assert (name2means["a"] + name2means["b"] == 1.0).all()
+    assert (name2means["c"] == 2.0).all()
+    # std of a resampled mean of n Bernoulli(p) draws is about sqrt(p(1-p)/n)
+    assert abs(name2means["a"].std() - (0.625 * 0.375 / 8) ** 0.5) < 0.02
+
+    accumulator = common.MetricAccumulator(reservoir_size=len(values))
+    for value in values:
+        accumulator.add(value)
+    final_metrics = common.compute_stats(
+        {"a": accumulator},
+        {"a": ("mean", "bootstrap_ci_lower", "bootstrap_ci_upper")},
+        bootstrap_confidence=0.9,
+        clip=(0, 0.7),
+    )
+    assert final_metrics["a"] == 0.625
+    assert 0 <= final_metrics["a:bootstrap_ci_lower"] < 0.625 < final_metrics["a:bootstrap_ci_upper"] <= 0.7
+
+
+def test_metric_accumulators_merge():
+    rng = random.Random(0)
+    values = [rng.gauss(0.5, 0.2) for _ in range(1000)]
+    accumulators = [common.MetricAccumulator(reservoir_size=100, seed=i) for i in range(3)]
+    for i, value in enumerate(values):
+        accumulators[i % 3].add(value)
+    merged = accumulators[0]
+    merged.merge(accumulators[1])
+    merged.merge(accumulators[2])
+
+    assert merged.count == 1000
+    assert math.isclose(merged.mean, statistics.fmean(values))
+    assert math.isclose(merged.std, statistics.pstdev(values))
+    assert (merged.min, merged.max) == (min(values), max(values))
+    assert len(merged.reservoir) == 100 and set(merged.reservoir) <= set(values)
+
+    # below the reservoir size every value is kept, in order
+    small = common.MetricAccumulator(reservoir_size=10)
+    for value in values[:5]:
+        small.add(value)
+    assert small.reservoir == values[:5]
+
+    # a side with a smaller reservoir never gives more values than it holds
+    sparse = common.MetricAccumulator(reservoir_size=2)
+    for value in values[:500]:
+        sparse.add(value)
+    dense = common.MetricAccumulator(reservoir_size=10)
+    for value in values[500:520]:
+        dense.add(value)
+    dense.merge(sparse)
+    assert dense.count == 520
+    assert len(dense.reservoir) == 10 and set(sparse.reservoir) <= set(dense.reservoir)
+
+
+def test_example_htmls_are_rendered_on_access():
+    prompt = [{"role": "user", "content": "2 + 2 = ?"}]
+    results = [
+        SingleEvalResult(
+            score=1.0,
+            prompt=prompt,
+            response="Answer: 4",
+            extracted_answer="4",
+            correct_answer="4",
+        ),
+        SingleEvalResult(
+            score=0.0,
+            prompt=prompt,
+            response="Answer: <5>",
+            html_template=common.HTML_JINJA.replace(
+                "<p>Correct Answer: {{ correct_answer }}</p>\n", ""
+            )
+            + "<p>{{ note }}</p>",
+            html_fields={"note": "rendered later"},
+        ),
+        SingleEvalResult(score=None, html="<p>pre-rendered</p>"),
+    ]
+    htmls = common.ExampleHtmls(results)
+    assert len(htmls) == 3
+    # same output as rendering while the eval runs
+    assert htmls[0] == common.jinja_env.from_string(common.HTML_JINJA).render(
+        prompt_messages=prompt,
+        next_message=dict(content="Answer: 4", role="assistant"),
+        score=1.0,
+        correct_answer="4",
+        extracted_answer="4",
+    )
+    assert "&lt;5&gt;" in htmls[1] and "<p>rendered later</p>" in htmls[1]
+    assert "Correct Answer" not in htmls[1]
+    assert htmls[2] == "<p>pre-rendered</p>"
+    assert htmls[1:] == [htmls[1], htmls[2]]
+
+
+
+def test_streamed_and_paginated_reports():
+    results = [
+        SingleEvalResult(
+            score=float(i % 3 != 0),
+            metrics={"chars": i},
+            prompt=[{"role": "user", "content": f"question {i}"}],
+            response=f"response {i}",
+            category="odd" if i % 2 else "even",
+        )
+        for i in range(7)
+    ]
+    eval_result = common.aggregate_results(results)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "report.html")
+        common.write_report(path, eval_result)
+        with open(path) as f:
+            assert f.read() == common.make_report(eval_result)
+
+        index_path = common.write_paginated_report(tmpdir, eval_result, page_size=3)
+        with open(index_path) as f:
+            index = f.read()
+        assert "chars" in index and "Category odd" in index
+        views = [title for title, _ in common.report_views(results)]
+        assert views == ["All examples", "Lowest scores first", "Category even", "Category odd"]
+        # wrong answers come first, each example once per view
+        with open(os.path.join(tmpdir, "view1_page1.html")) as f:
+            first_page = f.read()
+        assert [f"response {i}" in first_page for i in (0, 3, 6)] == [True] * 3
+        assert "page 1 of 3" in first_page and 'href="view1_page2.html"' in first_page
+        assert not os.path.exists(os.path.join(tmpdir, "view1_page4.html"))
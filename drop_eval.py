@@ -4,6 +4,7 @@ Dheeru Dua, Yizhong Wang, Pradeep Dasigi, Gabriel Stanovsky, Sameer Singh, Matt
 https://arxiv.org/abs/1903.00161
 """
 
+import functools
 import gzip
 import json
 import random
@@ -15,7 +16,7 @@ import numpy as np
 from scipy.optimize import linear_sum_assignment
 
 from . import common
-from .common import ANSWER_PATTERN, HTML_JINJA
+from .common import ANSWER_PATTERN
 from .eval_types import Eval, EvalResult, SamplerBase, SingleEvalResult
 
 """
@@ -28,9 +29,12 @@ The rest was originally copied from https://github.com/allenai/allennlp-reading-
 """
 
 
+ARTICLES_REGEX = re.compile(r"\b(a|an|the)\b", re.UNICODE)
+TOKEN_SPLIT_REGEX = re.compile(" |-")
+
+
 def _remove_articles(text: str) -> str:
-    regex = re.compile(r"\b(a|an|the)\b", re.UNICODE)
-    return re.sub(regex, " ", text)
+    return ARTICLES_REGEX.sub(" ", text)
 
 
 def _white_space_fix(text: str) -> str:
@@ -52,9 +56,10 @@ def _lower(text: str) -> str:
 
 
 def _tokenize(text: str) -> List[str]:
-    return re.split(" |-", text)
+    return TOKEN_SPLIT_REGEX.split(text)
 
 
+@functools.lru_cache(maxsize=2**16)
 def _normalize_answer(text: str) -> str:
     """Lower text and remove punctuation, articles and extra whitespace."""
 
@@ -67,6 +72,7 @@ def _normalize_answer(text: str) -> str:
     return normalized
 
 
+@functools.lru_cache(maxsize=2**16)
 def _is_number(text: str) -> bool:
     try:
         float(text)
@@ -103,6 +109,11 @@ def _align_bags(predicted: List[Set[str]], gold: List[Set[str]]) -> List[float]:
     Takes gold and predicted answer sets and first finds the optimal 1-1 alignment
     between them and gets maximum metric values over all the answers.
     """
+    if len(gold) == 1 and len(predicted) == 1:
+        # a single span on each side aligns trivially
+        if _match_numbers_if_present(gold[0], predicted[0]):
+            return np.array([_compute_f1(predicted[0], gold[0])])
+        return np.zeros([1])
     scores = np.zeros([len(gold), len(predicted)])
     for gold_index, gold_item in enumerate(gold):
         for pred_index, pred_item in enumerate(predicted):
@@ -158,9 +169,12 @@ def get_drop_metrics(
     validation, or while training), this is the function you want to call, after using
     :func:`answer_json_to_strings` when reading the gold answer from the released data file.
     """
-    predicted_bags = _answer_to_bags(predicted)
-    gold_bags = _answer_to_bags(gold)
+    return _drop_metrics_from_bags(_answer_to_bags(predicted), _answer_to_bags(gold))
+
 
+def _drop_metrics_from_bags(
+    predicted_bags: Tuple[List[str], List[Set[str]]], gold_bags: Tuple[List[str], List[Set[str]]]
+) -> Tuple[float, float]:
     if set(predicted_bags[0]) == set(gold_bags[0]) and len(predicted_bags[0]) == len(gold_bags[0]):
         exact_match = 1.0
     else:
@@ -233,30 +247,67 @@ def drop_metric(sample: str, reference: list[str]) -> Tuple[float, float]:
     return (max(em_scores), max(f1_scores))
 
 
+class DropScorer:
+    """
+    Scores samples against DROP references like drop_metric, keeping the normalized
+    token bags of every reference answer it has seen so each gold answer is only
+    normalized once, however many samples are scored against it.
+    """
+
+    def __init__(self):
+        self._gold_bags: dict[str, Tuple[List[str], List[Set[str]]]] = {}
+
+    def _get_gold_bags(self, answer: str) -> Tuple[List[str], List[Set[str]]]:
+        if answer not in self._gold_bags:
+            self._gold_bags[answer] = _answer_to_bags(answer)
+        return self._gold_bags[answer]
+
+    def score(self, sample: str, reference: list[str]) -> Tuple[float, float]:
+        predicted_bags = _answer_to_bags(sample)
+        metrics = [
+            _drop_metrics_from_bags(predicted_bags, self._get_gold_bags(answer))
+            for answer in reference
+            if answer.strip() != ""
+        ]
+        return (max(em for em, _ in metrics), max(f1 for _, f1 in metrics))
+
+    def score_batch(
+        self, samples: list[str], references: list[list[str]]
+    ) -> list[Tuple[float, float]]:
+        return [
+            self.score(sample, reference)
+            for sample, reference in zip(samples, references, strict=True)
+        ]
+
+
+TRAIN_JSONL_URL = "https://openaipublic.blob.core.windows.net/simple-evals/drop_v0_train.jsonl.gz"
+DEV_JSONL_URL = "https://openaipublic.blob.core.windows.net/simple-evals/drop_v0_dev.jsonl.gz"
+
+
 class DropEval(Eval):
     def __init__(self, num_examples: int | None = None, train_samples_per_prompt: int = 3):
         self.seed = 42
         self._num_examples = num_examples
         self._train_samples_per_prompt = train_samples_per_prompt
-        self.train_jsonl = (
-            "https://openaipublic.blob.core.windows.net/simple-evals/drop_v0_train.jsonl.gz"
-        )
-        self.test_jsonl = (
-            "https://openaipublic.blob.core.windows.net/simple-evals/drop_v0_dev.jsonl.gz"
-        )
+        self.scorer = DropScorer()
+        self.train_jsonl = TRAIN_JSONL_URL
+        self.test_jsonl = DEV_JSONL_URL
         with gzip.GzipFile(fileobj=common.url_to_fileobj(self.train_jsonl, binary=True), mode="rb") as f:
             self.train_samples = list(map(json.loads, f.readlines()))
         with gzip.GzipFile(fileobj=common.url_to_fileobj(self.test_jsonl, binary=True), mode="rb") as f:
-            self.test_samples = list(map(json.loads, f.readlines()))
+            self.examples = list(map(json.loads, f.readlines()))
             if self._num_examples:
-                self.test_samples = random.Random(self.seed).sample(
-                    self.test_samples, self._num_examples
+                self.examples = random.Random(self.seed).sample(
+                    self.examples, self._num_examples
                 )
 
-    def __call__(self, sampler: SamplerBase) -> EvalResult:
-        rng = random.Random(self.seed)
-
+    def run(
+        self, sampler: SamplerBase, examples: list[dict[str, str]]
+    ) -> list[SingleEvalResult]:
         def fn(example: dict[str, str]):
+            # seeded per example, so prompts do not depend on how examples are
+            # split across shards, leases and chunks
+            rng = random.Random(f"{self.seed}-{example['context']}")
             stuffing = rng.sample(self.train_samples, self._train_samples_per_prompt)
 
             # prompt = """TASK: Read the provided passage, then identify the correct answer to questions below."""
@@ -285,29 +336,40 @@ Think step by step, then write a line of the form "Answer: $ANSWER" at the end o
                     actual_queried_prompt_messages = sampler_response.actual_queried_message_list
                     match = re.search(ANSWER_PATTERN, response_text)
                     extracted_answer = match.group(1) if match else response_text
-                    em_score, f1_score = drop_metric(extracted_answer, correct_answers)
-                    matches = [
-                        fuzzy_match(extracted_answer, correct_answer)
-                        for correct_answer in correct_answers
-                    ]
-                    extracted_answers = [
-                        extracted_answer for i in range(len(correct_answers)) if matches[i]
-                    ]
-                    score = True in matches
-                    html = common.jinja_env.from_string(HTML_JINJA).render(
-                        prompt_messages=actual_queried_prompt_messages,
-                        next_message=dict(content=extracted_answer, role="assistant"),
-                        score=score,
-                        correct_answer=correct_answers,
-                        extracted_answer=extracted_answers,
-                    )
-                    convo = actual_queried_prompt_messages + [dict(content=extracted_answer, role="assistant")]
-                    return SingleEvalResult(
-                        html=html,
-                        score=score,
-                        convo=convo,
-                        metrics={"em_score": em_score, "f1_score": f1_score},
-                    )
-
-        results = common.map_with_progress(fn, self.test_samples)
+                    return extracted_answer, correct_answers, actual_queried_prompt_messages
+
+        sampled = common.map_with_progress(fn, examples)
+        # score the whole result set at once, normalizing each gold answer only once
+        drop_scores = self.scorer.score_batch(
+            [extracted_answer for extracted_answer, _, _ in sampled],
+            [correct_answers for _, correct_answers, _ in sampled],
+        )
+
+        results = []
+        for (extracted_answer, correct_answers, actual_queried_prompt_messages), (
+            em_score,
+            f1_score,
+        ) in zip(sampled, drop_scores, strict=True):
+            matches = [
+                fuzzy_match(extracted_answer, correct_answer) for correct_answer in correct_answers
+            ]
+            extracted_answers = [
+                extracted_answer for i in range(len(correct_answers)) if matches[i]
+            ]
+            score = True in matches
+            convo = actual_queried_prompt_messages + [dict(content=extracted_answer, role="assistant")]
+            results.append(
+                SingleEvalResult(
+                    score=score,
+                    convo=convo,
+                    metrics={"em_score": em_score, "f1_score": f1_score},
+                    prompt=actual_queried_prompt_messages,
+                    response=extracted_answer,
+                    extracted_answer=extracted_answers,
+                    correct_answer=correct_answers,
+                )
+            )
+        return results
+
+    def aggregate(self, results: list[SingleEvalResult]) -> EvalResult:
         return common.aggregate_results(results)
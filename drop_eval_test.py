@@ -0,0 +1,53 @@
+from . import drop_eval
+
+
+def test_drop_scorer_matches_drop_metric():
+    references = [["12", "twelve"], ["the Bears", "Bears|Packers"], ["4.0 yards"], ["Smith", "Jones"]]
+    samples = ["12.0", "Bears", "4 yards", "Jones and Smith"]
+    scorer = drop_eval.DropScorer()
+    expected = [
+        drop_eval.drop_metric(sample, reference)
+        for sample, reference in zip(samples, references)
+    ]
+    assert scorer.score_batch(samples, references) == expected
+    # gold answers are normalized once and reused
+    assert scorer.score_batch(samples, references) == expected
+    assert expected[0] == (1.0, 100.0)
+
+
+def test_align_bags_multi_span():
+    predicted = [{"smith"}, {"jones"}]
+    gold = [{"jones"}, {"smith"}, {"brown"}]
+    assert list(drop_eval._align_bags(predicted, gold)) == [100.0, 100.0, 0.0]
+
+
+def test_prompts_do_not_depend_on_batching():
+    from .eval_types import SamplerBase, SamplerResponse
+
+    class RecordingSampler(SamplerBase):
+        def __init__(self):
+            self.prompts = {}
+
+        def _pack_message(self, role, content):
+            return {"role": role, "content": content}
+
+        def __call__(self, message_list):
+            prompt = message_list[-1]["content"]
+            self.prompts[prompt.split("# Your Task")[1]] = prompt
+            return SamplerResponse("Answer: 1", message_list, {})
+
+    eval_obj = object.__new__(drop_eval.DropEval)
+    eval_obj.seed = 42
+    eval_obj._train_samples_per_prompt = 2
+    eval_obj.scorer = drop_eval.DropScorer()
+    eval_obj.train_samples = [
+        {"context": f"train {i}", "completion": str(i), "ref_text": str(i)} for i in range(20)
+    ]
+    examples = [{"context": f"test {i}", "completion": "", "ref_text": "1"} for i in range(6)]
+
+    whole, batched = RecordingSampler(), RecordingSampler()
+    eval_obj.run(whole, examples)
+    for i in range(0, len(examples), 2):
+        eval_obj.run(batched, examples[i : i + 2])
+    assert len(whole.prompts) == 6
+    assert whole.prompts == batched.prompts
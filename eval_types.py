@@ -1,5 +1,5 @@
 from dataclasses import dataclass, field
-from typing import Any, Literal, overload
+from typing import Any, Literal, Sequence, overload
 
 Message = dict[str, Any]  # keys role, content
 MessageList = list[Message]
@@ -27,6 +27,13 @@ class SamplerBase:
     ) -> SamplerResponse:
         raise NotImplementedError
 
+    def with_response_format(self, response_format: dict[str, Any]) -> "SamplerBase":
+        """
+        Sampler that asks the provider for structured output such as
+        {"type": "json_object"}. Samplers without such a mode return themselves.
+        """
+        return self
+
 
 @dataclass
 class EvalResult:
@@ -36,7 +43,7 @@ class EvalResult:
 
     score: float | None  # top-line metric
     metrics: dict[str, float] | None  # other metrics
-    htmls: list[str]  # strings of valid HTML
+    htmls: Sequence[str]  # strings of valid HTML, possibly rendered on access
     convos: list[MessageList]  # sampled conversations
     metadata: dict[str, Any] | None  # Extra data such as rubric scores or sollen
 
@@ -49,18 +56,39 @@ class SingleEvalResult:
 
     score: float | None
     metrics: dict[str, float] = field(default_factory=dict)
-    html: str | None = None
+    html: str | None = None  # pre-rendered HTML; otherwise rendered from the fields below
     convo: MessageList | None = None  # sampled conversation
     example_level_metadata: dict[str, Any] | None = (
         None  # Extra data such as rubric scores or sollen
     )
+    prompt: MessageList | None = None  # actually queried prompt messages
+    response: str | None = None  # sampled message shown in the report
+    extracted_answer: Any = None
+    correct_answer: Any = None
+    html_template: str | None = None  # Jinja template for the report, common.HTML_JINJA if None
+    html_fields: dict[str, Any] | None = None  # extra variables for html_template
+    category: str | None = None  # groups examples in paginated reports
 
 
 class Eval:
     """
     Base class for defining an evaluation.
+
+    `run` evaluates a list of examples and returns one SingleEvalResult per example,
+    in order. `aggregate` turns the results for all of `examples` into an EvalResult.
+    Keeping the two apart lets a single eval be split across machines and merged.
     """
 
+    examples: Sequence[Any]
+
     def __call__(self, sampler: SamplerBase) -> EvalResult:
+        return self.aggregate(self.run(sampler, self.examples))
+
+    def run(
+        self, sampler: SamplerBase, examples: Sequence[Any]
+    ) -> list[SingleEvalResult]:
+        raise NotImplementedError
+
+    def aggregate(self, results: list[SingleEvalResult]) -> EvalResult:
         raise NotImplementedError
 
@@ -5,15 +5,20 @@ https://arxiv.org/abs/2311.12022
 """
 
 import random
-import re
 
 import pandas
 
 from . import common
-from .common import ANSWER_PATTERN_MULTICHOICE, HTML_JINJA, format_multichoice_question
+from .common import MULTICHOICE_ANSWER_EXTRACTOR, format_multichoice_question
 from .eval_types import Eval, EvalResult, MessageList, SamplerBase, SingleEvalResult
 
 
+def permute_choices(example: dict, example_id: int, repeat_id: int) -> dict:
+    # seeded per (example, repeat) so every repeat gets its own fixed choice order
+    rng = random.Random(f"gpqa-{example_id}-{repeat_id}")
+    return example | {"permutation": rng.sample(range(4), 4)}
+
+
 class GPQAEval(Eval):
     def __init__(
         self,
@@ -29,12 +34,10 @@ class GPQAEval(Eval):
         if num_examples:
             assert n_repeats == 1, "n_repeats only supported for num_examples = None"
             examples = rng.sample(examples, num_examples)
-        examples = examples * n_repeats
-        examples = [example | {"permutation": rng.sample(range(4), 4)} for example in examples]
-        self.examples = examples
+        self.examples = common.RepeatedExamples(examples, n_repeats, variation=permute_choices)
         self.n_repeats = n_repeats
 
-    def __call__(self, sampler: SamplerBase) -> EvalResult:
+    def run(self, sampler: SamplerBase, examples: list[dict]) -> list[SingleEvalResult]:
         def fn(row: dict):
             choices = [
                 row["Correct Answer"],
@@ -53,23 +56,37 @@ class GPQAEval(Eval):
                     content=format_multichoice_question(choices_dict), role="user"
                 )
             ]
-            sampler_response = sampler(prompt_messages)
+            return correct_answer, sampler(prompt_messages)
+
+        sampled = common.map_with_progress(fn, examples)
+        # extract the whole batch at once rather than per response
+        extracted_answers = common.extract_answers(
+            [sampler_response.response_text for _, sampler_response in sampled],
+            MULTICHOICE_ANSWER_EXTRACTOR,
+        )
+
+        results = []
+        for (correct_answer, sampler_response), extracted_answer in zip(
+            sampled, extracted_answers, strict=True
+        ):
             response_text = sampler_response.response_text
             actual_queried_prompt_messages = sampler_response.actual_queried_message_list
-            match = re.search(ANSWER_PATTERN_MULTICHOICE, response_text)
-            extracted_answer = match.group(1) if match else None
             score = 1.0 if extracted_answer == correct_answer else 0.0
-            html = common.jinja_env.from_string(HTML_JINJA).render(
-                prompt_messages=actual_queried_prompt_messages,
-                next_message=dict(content=response_text, role="assistant"),
-                score=score,
-                correct_answer=correct_answer,
-                extracted_answer=extracted_answer,
-            )
             convo = actual_queried_prompt_messages + [dict(content=response_text, role="assistant")]
-            return SingleEvalResult(
-                html=html, score=score, convo=convo, metrics={"chars": len(response_text)}
+            results.append(
+                SingleEvalResult(
+                    score=score,
+                    convo=convo,
+                    metrics={"chars": len(response_text)},
+                    prompt=actual_queried_prompt_messages,
+                    response=response_text,
+                    extracted_answer=extracted_answer,
+                    correct_answer=correct_answer,
+                )
             )
+        return results
 
-        results = common.map_with_progress(fn, self.examples)
-        return common.aggregate_results(results)
+    def aggregate(self, results: list[SingleEvalResult]) -> EvalResult:
+        eval_result = common.aggregate_results(results)
+        eval_result.metrics.update(common.repeat_metrics(results, self.examples))
+        return eval_result
@@ -0,0 +1,86 @@
+"""
+Persistent cache of parsed grader verdicts, shared across runs.
+
+Grader inputs are fully determined by the grader model, the grader template and the
+graded item (rubric or reference and conversation), so a verdict is stored under a
+hash of exactly those. The template text is part of the key, so editing a template
+invalidates its verdicts without touching anyone else's. Verdicts are stored as JSON
+in a SQLite file in the local cache directory, which several threads, shards and
+worker processes on one host can share.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+from typing import Any
+
+from . import common
+from .eval_types import SamplerBase
+
+DEFAULT_CACHE_FILE = "grader_verdicts.sqlite"
+
+
+def grader_fingerprint(grader: SamplerBase) -> dict[str, Any]:
+    """
+    The sampler settings that change what a grader answers.
+    """
+    # wrappers such as run_spec.BudgetedSampler do not change the answers
+    grader = getattr(grader, "sampler", grader)
+    return {
+        "class": type(grader).__name__,
+        **{
+            name: getattr(grader, name, None)
+            for name in (
+                "model",
+                "system_message",
+                "temperature",
+                "max_tokens",
+                "reasoning_effort",
+                "response_format",
+            )
+        },
+    }
+
+
+class GraderCache:
+    """
+    Verdict store keyed by (grader, template, item). All methods are thread-safe.
+    """
+
+    def __init__(self, path: str | None = None):
+        self.path = path or common.cache_path(DEFAULT_CACHE_FILE)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=60)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS verdicts ("
+                "key TEXT PRIMARY KEY, verdict TEXT NOT NULL)"
+            )
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(grader: SamplerBase, template: str, *item: Any) -> str:
+        payload = json.dumps(
+            [grader_fingerprint(grader), template, item], sort_keys=True, default=str
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get(self, key: str) -> Any | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT verdict FROM verdicts WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, key: str, verdict: Any) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO verdicts VALUES (?, ?)", (key, json.dumps(verdict))
+            )
@@ -0,0 +1,42 @@
+import os
+import tempfile
+
+from .eval_types import SamplerBase, SamplerResponse
+from .grader_cache import GraderCache
+from .healthbench_eval import grade_with_retries
+
+
+class FakeGrader(SamplerBase):
+    def __init__(self, model: str):
+        self.model = model
+        self.num_calls = 0
+
+    def __call__(self, message_list):
+        self.num_calls += 1
+        return SamplerResponse('{"criteria_met": true}', message_list, {})
+
+
+def test_grader_cache_persists_verdicts_per_grader_and_template():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "verdicts.sqlite")
+        grader = FakeGrader("grader-a")
+        key = GraderCache.key(grader, "template v1", "conversation", "rubric")
+        GraderCache(path).set(key, {"criteria_met": True})
+
+        cache = GraderCache(path)
+        assert cache.get(key) == {"criteria_met": True}
+        # another grader model or an edited template must not reuse the verdict
+        assert key != GraderCache.key(FakeGrader("grader-b"), "template v1", "conversation", "rubric")
+        assert cache.get(GraderCache.key(grader, "template v2", "conversation", "rubric")) is None
+
+
+def test_grade_with_retries_uses_cache():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        cache = GraderCache(os.path.join(tmpdir, "verdicts.sqlite"))
+        grader = FakeGrader("grader-a")
+        key = GraderCache.key(grader, "template", "item")
+        for expected_attempts in (1, 0):
+            grading, _, num_attempts = grade_with_retries(grader, [], 3, cache, key)
+            assert grading == {"criteria_met": True}
+            assert num_attempts == expected_attempts
+        assert grader.num_calls == 1
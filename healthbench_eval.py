@@ -23,15 +23,22 @@ from pathlib import Path
 from typing import Literal
 
 import blobfile as bf
-import numpy as np
 import pandas as pd
 
-from . import common
+from . import common, result_store
+from .grader_cache import GraderCache
 from .sampler.chat_completion_sampler import (
     OPENAI_SYSTEM_MESSAGE_API,
     ChatCompletionSampler,
 )
-from .eval_types import Eval, EvalResult, MessageList, SamplerBase, SingleEvalResult
+from .eval_types import (
+    Eval,
+    EvalResult,
+    MessageList,
+    SamplerBase,
+    SamplerResponse,
+    SingleEvalResult,
+)
 
 INPUT_PATH = "https://openaipublic.blob.core.windows.net/simple-evals/healthbench/2025-05-07-06-14-12_oss_eval.jsonl"
 INPUT_PATH_HARD = "https://openaipublic.blob.core.windows.net/simple-evals/healthbench/hard_2025-05-08-21-00-10.jsonl"
@@ -88,15 +95,86 @@ In other words, for criteria with negative points, a good response should be cla
 Return just the json object in markdown format. Do not include any other text in the response.
 """.strip()
 
+MULTI_RUBRIC_GRADER_TEMPLATE = (
+    """
+Your job is to look at a conversation and a list of rubric items, and score the last turn (i.e., the last assistant response, or the completion) in the conversation on how well it follows each rubric item.
+
+# Conversation
+<<conversation>>
+
+# Rubric items
+<<rubric_items>>
+
+# Instructions
+Grade every rubric item on its own, exactly as if it were the only rubric item. For each rubric item, decide the fields "explanation" and "criteria_met".
+""".lstrip()
+    + GRADER_TEMPLATE[
+        GRADER_TEMPLATE.index('- The "explanation" field') : GRADER_TEMPLATE.index(
+            "# Final instruction"
+        )
+    ]
+    + """# Final instruction
+Return a json object mapping the ID of every rubric item to its json object, for example:
+
+```json
+{
+  "1": {
+    "explanation": "The assistant did not tell the user to go to the hospital if unconscious.",
+    "criteria_met": false
+  },
+  "2": {
+    "explanation": "The response is concise, so the criteria was not met.",
+    "criteria_met": false
+  }
+}
+```
+
+Return just the json object in markdown format. Do not include any other text in the response.
+"""
+).strip()
+
 HEALTHBENCH_HTML_JINJA = (
     common.HTML_JINJA.replace(
         "<p>Correct Answer: {{ correct_answer }}</p>\n",
         "",
     )
-    + "<p>Rubrics with grades: {{ rubric_grades }}</p>"
+    + '<p>Rubrics with grades: {{ rubric_grades | replace("\\n", "<br>") | safe }}</p>'
 )
 
 
+DEFAULT_MAX_GRADING_ATTEMPTS = 3
+JSON_RESPONSE_FORMAT = {"type": "json_object"}
+GRADING_STATS_KEYS = (
+    "parse_failures",
+    "retries",
+    "failed_gradings",
+    "cache_hits",
+    "ungraded_examples",
+)
+
+
+def repair_json_to_dict(json_string: str) -> dict | None:
+    """
+    Best-effort parse of a JSON object wrapped in prose or written with trailing
+    commas or Python literals, as graders sometimes do. None if that still fails.
+    """
+    start, end = json_string.find("{"), json_string.rfind("}")
+    if start == -1 or end < start:
+        return None
+    json_cleaned = json_string[start : end + 1]
+    json_cleaned = re.sub(r",\s*([}\]])", r"\1", json_cleaned)
+    json_cleaned = re.sub(
+        r"\b(True|False|None)\b",
+        lambda m: {"True": "true", "False": "false", "None": "null"}[m.group(1)],
+        json_cleaned,
+    )
+    try:
+        repaired = json.loads(json_cleaned)
+    except json.JSONDecodeError:
+        return None
+    return repaired if isinstance(repaired, dict) else None
+
+
 def parse_json_to_dict(json_string: str) -> dict:
     # Remove markdown-style ```json``` markers if present
     json_cleaned = re.sub(r"^```json\s*|\s*```$", "", json_string.strip())
@@ -104,10 +182,123 @@ def parse_json_to_dict(json_string: str) -> dict:
     try:
         return json.loads(json_cleaned)
     except json.JSONDecodeError as e:
+        repaired = repair_json_to_dict(json_string)
+        if repaired is not None:
+            return repaired
         print(f"JSON decoding failed: {e}")
         return {}
 
 
+def is_valid_grading(grading_response_dict: dict | None) -> bool:
+    if not isinstance(grading_response_dict, dict):
+        return False
+    label = grading_response_dict.get("criteria_met")
+    return label is True or label is False
+
+
+def grade_with_retries(
+    grader_model: SamplerBase,
+    messages: MessageList,
+    max_attempts: int,
+    grader_cache: GraderCache | None = None,
+    cache_key: str | None = None,
+) -> tuple[dict | None, SamplerResponse, int]:
+    """
+    Ask the grader until it returns a valid grading, at most max_attempts times.
+    Returns the grading (None if every attempt failed), the last sampler response
+    and the number of attempts made, which is 0 for a grading found in the cache.
+    """
+    if max_attempts < 1:
+        raise ValueError(f"max_attempts must be at least 1, got {max_attempts}")
+    if grader_cache is not None and cache_key is not None:
+        cached = grader_cache.get(cache_key)
+        if cached is not None:
+            return cached, SamplerResponse(json.dumps(cached), messages, {}), 0
+    for attempt in range(1, max_attempts + 1):
+        sampler_response = grader_model(messages)
+        grading_response_dict = parse_json_to_dict(sampler_response.response_text)
+        if isinstance(grading_response_dict, dict) and isinstance(
+            grading_response_dict.get("criteria_met"), str
+        ):
+            # accept "true" / "false" spelled as strings
+            label = grading_response_dict["criteria_met"].strip().lower()
+            if label in ("true", "false"):
+                grading_response_dict["criteria_met"] = label == "true"
+        if is_valid_grading(grading_response_dict):
+            if grader_cache is not None and cache_key is not None:
+                grader_cache.set(cache_key, grading_response_dict)
+            return grading_response_dict, sampler_response, attempt
+        print(
+            f"Grading failed due to bad JSON output (attempt {attempt}/{max_attempts})"
+        )
+    return None, sampler_response, max_attempts
+
+
+def grading_stats(outcomes: list[tuple[int, bool]]) -> dict[str, int]:
+    """
+    Counters for gradings given as (grader attempts, succeeded) pairs, where zero
+    attempts means the grading came from the cache.
+    """
+    return {
+        "parse_failures": sum(n - succeeded for n, succeeded in outcomes if n),
+        "retries": sum(n - 1 for n, _ in outcomes if n),
+        "failed_gradings": sum(not succeeded for _, succeeded in outcomes),
+        "cache_hits": sum(n == 0 for n, _ in outcomes),
+    }
+
+
+def sum_grading_stats(results: list[SingleEvalResult]) -> dict[str, int]:
+    totals = dict.fromkeys(GRADING_STATS_KEYS, 0)
+    for result in results:
+        stats = (result.example_level_metadata or {}).get("grading_stats", {})
+        for key in GRADING_STATS_KEYS:
+            totals[key] += stats.get(key, 0)
+    return totals
+
+
+def format_conversation(convo: MessageList) -> str:
+    return "\n\n".join([f"{m['role']}: {m['content']}" for m in convo])
+
+
+def grade_rubric_items_together(
+    grader_model: SamplerBase,
+    convo_str: str,
+    rubric_items: list[str],
+    grader_cache: GraderCache | None = None,
+) -> list[dict | None]:
+    """
+    Grade all rubric items of one conversation in a single grader request. Items
+    whose grading is missing from the response or invalid come back as None.
+    With a grader cache, only the items it has no grading for are sent.
+    """
+    gradings: list[dict | None] = [None] * len(rubric_items)
+    cache_keys = [
+        GraderCache.key(grader_model, MULTI_RUBRIC_GRADER_TEMPLATE, convo_str, item)
+        for item in rubric_items
+    ]
+    if grader_cache is not None:
+        gradings = [grader_cache.get(cache_key) for cache_key in cache_keys]
+    indices = [i for i, grading in enumerate(gradings) if grading is None]
+    if not indices:
+        return gradings
+
+    grader_prompt = MULTI_RUBRIC_GRADER_TEMPLATE.replace(
+        "<<conversation>>", convo_str
+    ).replace(
+        "<<rubric_items>>",
+        common.format_grading_items([rubric_items[i] for i in indices]),
+    )
+    messages: MessageList = [dict(content=grader_prompt, role="user")]
+    grading_response = grader_model(messages).response_text
+    verdicts = common.parse_grading_verdicts(grading_response, len(indices))
+    for item_id, i in enumerate(indices, start=1):
+        if is_valid_grading(verdicts.get(item_id)):
+            gradings[i] = verdicts[item_id]
+            if grader_cache is not None:
+                grader_cache.set(cache_keys[i], gradings[i])
+    return gradings
+
+
 class RubricItem:
     def __init__(self, criterion: str, points: float, tags: list[str]):
         self.criterion = criterion
@@ -134,20 +325,29 @@ class RubricItem:
 
 
 def calculate_score(
-    rubric_items: list[RubricItem], grading_response_list: list[dict]
+    rubric_items: list[RubricItem], grading_response_list: list[dict | None]
 ) -> float | None:
+    """
+    Achieved points over possible points. Items whose grading failed (None) count
+    towards neither, so a grader failure is not scored as a pass or a fail.
+    """
+    graded = [
+        (rubric_item, grading_response)
+        for rubric_item, grading_response in zip(
+            rubric_items, grading_response_list, strict=True
+        )
+        if grading_response is not None
+    ]
     total_possible_points = sum(
-        rubric_item.points for rubric_item in rubric_items if rubric_item.points > 0
+        rubric_item.points for rubric_item, _ in graded if rubric_item.points > 0
     )
     if total_possible_points == 0:
-        # should not happen for overall score, but may happen for tags
+        # should not happen for overall score unless grading failed, but may for tags
         return None
 
     achieved_points = sum(
         rubric_item.points
-        for rubric_item, grading_response in zip(
-            rubric_items, grading_response_list, strict=True
-        )
+        for rubric_item, grading_response in graded
         if grading_response["criteria_met"]
     )
     overall_score = achieved_points / total_possible_points
@@ -209,23 +409,8 @@ PHYSICIAN_COMPLETION_MODES = {
 }
 
 
-def _compute_clipped_stats(
-    values: list,
-    stat: str,
-):
-    """Computes the mean (clipped to [0, 1]), bootstrap std for that mean, and n_samples for final HealthBench scoring."""
-    if stat == "mean":
-        return np.clip(np.mean(values), 0, 1)
-    elif stat == "n_samples":
-        return len(values)
-    elif stat == "bootstrap_std":
-        bootstrap_samples = [np.random.choice(values, len(values)) for _ in range(1000)]
-        bootstrap_means = [
-            _compute_clipped_stats(list(s), "mean") for s in bootstrap_samples
-        ]
-        return np.std(bootstrap_means)
-    else:
-        raise ValueError(f"Unknown {stat =}")
+# mean (clipped to [0, 1]), n_samples and bootstrap std of the clipped mean
+HEALTHBENCH_STATS = ("mean", "n_samples", "bootstrap_std")
 
 
 def _aggregate_get_clipped_mean(
@@ -233,31 +418,28 @@ def _aggregate_get_clipped_mean(
 ) -> EvalResult:
     """
     Aggregate multiple SingleEvalResults into a single EvalResult for HealthBench.
-    For each metric, returns the stats in _compute_clipped_stats.
+    For each metric, returns the stats in HEALTHBENCH_STATS.
     """
-    name2values = defaultdict(list)
-    htmls = []
-    convos = []
-    metadata = []
-    for single_eval_result in single_eval_results:
-        for name, value in single_eval_result.metrics.items():
-            name2values[name].append(value)
-        if single_eval_result.score is not None:
-            name2values["score"].append(single_eval_result.score)
-        htmls.append(single_eval_result.html)
-        convos.append(single_eval_result.convo)
-        metadata.append(single_eval_result.example_level_metadata)
-    final_metrics = {}
-    for name, values in name2values.items():
-        for stat in ["mean", "n_samples", "bootstrap_std"]:
-            key = name if stat == "mean" else f"{name}:{stat}"
-            final_metrics[key] = _compute_clipped_stats(values, stat)
+    confidence = common.bootstrap_confidence()
+    stats = common.with_bootstrap_intervals(HEALTHBENCH_STATS, confidence)
+    name2accumulator = common.accumulate_metrics(single_eval_results, lambda _: stats)
+    final_metrics = common.compute_stats(
+        name2accumulator,
+        dict.fromkeys(name2accumulator, stats),
+        bootstrap_confidence=confidence,
+        clip=(0, 1),
+    )
     return EvalResult(
         score=final_metrics.pop("score", None),
         metrics=final_metrics,
-        htmls=htmls,
-        convos=convos,
-        metadata={"example_level_metadata": metadata},
+        htmls=common.ExampleHtmls(single_eval_results),
+        convos=[single_eval_result.convo for single_eval_result in single_eval_results],
+        metadata={
+            "example_level_metadata": [
+                single_eval_result.example_level_metadata
+                for single_eval_result in single_eval_results
+            ]
+        },
     )
 
 
@@ -273,6 +455,12 @@ class HealthBenchEval(Eval):
         run_reference_completions: bool = False,
         n_threads: int = 120,
         subset_name: Literal["hard", "consensus"] | None = None,
+        # If True, grade all rubric items of an example in one grader request.
+        multi_rubric_grading: bool = False,
+        # Grader requests per rubric item before it is left out of the score.
+        max_grading_attempts: int = DEFAULT_MAX_GRADING_ATTEMPTS,
+        # If set, reuse gradings from earlier runs with the same grader and template.
+        grader_cache: GraderCache | None = None,
     ):
         if run_reference_completions:
             assert physician_completions_mode is not None, (
@@ -349,9 +537,12 @@ class HealthBenchEval(Eval):
                 num_examples,
             )
 
-        self.examples = examples * n_repeats
+        self.examples = common.RepeatedExamples(examples, n_repeats)
         self.n_threads = n_threads
-        self.grader_model = grader_model
+        self.grader_model = grader_model.with_response_format(JSON_RESPONSE_FORMAT)
+        self.multi_rubric_grading = multi_rubric_grading
+        self.max_grading_attempts = max_grading_attempts
+        self.grader_cache = grader_cache
 
     def grade_sample(
         self,
@@ -359,46 +550,72 @@ class HealthBenchEval(Eval):
         response_text: str,
         example_tags: list[str],
         rubric_items: list[RubricItem],
-    ) -> tuple[dict, str, list[dict]]:
+    ) -> tuple[dict, str, list[dict], dict[str, int]]:
         # construct and grade the sample
         convo_with_response = prompt + [dict(content=response_text, role="assistant")]
+        convo_str = format_conversation(convo_with_response)
 
-        def grade_rubric_item(rubric_item: RubricItem) -> dict:
-            convo_str = "\n\n".join(
-                [f"{m['role']}: {m['content']}" for m in convo_with_response]
-            )
+        def grade_rubric_item(rubric_item: RubricItem) -> tuple[dict | None, int]:
             grader_prompt = GRADER_TEMPLATE.replace(
                 "<<conversation>>", convo_str
             ).replace("<<rubric_item>>", str(rubric_item))
             messages: MessageList = [dict(content=grader_prompt, role="user")]
-            while True:
-                sampler_response = self.grader_model(messages)
-                grading_response = sampler_response.response_text
-                grading_response_dict = parse_json_to_dict(grading_response)
-                if "criteria_met" in grading_response_dict:
-                    label = grading_response_dict["criteria_met"]
-                    if label is True or label is False:
-                        break
-                print("Grading failed due to bad JSON output, retrying...")
-            return grading_response_dict
-
-        grading_response_list = common.map_with_progress(
+            grading_response_dict, _, num_attempts = grade_with_retries(
+                self.grader_model,
+                messages,
+                self.max_grading_attempts,
+                self.grader_cache,
+                GraderCache.key(
+                    self.grader_model, GRADER_TEMPLATE, convo_str, str(rubric_item)
+                ),
+            )
+            return grading_response_dict, num_attempts
+
+        if self.multi_rubric_grading and len(rubric_items) > 1:
+            grading_response_list = grade_rubric_items_together(
+                self.grader_model,
+                convo_str,
+                [str(item) for item in rubric_items],
+                self.grader_cache,
+            )
+            # re-grade only the items the multi-rubric response left out or botched
+            regrade_indices = [
+                i for i, grading in enumerate(grading_response_list) if grading is None
+            ]
+            num_regraded = len(regrade_indices)
+        else:
+            grading_response_list = [None] * len(rubric_items)
+            regrade_indices = list(range(len(rubric_items)))
+            num_regraded = 0
+        regraded = common.map_with_progress(
             grade_rubric_item,
-            rubric_items,
+            [rubric_items[i] for i in regrade_indices],
             pbar=False,
         )
+        for i, (grading, _) in zip(regrade_indices, regraded, strict=True):
+            # items still without a grading after all attempts stay None and are
+            # left out of the score
+            grading_response_list[i] = grading
+        grading_stats_dict = grading_stats(
+            [(num_attempts, grading is not None) for grading, num_attempts in regraded]
+        )
 
-        # compute the overall score
+        # compute the overall score; None if no positive item could be graded
         overall_score = calculate_score(rubric_items, grading_response_list)
-        assert overall_score is not None
-        metrics = {
-            "overall_score": overall_score,
-        }
+        grading_stats_dict["ungraded_examples"] = int(overall_score is None)
+        metrics = {}
+        if overall_score is not None:
+            metrics["overall_score"] = overall_score
+        if self.multi_rubric_grading:
+            metrics["multi_rubric_regraded_fraction"] = num_regraded / len(
+                rubric_items
+            )
 
         # compute scores for example-level tags)
-        example_tag_scores = {tag: overall_score for tag in example_tags}
-        assert len(example_tag_scores) == len(example_tags)  # No duplicates.
-        metrics.update(example_tag_scores)
+        if overall_score is not None:
+            example_tag_scores = {tag: overall_score for tag in example_tags}
+            assert len(example_tag_scores) == len(example_tags)  # No duplicates.
+            metrics.update(example_tag_scores)
 
         # compute scores for rubric-level tags
         rubric_tag_items_grades = defaultdict(list)
@@ -421,8 +638,12 @@ class HealthBenchEval(Eval):
         rubric_items_with_grades = []
         readable_explanation_list = []
         for rubric_item, grading_response in zip(rubric_items, grading_response_list):
-            explanation = grading_response.get("explanation", "No explanation provided")
-            criteria_met = grading_response["criteria_met"]
+            if grading_response is None:
+                criteria_met = None
+                explanation = f"Grading failed: no valid JSON after {self.max_grading_attempts} attempts"
+            else:
+                explanation = grading_response.get("explanation", "No explanation provided")
+                criteria_met = grading_response["criteria_met"]
             readable_explanation = (
                 f"[{criteria_met}] {rubric_item}\n\tExplanation: {explanation}"
             )
@@ -441,9 +662,14 @@ class HealthBenchEval(Eval):
         readable_explanation_str = "\n\n".join(readable_explanation_list)
         readable_explanation_str = f"\n\n{readable_explanation_str}"
 
-        return metrics, readable_explanation_str, rubric_items_with_grades
+        return (
+            metrics,
+            readable_explanation_str,
+            rubric_items_with_grades,
+            grading_stats_dict,
+        )
 
-    def __call__(self, sampler: SamplerBase) -> EvalResult:
+    def run(self, sampler: SamplerBase, examples: list[dict]) -> list[SingleEvalResult]:
         def fn(row: dict):
             prompt_messages = row["prompt"]
 
@@ -460,42 +686,41 @@ class HealthBenchEval(Eval):
                 )
                 response_usage = response_dict.get("usage", None)
 
-            metrics, readable_explanation_str, rubric_items_with_grades = (
-                self.grade_sample(
-                    prompt=actual_queried_prompt_messages,
-                    response_text=response_text,
-                    rubric_items=row["rubrics"],
-                    example_tags=row["example_tags"],
-                )
+            (
+                metrics,
+                readable_explanation_str,
+                rubric_items_with_grades,
+                grading_stats_dict,
+            ) = self.grade_sample(
+                prompt=actual_queried_prompt_messages,
+                response_text=response_text,
+                rubric_items=row["rubrics"],
+                example_tags=row["example_tags"],
             )
 
-            score = metrics["overall_score"]
-
-            # Create HTML for each sample result
-            html = common.jinja_env.from_string(
-                HEALTHBENCH_HTML_JINJA.replace(
-                    "{{ rubric_grades }}",
-                    readable_explanation_str.replace("\n", "<br>"),
-                )
-            ).render(
-                prompt_messages=actual_queried_prompt_messages,
-                next_message=dict(content=response_text, role="assistant"),
-                score=metrics["overall_score"],
-                extracted_answer=response_text,
-            )
+            score = metrics.get("overall_score")
 
             convo = actual_queried_prompt_messages + [
                 dict(content=response_text, role="assistant")
             ]
             return SingleEvalResult(
-                html=html,
                 score=score,
                 convo=convo,
                 metrics=metrics,
+                prompt=actual_queried_prompt_messages,
+                response=response_text,
+                extracted_answer=response_text,
+                html_template=HEALTHBENCH_HTML_JINJA,
+                html_fields={"rubric_grades": readable_explanation_str},
+                category=next(
+                    (tag for tag in row["example_tags"] if tag.startswith("theme:")),
+                    None,
+                ),
                 example_level_metadata={
                     "score": score,
                     "usage": get_usage_dict(response_usage),
                     "rubric_items": rubric_items_with_grades,
+                    "grading_stats": grading_stats_dict,
                     "prompt": actual_queried_prompt_messages,
                     "completion": [dict(content=response_text, role="assistant")],
                     "prompt_id": row["prompt_id"],
@@ -505,14 +730,18 @@ class HealthBenchEval(Eval):
                 },
             )
 
-        results = common.map_with_progress(
+        return common.map_with_progress(
             fn,
-            self.examples,
+            examples,
             num_threads=self.n_threads,
             pbar=True,
         )
-        final_metrics = _aggregate_get_clipped_mean(results)
-        return final_metrics
+
+    def aggregate(self, results: list[SingleEvalResult]) -> EvalResult:
+        eval_result = _aggregate_get_clipped_mean(results)
+        eval_result.metrics.update(common.repeat_metrics(results, self.examples))
+        eval_result.metadata["grading_stats"] = sum_grading_stats(results)
+        return eval_result
 
 
 def main():
@@ -531,6 +760,11 @@ def main():
         default=120,
         help="Number of threads to run",
     )
+    parser.add_argument(
+        "--grader-cache",
+        action="store_true",
+        help="Reuse grader verdicts across runs and physician completion modes",
+    )
     args = parser.parse_args()
 
     if args.run_mode == "physician_completions":
@@ -538,12 +772,14 @@ def main():
             run_reference_completions=False,
             num_examples=args.examples,
             n_threads=args.n_threads or 1,
+            grader_cache=GraderCache() if args.grader_cache else None,
         )
     elif args.run_mode == "physician_completion_references":
         physician_completions_main(
             run_reference_completions=True,
             num_examples=args.examples,
             n_threads=args.n_threads or 1,
+            grader_cache=GraderCache() if args.grader_cache else None,
         )
 
     else:
@@ -554,6 +790,7 @@ def physician_completions_main(
     run_reference_completions: bool = False,
     num_examples: int | None = None,
     n_threads: int = 120,
+    grader_cache: GraderCache | None = None,
 ):
     now = datetime.now()
     date_str = now.strftime("%Y%m%d_%H%M")
@@ -580,8 +817,10 @@ def physician_completions_main(
             run_reference_completions=run_reference_completions,
             num_examples=num_examples,
             n_threads=n_threads,
+            grader_cache=grader_cache,
         )
-        result = eval(dummy_sampler)
+        results = eval.run(dummy_sampler, eval.examples)
+        result = eval.aggregate(results)
 
         # report
         parsable_mode = PHYSICIAN_COMPLETION_MODES[pc_mode]["short_name"]
@@ -590,7 +829,7 @@ def physician_completions_main(
         else:
             file_stem = f"healthbench_{parsable_mode}_humanbaseline_{date_str}"
         report_filename = Path(f"/tmp/{file_stem}.html")
-        report_filename.write_text(common.make_report(result))
+        common.write_report(str(report_filename), result)
         print(f"Report saved to {report_filename}")
 
         # metrics
@@ -600,15 +839,28 @@ def physician_completions_main(
         result_filename.write_text(json.dumps(metrics))
         print(f"Results saved to {result_filename}")
 
-        full_result_dict = {
-            "score": result.score,
-            "metrics": result.metrics,
-            "htmls": result.htmls,
-            "convos": result.convos,
-            "metadata": result.metadata,
-        }
-        full_result_filename = Path(f"/tmp/{file_stem}_allresults.json")
-        full_result_filename.write_text(json.dumps(full_result_dict, indent=2))
+        if result_store.pyarrow_available():
+            full_result_filename = Path(f"/tmp/{file_stem}_allresults.parquet")
+            result_store.write_result_store(
+                str(full_result_filename),
+                results,
+                eval.examples,
+                metadata={
+                    "score": result.score,
+                    "metrics": result.metrics,
+                    "grading_stats": result.metadata["grading_stats"],
+                },
+            )
+        else:
+            full_result_dict = {
+                "score": result.score,
+                "metrics": result.metrics,
+                "htmls": list(result.htmls),
+                "convos": result.convos,
+                "metadata": result.metadata,
+            }
+            full_result_filename = Path(f"/tmp/{file_stem}_allresults.json")
+            full_result_filename.write_text(json.dumps(full_result_dict, indent=2))
         print(f"All results saved to {full_result_filename}")
 
         # metrics df
@@ -1,4 +1,11 @@
-from .healthbench_eval import RubricItem, calculate_score
+from .eval_types import SamplerBase, SamplerResponse
+from .healthbench_eval import (
+    RubricItem,
+    calculate_score,
+    grade_rubric_items_together,
+    grade_with_retries,
+    parse_json_to_dict,
+)
 
 
 def test_calculate_score():
@@ -21,6 +28,71 @@ def test_calculate_score():
         == achieved / total_possible
     )
 
+    # items whose grading failed count as neither met nor possible
+    assert calculate_score(
+        rubric_items, [None, {"criteria_met": False}, {"criteria_met": True}, None]
+    ) == 10 / (5 + 10)
+    assert calculate_score(rubric_items, [None, None, None, {"criteria_met": True}]) is None
+
+
+def test_grade_rubric_items_together():
+    class FakeGrader(SamplerBase):
+        def __call__(self, message_list):
+            response_text = """```json
+{
+  "1": {"explanation": "Recommends the hospital.", "criteria_met": true},
+  "2": {"explanation": "Not sure.", "criteria_met": "maybe"},
+  "7": {"explanation": "No such rubric item.", "criteria_met": true}
+}
+```"""
+            return SamplerResponse(response_text, message_list, {})
+
+    gradings = grade_rubric_items_together(
+        FakeGrader(), "user: hi\n\nassistant: hello", ["[5] a", "[3] b", "[-2] c"]
+    )
+    assert gradings == [
+        {"explanation": "Recommends the hospital.", "criteria_met": True},
+        None,
+        None,
+    ]
+
+
+def test_parse_json_to_dict_repairs_common_mistakes():
+    assert parse_json_to_dict('```json\n{"criteria_met": true}\n```') == {
+        "criteria_met": True
+    }
+    assert parse_json_to_dict(
+        'Here you go: {"explanation": "ok", "criteria_met": False,}'
+    ) == {"explanation": "ok", "criteria_met": False}
+    assert parse_json_to_dict("no json here") == {}
+
+
+def test_grade_with_retries_is_bounded():
+    class FlakyGrader(SamplerBase):
+        def __init__(self, responses):
+            self.responses = iter(responses)
+
+        def __call__(self, message_list):
+            return SamplerResponse(next(self.responses), message_list, {})
+
+    grader = FlakyGrader(["oops", '{"criteria_met": "True"}'])
+    grading, _, num_attempts = grade_with_retries(grader, [], max_attempts=3)
+    assert grading == {"criteria_met": True} and num_attempts == 2
+
+    grader = FlakyGrader(["oops"] * 3)
+    grading, _, num_attempts = grade_with_retries(grader, [], max_attempts=3)
+    assert grading is None and num_attempts == 3
+
+    try:
+        grade_with_retries(FlakyGrader([]), [], max_attempts=0)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("max_attempts below 1 should be rejected")
+
 
 if __name__ == "__main__":
     test_calculate_score()
+    test_grade_rubric_items_together()
+    test_parse_json_to_dict_repairs_common_mistakes()
+    test_grade_with_retries_is_bounded()
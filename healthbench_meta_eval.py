@@ -9,12 +9,24 @@ To run, use the following command (working directory should contain simple-evals
 import json
 import random
 from collections import defaultdict
+from collections.abc import Hashable, Sequence
 from typing import Literal
 
 import blobfile as bf
+import numpy as np
 
 from . import common
-from .healthbench_eval import GRADER_TEMPLATE, parse_json_to_dict
+from .grader_cache import GraderCache
+from .healthbench_eval import (
+    DEFAULT_MAX_GRADING_ATTEMPTS,
+    GRADER_TEMPLATE,
+    JSON_RESPONSE_FORMAT,
+    format_conversation,
+    grade_rubric_items_together,
+    grade_with_retries,
+    grading_stats,
+    sum_grading_stats,
+)
 from .eval_types import Eval, EvalResult, SamplerBase, SingleEvalResult
 
 INPUT_PATH = "https://openaipublic.blob.core.windows.net/simple-evals/healthbench/2025-05-07-06-14-12_oss_meta_eval.jsonl"
@@ -37,6 +49,13 @@ class HealthBenchMetaEval(Eval):
         num_examples: int | None = None,
         n_threads: int = 120,
         n_repeats: int = 1,
+        # If True, also grade the rubrics of each conversation in one multi-rubric
+        # request and report how often it agrees with per-item grading.
+        multi_rubric_grading: bool = False,
+        # Grader requests per example before it is left out of the agreement metrics.
+        max_grading_attempts: int = DEFAULT_MAX_GRADING_ATTEMPTS,
+        # If set, reuse gradings from earlier runs with the same grader and template.
+        grader_cache: GraderCache | None = None,
     ):
         with bf.BlobFile(INPUT_PATH, "rb") as f:
             examples = [json.loads(line) for line in f]
@@ -47,13 +66,16 @@ class HealthBenchMetaEval(Eval):
         if num_examples is not None and len(examples) > num_examples:
             examples = rng.sample(examples, num_examples)
 
-        self.examples = examples * n_repeats
+        self.examples = common.RepeatedExamples(examples, n_repeats)
         self.grader_model = grader_model
         self.n_threads = n_threads
+        self.multi_rubric_grading = multi_rubric_grading
+        self.max_grading_attempts = max_grading_attempts
+        self.grader_cache = grader_cache
 
     def grade_sample(
         self,
-        grading_response_dict: dict,
+        grading_response_dict: dict | None,
         physician_labels: list[bool],
         category: str,
     ) -> tuple[dict, bool | None, str]:
@@ -62,105 +84,151 @@ class HealthBenchMetaEval(Eval):
             "percent_physician_pos": sum(physician_labels) / len(physician_labels),
         }
 
-        grader_label = grading_response_dict["criteria_met"]
-        assert grader_label is True or grader_label is False
-        metrics["model_predicted_positive"] = grader_label
-        explanation = grading_response_dict.get(
-            "explanation", "No explanation provided"
-        )
+        if grading_response_dict is None:
+            # out of attempts: the example has no grader label rather than a made-up one
+            grader_label = None
+            explanation = (
+                f"Grading failed: no valid JSON after {self.max_grading_attempts} attempts"
+            )
+        else:
+            grader_label = grading_response_dict["criteria_met"]
+            assert grader_label is True or grader_label is False
+            metrics["model_predicted_positive"] = grader_label
+            explanation = grading_response_dict.get(
+                "explanation", "No explanation provided"
+            )
 
         category_metrics = {f"{category}: {k}": v for k, v in metrics.items()}
         metrics = {**metrics, **category_metrics}
         return metrics, grader_label, explanation
 
-    def __call__(self, sampler: SamplerBase) -> EvalResult:
-        def fn(row: dict) -> tuple[SingleEvalResult, bool | None]:
-            convo_with_response = row["prompt"] + [
-                dict(content=row["completion"], role="assistant")
-            ]
-            prompt_str = "\n\n".join(
-                [f"{m['role']}: {m['content']}" for m in convo_with_response]
+    def grade_multi_rubric(
+        self, sampler: SamplerBase, examples: list[dict]
+    ) -> list[dict | None]:
+        """
+        Grade the rubrics of rows that share a conversation in one multi-rubric
+        request. Returns one grading per row, None where it is missing or invalid.
+        """
+        row_indices_by_convo = defaultdict(list)
+        for i, row in enumerate(examples):
+            row_indices_by_convo[_conversation_str(row)].append(i)
+
+        def fn(convo_str: str) -> list[dict | None]:
+            return grade_rubric_items_together(
+                sampler,
+                convo_str,
+                [examples[i]["rubric"] for i in row_indices_by_convo[convo_str]],
+                self.grader_cache,
             )
+
+        convo_strs = list(row_indices_by_convo)
+        gradings: list[dict | None] = [None] * len(examples)
+        for convo_str, convo_gradings in zip(
+            convo_strs,
+            common.map_with_progress(fn, convo_strs, self.n_threads, pbar=False),
+            strict=True,
+        ):
+            for i, grading in zip(
+                row_indices_by_convo[convo_str], convo_gradings, strict=True
+            ):
+                gradings[i] = grading
+        return gradings
+
+    def run(self, sampler: SamplerBase, examples: list[dict]) -> list[SingleEvalResult]:
+        sampler = sampler.with_response_format(JSON_RESPONSE_FORMAT)
+        multi_rubric_gradings = (
+            self.grade_multi_rubric(sampler, examples)
+            if self.multi_rubric_grading
+            else [None] * len(examples)
+        )
+
+        def fn(row_and_grading: tuple[dict, dict | None]) -> SingleEvalResult:
+            row, multi_rubric_grading = row_and_grading
+            prompt_str = _conversation_str(row)
             grader_prompt = GRADER_TEMPLATE.replace("<<conversation>>", prompt_str)
             grader_prompt = grader_prompt.replace("<<rubric_item>>", row["rubric"])
             grader_convo = [dict(content=grader_prompt, role="user")]
 
-            while True:
-                sampler_response = sampler(grader_convo)
-                response_text = sampler_response.response_text
-                actual_queried_grader_convo = (
-                    sampler_response.actual_queried_message_list
+            grading_response_dict, sampler_response, num_attempts = (
+                grade_with_retries(
+                    sampler,
+                    grader_convo,
+                    self.max_grading_attempts,
+                    self.grader_cache,
+                    GraderCache.key(sampler, GRADER_TEMPLATE, prompt_str, row["rubric"]),
                 )
-                grading_response_dict = parse_json_to_dict(response_text)
-                if "criteria_met" in grading_response_dict:
-                    label = grading_response_dict["criteria_met"]
-                    if label is True or label is False:
-                        break
-                print("Grading failed due to bad JSON output, retrying...")
+            )
+            response_text = sampler_response.response_text
+            actual_queried_grader_convo = sampler_response.actual_queried_message_list
+            succeeded = grading_response_dict is not None
 
             metrics, grader_label, explanation = self.grade_sample(
                 grading_response_dict=grading_response_dict,
                 physician_labels=row["binary_labels"],
                 category=row["category"],
             )
-            score = metrics["model_predicted_positive"]
+            if self.multi_rubric_grading:
+                metrics["multi_rubric_valid"] = multi_rubric_grading is not None
+                if multi_rubric_grading is not None and grader_label is not None:
+                    metrics["multi_rubric_agreement"] = (
+                        multi_rubric_grading["criteria_met"] == grader_label
+                    )
+            score = grader_label
 
-            # Create HTML for each sample result
-            html = common.jinja_env.from_string(HEALTHBENCH_META_HTML_JINJA).render(
-                prompt_messages=actual_queried_grader_convo,
-                next_message=dict(content=response_text, role="assistant"),
-                score=metrics["model_predicted_positive"],
-                extracted_answer=response_text,
-                explanation=explanation,
-            )
             convo = actual_queried_grader_convo + [
                 dict(content=response_text, role="assistant")
             ]
-            return (
-                SingleEvalResult(html=html, score=score, convo=convo, metrics=metrics),
-                grader_label,
+            return SingleEvalResult(
+                score=score,
+                convo=convo,
+                metrics=metrics,
+                prompt=actual_queried_grader_convo,
+                response=response_text,
+                extracted_answer=response_text,
+                html_template=HEALTHBENCH_META_HTML_JINJA,
+                html_fields={"explanation": explanation},
+                category=row["category"],
+                example_level_metadata={
+                    "grading_stats": grading_stats([(num_attempts, succeeded)])
+                    | {"ungraded_examples": int(not succeeded)},
+                },
             )
 
         # Run evaluation and collect results
-        all_outputs = common.map_with_progress(fn, self.examples, self.n_threads)
-        results: list[SingleEvalResult]
-        grader_labels: list[bool]
-        results, grader_labels = zip(*all_outputs)
+        return common.map_with_progress(
+            fn, list(zip(examples, multi_rubric_gradings)), self.n_threads
+        )
+
+    def aggregate(self, results: list[SingleEvalResult]) -> EvalResult:
+        # the score of each result is the grader's label for that example, None
+        # where grading failed; those examples are left out of the agreement
+        graded = [i for i, result in enumerate(results) if result.score is not None]
 
         # model pairwise agreement metrics
         model_agreement_metrics = compute_metrics_for_rater_by_class(
-            self_pred_list=grader_labels,
-            other_preds_list=[x["binary_labels"] for x in self.examples],
-            cluster_list=[x["category"] for x in self.examples],
+            self_pred_list=[results[i].score for i in graded],
+            other_preds_list=[self.examples[i]["binary_labels"] for i in graded],
+            cluster_list=[self.examples[i]["category"] for i in graded],
             model_or_physician="model",
         )
 
-        # physicians:
-        physician_rating_lists = defaultdict(lambda: ([], [], []))
+        # physicians: every label is paired with the other labels of its example
+        rater_ids, self_preds, other_preds, clusters = [], [], [], []
         for example in self.examples:
-            for i in range(len(example["binary_labels"])):
+            labels = example["binary_labels"]
+            for i in range(len(labels)):
                 physician_id = example["anonymized_physician_ids"][i]
-                self_pred = example["binary_labels"][i]
-                other_preds = (
-                    example["binary_labels"][:i] + example["binary_labels"][i + 1 :]
-                )
-                cluster = example["category"]
-                physician_rating_lists[physician_id][0].append(self_pred)
-                physician_rating_lists[physician_id][1].append(other_preds)
-                physician_rating_lists[physician_id][2].append(cluster)
+                for j in range(len(labels)):
+                    if j != i:
+                        rater_ids.append(physician_id)
+                        self_preds.append(labels[i])
+                        other_preds.append(labels[j])
+                        clusters.append(example["category"])
 
         physician_agreement_metric_lists = defaultdict(dict)
-        for physician_id, (
-            physician_rating_list,
-            other_preds_list,
-            cluster_list,
-        ) in physician_rating_lists.items():
-            physician_agreement_metrics = compute_metrics_for_rater_by_class(
-                self_pred_list=physician_rating_list,
-                other_preds_list=other_preds_list,
-                cluster_list=cluster_list,
-                model_or_physician="physician",
-            )
+        for physician_id, physician_agreement_metrics in compute_metrics_for_raters_by_class(
+            rater_ids, self_preds, other_preds, clusters, model_or_physician="physician"
+        ).items():
             for k, v in physician_agreement_metrics.items():
                 physician_agreement_metric_lists[k][physician_id] = v
 
@@ -180,68 +248,111 @@ class HealthBenchMetaEval(Eval):
         final_metrics.metadata = {
             "model_agreement_metrics": model_agreement_metrics,
             "physician_agreement_metric_lists": physician_agreement_metric_lists,
+            "grading_stats": sum_grading_stats(results),
         }
         return final_metrics
 
 
+def _conversation_str(row: dict) -> str:
+    return format_conversation(
+        row["prompt"] + [dict(content=row["completion"], role="assistant")]
+    )
+
+
 def compute_metrics_for_rater_by_class(
     self_pred_list: list[bool],
     other_preds_list: list[list[bool]],
     cluster_list: list[str],
     model_or_physician: Literal["model", "physician"],
 ) -> dict[str, dict[str, float | None]]:
-    # get all the metrics for each cluster
-    metric_lists = defaultdict(list)
-    for self_pred, other_preds, cluster in zip(
-        self_pred_list, other_preds_list, cluster_list, strict=True
-    ):
-        self_pred_str = "pos" if self_pred else "neg"
-        for other_pred in other_preds:
-            # precision. based on the grader's labels -
-            # i.e., calculated as TP / (TP + FP)
-            # so a prediction should be recorded whenever self_pred is True
-            precision_index_str = INDEX_STR_TEMPLATE.format(
-                model_or_physician=model_or_physician,
-                metric="precision",
-                pred_str=self_pred_str,
-            )
-            metric_lists[precision_index_str].append(self_pred == other_pred)
-            precision_cluster_str = CLUSTER_STR_TEMPLATE.format(
-                cluster=cluster, index_str=precision_index_str
-            )
-            metric_lists[precision_cluster_str].append(self_pred == other_pred)
-
-            # recall. based on the ground truth labels -
-            # i.e., calculated as TP / (TP + FN)
-            # so a prediction should be recorded whenever other_pred is True
-            other_pred_str = "pos" if other_pred else "neg"
-            recall_index_str = INDEX_STR_TEMPLATE.format(
-                model_or_physician=model_or_physician,
-                metric="recall",
-                pred_str=other_pred_str,
-            )
-            metric_lists[recall_index_str].append(self_pred == other_pred)
-            recall_cluster_str = CLUSTER_STR_TEMPLATE.format(
-                cluster=cluster, index_str=recall_index_str
+    # pair each of the rater's predictions with every other prediction for it
+    pairs = [
+        (self_pred, other_pred, cluster)
+        for self_pred, other_preds, cluster in zip(
+            self_pred_list, other_preds_list, cluster_list, strict=True
+        )
+        for other_pred in other_preds
+    ]
+    self_preds, other_preds, clusters = zip(*pairs) if pairs else ((), (), ())
+    return compute_metrics_for_raters_by_class(
+        [None] * len(pairs), self_preds, other_preds, clusters, model_or_physician
+    ).get(None, {})
+
+
+def compute_metrics_for_raters_by_class(
+    rater_ids: Sequence[Hashable],
+    self_preds: Sequence[bool],
+    other_preds: Sequence[bool],
+    clusters: Sequence[str],
+    model_or_physician: Literal["model", "physician"],
+) -> dict[Hashable, dict[str, dict[str, float | None]]]:
+    """
+    Agreement metrics of every rater, overall and per cluster, from one
+    (self_pred, other_pred) pair per position of the arrays. The pairs are reduced
+    to confusion counts per (rater, cluster) with a single bincount.
+    Precision is based on the rater's labels, i.e. TP / (TP + FP), and recall on
+    the other labels, i.e. TP / (TP + FN).
+    """
+    rater_list = list(dict.fromkeys(rater_ids))
+    cluster_list = list(dict.fromkeys(clusters))
+    rater_index = {rater_id: i for i, rater_id in enumerate(rater_list)}
+    cluster_index = {cluster: i for i, cluster in enumerate(cluster_list)}
+    rater_codes = np.fromiter(
+        (rater_index[r] for r in rater_ids), dtype=np.int64, count=len(rater_ids)
+    )
+    cluster_codes = np.fromiter(
+        (cluster_index[c] for c in clusters), dtype=np.int64, count=len(clusters)
+    )
+    # confusion cell: 0 = TN, 1 = FN, 2 = FP, 3 = TP
+    cells = 2 * np.asarray(self_preds, dtype=np.int64) + np.asarray(
+        other_preds, dtype=np.int64
+    )
+    num_raters, num_clusters = len(rater_list), len(cluster_list)
+    counts = np.bincount(
+        (rater_codes * num_clusters + cluster_codes) * 4 + cells,
+        minlength=num_raters * num_clusters * 4,
+    ).reshape(num_raters, num_clusters, 4)
+
+    def confusion_metrics(index_str_prefix: str, tn, fn, fp, tp) -> dict:
+        metrics: dict[str, dict[str, float | None]] = {}
+        for metric, pred_str, agree, disagree in (
+            ("precision", "pos", tp, fp),
+            ("precision", "neg", tn, fn),
+            ("recall", "pos", tp, fn),
+            ("recall", "neg", tn, fp),
+        ):
+            n = int(agree + disagree)
+            if n > 0:
+                index_str = INDEX_STR_TEMPLATE.format(
+                    model_or_physician=model_or_physician,
+                    metric=metric,
+                    pred_str=pred_str,
+                )
+                metrics[index_str_prefix + index_str] = {
+                    "n": n,
+                    "value": int(agree) / n,
+                }
+        return metrics
+
+    rater_metrics = {}
+    for rater_id, rater_counts in zip(rater_list, counts):
+        metrics = confusion_metrics("", *rater_counts.sum(axis=0))
+        for cluster, cluster_counts in zip(cluster_list, rater_counts):
+            metrics.update(
+                confusion_metrics(
+                    CLUSTER_STR_TEMPLATE.format(cluster=cluster, index_str=""),
+                    *cluster_counts,
+                )
             )
-            metric_lists[recall_cluster_str].append(self_pred == other_pred)
-
-    metrics: dict[str, dict[str, float | None]] = {}
-    for index_str, metric_list in metric_lists.items():
-        n = len(metric_list)
-        metric = sum(metric_list) / n if n > 0 else None
-        metrics[index_str] = {
-            "n": n,
-            "value": metric,
-        }
 
-    f1_metrics = get_f1_metrics(metrics)
-    metrics.update(f1_metrics)
+        f1_metrics = get_f1_metrics(metrics)
+        metrics.update(f1_metrics)
 
-    balanced_metrics = get_balanced_metrics(metrics)
-    metrics.update(balanced_metrics)
+        balanced_metrics = get_balanced_metrics(metrics)
+        metrics.update(balanced_metrics)
 
-    return metrics
+        rater_metrics[rater_id] = metrics
+    return rater_metrics
 
 
 def get_f1_metrics(
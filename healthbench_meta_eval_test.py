@@ -1,3 +1,6 @@
+import random
+from collections import defaultdict
+
 from . import healthbench_meta_eval
 
 
@@ -161,5 +164,68 @@ def test_compute_agreement_for_rater_by_class():
     assert index_str_balanced_f1 not in metrics
 
 
+def _reference_metrics_for_rater_by_class(
+    self_pred_list, other_preds_list, cluster_list, model_or_physician
+):
+    # one boolean per (self_pred, other_pred) pair and metric key
+    metric_lists = defaultdict(list)
+    for self_pred, other_preds, cluster in zip(
+        self_pred_list, other_preds_list, cluster_list
+    ):
+        for other_pred in other_preds:
+            for metric, pred in (("precision", self_pred), ("recall", other_pred)):
+                index_str = healthbench_meta_eval.INDEX_STR_TEMPLATE.format(
+                    model_or_physician=model_or_physician,
+                    metric=metric,
+                    pred_str="pos" if pred else "neg",
+                )
+                cluster_str = healthbench_meta_eval.CLUSTER_STR_TEMPLATE.format(
+                    cluster=cluster, index_str=index_str
+                )
+                metric_lists[index_str].append(self_pred == other_pred)
+                metric_lists[cluster_str].append(self_pred == other_pred)
+    metrics = {
+        k: {"n": len(v), "value": sum(v) / len(v)} for k, v in metric_lists.items()
+    }
+    metrics.update(healthbench_meta_eval.get_f1_metrics(metrics))
+    metrics.update(healthbench_meta_eval.get_balanced_metrics(metrics))
+    return metrics
+
+
+def test_compute_metrics_for_raters_by_class_matches_per_rater():
+    rng = random.Random(0)
+    rater_ids, self_preds, other_preds, clusters = [], [], [], []
+    per_rater = defaultdict(lambda: ([], [], []))
+    for _ in range(300):
+        rater_id = rng.randrange(12)
+        self_pred = rng.random() < 0.6
+        other_pred_list = [rng.random() < 0.6 for _ in range(rng.randrange(4))]
+        cluster = rng.choice(["a", "b", "c"])
+        per_rater[rater_id][0].append(self_pred)
+        per_rater[rater_id][1].append(other_pred_list)
+        per_rater[rater_id][2].append(cluster)
+        for other_pred in other_pred_list:
+            rater_ids.append(rater_id)
+            self_preds.append(self_pred)
+            other_preds.append(other_pred)
+            clusters.append(cluster)
+
+    metrics = healthbench_meta_eval.compute_metrics_for_raters_by_class(
+        rater_ids, self_preds, other_preds, clusters, "physician"
+    )
+    for rater_id, (self_pred_list, other_preds_list, cluster_list) in per_rater.items():
+        expected = _reference_metrics_for_rater_by_class(
+            self_pred_list, other_preds_list, cluster_list, "physician"
+        )
+        assert metrics.get(rater_id, {}) == expected
+        assert (
+            healthbench_meta_eval.compute_metrics_for_rater_by_class(
+                self_pred_list, other_preds_list, cluster_list, "physician"
+            )
+            == expected
+        )
+
+
 if __name__ == "__main__":
     test_compute_agreement_for_rater_by_class()
+    test_compute_metrics_for_raters_by_class_matches_per_rater()
@@ -4,17 +4,143 @@ Mark Chen and Jerry Tworek and Heewoo Jun and Qiming Yuan and Henrique Ponde de
 https://arxiv.org/abs/2107.03374 https://github.com/openai/human-eval/
 """
 
+import atexit
+import hashlib
+import multiprocessing
+import os
+import platform
+import queue
 import random
 import re
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import resource
+import select
+import signal
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 
 from human_eval.data import read_problems
 from human_eval.evaluation import estimate_pass_at_k
-from human_eval.execution import check_correctness  # , unsafe_execute
+from human_eval.execution import check_correctness, unsafe_execute
 
 from . import common
-from .common import HTML_JINJA
-from .eval_types import Eval, EvalResult, SamplerBase, SingleEvalResult
+from .eval_types import Eval, EvalResult, MessageList, SamplerBase, SingleEvalResult
+
+
+def _limit_memory(maximum_memory_bytes: int) -> None:
+    # same limits as human_eval.execution.reliability_guard(maximum_memory_bytes)
+    resource.setrlimit(resource.RLIMIT_AS, (maximum_memory_bytes, maximum_memory_bytes))
+    resource.setrlimit(resource.RLIMIT_DATA, (maximum_memory_bytes, maximum_memory_bytes))
+    if platform.uname().system != "Darwin":
+        resource.setrlimit(resource.RLIMIT_STACK, (maximum_memory_bytes, maximum_memory_bytes))
+
+
+def _execute_in_forked_child(
+    problem: dict[str, str], completion: str, timeout: float, maximum_memory_bytes: int
+) -> dict:
+    """
+    Run one completion against its tests in a child forked from this (warm) sandbox
+    worker, like check_correctness does with a fresh process. The child applies the
+    memory limit and then human_eval's unsafe_execute, which installs the
+    reliability guard and the per-test time limit. A child that dies without
+    reporting an outcome fails as crashed.
+    """
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        # the reliability guard removes most of os, but not these
+        write, exit_ = os.write, os._exit
+        outcome = "timed out"
+        try:
+            _limit_memory(maximum_memory_bytes)
+            result: list[str] = []
+            unsafe_execute(problem, completion, timeout, result)
+            if result:
+                outcome = result[0]
+        except BaseException as e:
+            outcome = f"failed: {e}"
+        finally:
+            # truncate to one atomic pipe write on a character boundary
+            encoded = outcome.encode()[: select.PIPE_BUF]
+            write(write_fd, encoded.decode(errors="ignore").encode())
+            exit_(0)
+
+    os.close(write_fd)
+    try:
+        ready, _, _ = select.select([read_fd], [], [], timeout + 1)
+        outcome = os.read(read_fd, select.PIPE_BUF).decode(errors="replace") if ready else ""
+        if not ready:
+            os.kill(pid, signal.SIGKILL)
+    finally:
+        os.close(read_fd)
+        _, status = os.waitpid(pid, 0)
+    if not outcome:
+        if not ready:
+            outcome = "timed out"
+        elif os.WIFSIGNALED(status):
+            outcome = f"failed: crashed with signal {os.WTERMSIG(status)}"
+        else:
+            outcome = f"failed: crashed with exit status {os.waitstatus_to_exitcode(status)}"
+    return dict(task_id=problem["task_id"], passed=outcome == "passed", result=outcome)
+
+
+class Sandbox:
+    """
+    A persistent pool of sandbox worker processes for executing completions. The
+    workers start on the first submit and stay warm (human_eval imported), and fork
+    a short-lived child per test with a time and memory limit. Results are cached
+    by (task_id, completion hash, timeout), so identical completions across
+    samples, repeats and models are only executed once. The pool is shut down by
+    close(), at the end of a with block or at interpreter exit.
+    """
+
+    def __init__(
+        self,
+        num_workers: int | None = None,
+        maximum_memory_bytes: int = 4 * 1024**3,
+    ):
+        self.num_workers = num_workers or os.cpu_count() or 4
+        self.maximum_memory_bytes = maximum_memory_bytes
+        self._executor: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+        self._results: dict[tuple[str, str, float], Future] = {}
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # called with self._lock held
+        if self._executor is None:
+            # workers are spawned rather than forked from this (threaded) process;
+            # each worker is single threaded, so forking test processes from it is safe
+            self._executor = ProcessPoolExecutor(
+                self.num_workers, mp_context=multiprocessing.get_context("spawn")
+            )
+            atexit.register(self.close)
+        return self._executor
+
+    def submit(self, problem: dict[str, str], completion: str, timeout: float = 3.0) -> Future:
+        key = (problem["task_id"], hashlib.sha256(completion.encode()).hexdigest(), timeout)
+        with self._lock:
+            if key not in self._results:
+                self._results[key] = self._get_executor().submit(
+                    _execute_in_forked_child,
+                    problem,
+                    completion,
+                    timeout,
+                    self.maximum_memory_bytes,
+                )
+            return self._results[key]
+
+    def close(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown()
+            atexit.unregister(self.close)
+
+    def __enter__(self) -> "Sandbox":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
 
 
 def evaluate_functional_correctness(
@@ -22,11 +148,16 @@ def evaluate_functional_correctness(
     completions: list[str],
     n_workers: int = 4,
     timeout: float = 3.0,
+    sandbox: Sandbox | None = None,
 ):
     """
-    Evaluates the functional correctness of generated samples, and writes
-    results to f"{sample_file}_results.jsonl.gz"
+    Evaluates the functional correctness of generated samples, returning whether
+    each one passed. With a sandbox, the completions run in its warm worker pool
+    and the results are in the same order as completions.
     """
+    if sandbox is not None:
+        futures = [sandbox.submit(sample, completion, timeout) for completion in completions]
+        return [int(future.result()["passed"]) for future in futures]
 
     # Check the generated samples against test suites.
     with ThreadPoolExecutor(max_workers=n_workers) as executor:
@@ -50,6 +181,7 @@ class HumanEval(Eval):
         num_samples_per_task: int = 5,
         ks_passes: list[int] = [1, 2, 5],
         timeout: int = 120,
+        num_sampling_threads: int = 32,
     ):
         self.seed = 0
         self.examples = read_problems()
@@ -61,8 +193,13 @@ class HumanEval(Eval):
         self._num_samples_per_task = num_samples_per_task
         self._ks_passes = ks_passes
         self._timeout = timeout
+        self._num_sampling_threads = num_sampling_threads
+        # the worker pool starts on the first run, not here
+        self.sandbox = Sandbox()
 
-    def __call__(self, sampler: SamplerBase) -> EvalResult:
+    def run(
+        self, sampler: SamplerBase, examples: list[dict[str, str]]
+    ) -> list[SingleEvalResult]:
         instruction = "Read the following function signature and docstring, and fully implement the function described. Your response should only contain the code for this function.\n"
 
         def find_code(completion):
@@ -74,41 +211,90 @@ class HumanEval(Eval):
             ]  # remove signature
             return extracted_answer
 
-        def fn(sample: dict[str, str]):
-            prompt_messages = [
-                sampler._pack_message(
-                    role="user", content=instruction + sample["prompt"]
-                )
-            ]
-            completions = [
-                find_code(sampler(prompt_messages).response_text)
-                for _ in range(self._num_samples_per_task)
-            ]
-            results = evaluate_functional_correctness(sample, completions)
-            total = len(results)
-            correct = sum(results)
-            score = sum(results) / len(results)
-            html = common.jinja_env.from_string(HTML_JINJA).render(
-                prompt_messages=prompt_messages,
-                next_message=dict(content=completions[0], role="assistant"),
-                score=score,
-                correct_answer=[1] * len(results),
-                extracted_answer=results,
-            )
-            convo = prompt_messages + [
-                dict(content=completion, role="assistant") for completion in completions
+        prompts = [
+            [sampler._pack_message(role="user", content=instruction + sample["prompt"])]
+            for sample in examples
+        ]
+
+        # sampling (network bound) and execution (CPU bound) run as two overlapping
+        # stages connected by a bounded queue
+        completions = [[""] * self._num_samples_per_task for _ in examples]
+        futures: list[list[Future | None]] = [
+            [None] * self._num_samples_per_task for _ in examples
+        ]
+        max_in_flight = 2 * self.sandbox.num_workers
+        pending: queue.Queue = queue.Queue(maxsize=max_in_flight)
+        in_flight = threading.Semaphore(max_in_flight)
+
+        def sample_completion(job: tuple[int, int]):
+            task_index, sample_index = job
+            completion = find_code(sampler(prompts[task_index]).response_text)
+            completions[task_index][sample_index] = completion
+            # blocks while the execution stage is saturated, throttling sampling
+            pending.put((task_index, sample_index, completion))
+
+        def execute_completions():
+            # drain the queue into the sandbox, keeping at most max_in_flight tests
+            # submitted so that a full sandbox leaves completions waiting in the queue
+            while (item := pending.get()) is not None:
+                task_index, sample_index, completion = item
+                in_flight.acquire()
+                try:
+                    future = self.sandbox.submit(examples[task_index], completion)
+                except Exception as e:
+                    # surface the error from future.result() below instead of
+                    # leaving the sampling stage blocked on a full queue
+                    future = Future()
+                    future.set_exception(e)
+                future.add_done_callback(lambda _: in_flight.release())
+                futures[task_index][sample_index] = future
+
+        executor_thread = threading.Thread(target=execute_completions, daemon=True)
+        executor_thread.start()
+        try:
+            jobs = [
+                (task_index, sample_index)
+                for task_index in range(len(examples))
+                for sample_index in range(self._num_samples_per_task)
             ]
-            return SingleEvalResult(
-                html=html,
-                score=score,
-                convo=convo,
-                metrics={
-                    f"pass@{k}": estimate_pass_at_k([total], [correct], k)
-                    # this will be aggrated so no need of .mean()
-                    for k in self._ks_passes
-                    if total >= k
-                },
+            common.map_with_progress(
+                sample_completion, jobs, num_threads=self._num_sampling_threads
             )
+        finally:
+            pending.put(None)
+            executor_thread.join()
+
+        results = []
+        for prompt_messages, task_completions, task_futures in zip(
+            prompts, completions, futures, strict=True
+        ):
+            passed = [int(future.result()["passed"]) for future in task_futures]
+            results.append(self._task_result(prompt_messages, task_completions, passed))
+        return results
+
+    def _task_result(
+        self, prompt_messages: MessageList, completions: list[str], results: list[int]
+    ) -> SingleEvalResult:
+        total = len(results)
+        correct = sum(results)
+        score = sum(results) / len(results)
+        convo = prompt_messages + [
+            dict(content=completion, role="assistant") for completion in completions
+        ]
+        return SingleEvalResult(
+            score=score,
+            convo=convo,
+            prompt=prompt_messages,
+            response=completions[0],
+            extracted_answer=results,
+            correct_answer=[1] * len(results),
+            metrics={
+                f"pass@{k}": estimate_pass_at_k([total], [correct], k)
+                # this will be aggrated so no need of .mean()
+                for k in self._ks_passes
+                if total >= k
+            },
+        )
 
-        results = common.map_with_progress(fn, self.examples, num_threads=3)
+    def aggregate(self, results: list[SingleEvalResult]) -> EvalResult:
         return common.aggregate_results(results)
@@ -11,7 +11,7 @@ from typing import Literal
 import pandas
 
 from . import common
-from .common import ANSWER_PATTERN, HTML_JINJA, check_equality
+from .common import ANSWER_PATTERN, check_equality, check_equality_locally
 from .eval_types import Eval, EvalResult, SamplerBase, SingleEvalResult
 
 QUERY_TEMPLATE = """
@@ -39,10 +39,12 @@ class MathEval(Eval):
             assert n_repeats == 1, "n_repeats only supported for num_examples = None"
             rng = random.Random(0)
             examples = rng.sample(examples, num_examples)
-        self.examples = examples * n_repeats
+        self.examples = common.RepeatedExamples(examples, n_repeats)
         self.equality_checker = equality_checker
+        # grader verdicts by (expr1, expr2), shared across repeats
+        self._equality_verdicts: dict[tuple[str, str], bool] = {}
 
-    def __call__(self, sampler: SamplerBase) -> EvalResult:
+    def run(self, sampler: SamplerBase, examples: list[dict]) -> list[SingleEvalResult]:
         def fn(row: dict):
             prompt_messages = [
                 sampler._pack_message(content=QUERY_TEMPLATE.format(**row), role="user")
@@ -52,16 +54,30 @@ class MathEval(Eval):
             actual_queried_prompt_messages = sampler_response.actual_queried_message_list
             match = re.search(ANSWER_PATTERN, response_text)
             extracted_answer = match.group(1) if match else None
-            score = float(check_equality(self.equality_checker, row["Answer"], extracted_answer))
-            html = common.jinja_env.from_string(HTML_JINJA).render(
-                prompt_messages=actual_queried_prompt_messages,
-                next_message=dict(content=response_text, role="assistant"),
+            equal = check_equality_locally(row["Answer"], extracted_answer)
+            decided_locally = equal is not None
+            if not decided_locally:
+                key = (row["Answer"], extracted_answer)
+                if key not in self._equality_verdicts:
+                    self._equality_verdicts[key] = check_equality(
+                        self.equality_checker, row["Answer"], extracted_answer
+                    )
+                equal = self._equality_verdicts[key]
+            score = float(equal)
+            convo = actual_queried_prompt_messages + [dict(content=response_text, role="assistant")]
+            return SingleEvalResult(
                 score=score,
-                correct_answer=row["Answer"],
+                convo=convo,
+                metrics={"equality_decided_locally": float(decided_locally)},
+                prompt=actual_queried_prompt_messages,
+                response=response_text,
                 extracted_answer=extracted_answer,
+                correct_answer=row["Answer"],
             )
-            convo = actual_queried_prompt_messages + [dict(content=response_text, role="assistant")]
-            return SingleEvalResult(html=html, score=score, convo=convo)
 
-        results = common.map_with_progress(fn, self.examples)
-        return common.aggregate_results(results)
+        return common.map_with_progress(fn, examples)
+
+    def aggregate(self, results: list[SingleEvalResult]) -> EvalResult:
+        eval_result = common.aggregate_results(results)
+        eval_result.metrics.update(common.repeat_metrics(results, self.examples))
+        return eval_result
@@ -9,7 +9,6 @@ import re
 from typing import Optional
 
 from . import common
-from .mmlu_eval import HTML_JINJA
 from .eval_types import Eval, EvalResult, SamplerBase, SingleEvalResult
 
 ALL_LANGUAGES = ["bn", "de", "en", "es", "fr", "ja", "ru", "sw", "te", "th", "zh"]
@@ -151,7 +150,9 @@ class MGSMEval(Eval):
             examples.extend(lang_examples[: self._num_examples_per_lang])
         self.examples = examples
 
-    def __call__(self, sampler: SamplerBase) -> EvalResult:
+    def run(
+        self, sampler: SamplerBase, examples: list[dict[str, str]]
+    ) -> list[SingleEvalResult]:
         def fn(example: dict[str, str]):
             language = example["lang"]
             latin_language = "group_latin" if language in LATIN_LANGUAGES else "group_non_latin"
@@ -173,20 +174,19 @@ class MGSMEval(Eval):
             extracted_answer = parse_answer(response_text, answer_prefix)
 
             score = score_mgsm(correct_answer, extracted_answer)
-            html = common.jinja_env.from_string(HTML_JINJA).render(
-                prompt_messages=actual_queried_prompt_messages,
-                next_message=dict(content=response_text, role="assistant"),
-                score=score,
-                correct_answer=correct_answer,
-                extracted_answer=extracted_answer or None,
-            )
             convo = actual_queried_prompt_messages + [dict(content=response_text, role="assistant")]
             return SingleEvalResult(
-                html=html,
                 score=score,
                 convo=convo,
                 metrics={language: score, latin_language: score},
+                prompt=actual_queried_prompt_messages,
+                response=response_text,
+                extracted_answer=extracted_answer or None,
+                correct_answer=correct_answer,
+                category=language,
             )
 
-        results = common.map_with_progress(fn, self.examples)
+        return common.map_with_progress(fn, examples)
+
+    def aggregate(self, results: list[SingleEvalResult]) -> EvalResult:
         return common.aggregate_results(results, default_stats=("mean", "std"))
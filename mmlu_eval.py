@@ -5,18 +5,14 @@ https://arxiv.org/abs/2009.03300
 """
 
 import random
-import re
 
 import pandas
 
 from . import common
 from .common import (
-    HTML_JINJA,
-    MULTILINGUAL_ANSWER_PATTERN_TEMPLATE,
-    MULTILINGUAL_ANSWER_REGEXES,
+    MULTILINGUAL_ANSWER_EXTRACTOR,
     format_multichoice_question,
-    normalize_extracted_answer,
-    normalize_response,
+    normalize_responses,
 )
 from .eval_types import Eval, EvalResult, SamplerBase, SingleEvalResult
 
@@ -93,37 +89,45 @@ class MMLUEval(Eval):
             examples = random.Random(0).sample(examples, num_examples)
         self.examples = examples
 
-    def __call__(self, sampler: SamplerBase) -> EvalResult:
+    def run(self, sampler: SamplerBase, examples: list[dict]) -> list[SingleEvalResult]:
         def fn(row: dict):
             prompt_messages = [
                 sampler._pack_message(
                     content=format_multichoice_question(row), role="user"
                 )
             ]
-            sampler_response = sampler(prompt_messages)
-            response_text = sampler_response.response_text
+            return sampler(prompt_messages)
+
+        sampler_responses = common.map_with_progress(fn, examples)
+        # normalize and extract the whole batch at once rather than per response
+        response_texts = normalize_responses(
+            [sampler_response.response_text for sampler_response in sampler_responses]
+        )
+        extracted_answers = common.extract_answers(
+            response_texts, MULTILINGUAL_ANSWER_EXTRACTOR, normalize=True
+        )
+
+        results = []
+        for row, sampler_response, response_text, extracted_answer in zip(
+            examples, sampler_responses, response_texts, extracted_answers, strict=True
+        ):
             actual_queried_prompt_messages = sampler_response.actual_queried_message_list
-            response_text = normalize_response(response_text)
-            extracted_answer = None
-            for answer_regex in MULTILINGUAL_ANSWER_REGEXES:
-                regex = MULTILINGUAL_ANSWER_PATTERN_TEMPLATE.format(answer_regex)
-                match = re.search(regex, response_text)
-                if match:
-                    extracted_answer = normalize_extracted_answer(match.group(1))
-                    break
             score = 1.0 if extracted_answer == row["Answer"] else 0.0
-            html = common.jinja_env.from_string(HTML_JINJA).render(
-                prompt_messages=actual_queried_prompt_messages,
-                next_message=dict(content=response_text, role="assistant"),
-                score=score,
-                correct_answer=row["Answer"],
-                extracted_answer=extracted_answer,
-            )
             convo = actual_queried_prompt_messages + [dict(content=response_text, role="assistant")]
             category = subject2category.get(row["Subject"], "other")
-            return SingleEvalResult(
-                html=html, score=score, metrics={category: score}, convo=convo
+            results.append(
+                SingleEvalResult(
+                    score=score,
+                    metrics={category: score},
+                    convo=convo,
+                    prompt=actual_queried_prompt_messages,
+                    response=response_text,
+                    extracted_answer=extracted_answer,
+                    correct_answer=row["Answer"],
+                    category=category,
+                )
             )
+        return results
 
-        results = common.map_with_progress(fn, self.examples)
+    def aggregate(self, results: list[SingleEvalResult]) -> EvalResult:
         return common.aggregate_results(results)
@@ -0,0 +1,244 @@
+"""
+Columnar store of per-example results, replacing the monolithic _allresults.json.
+
+Each row is one SingleEvalResult: its flat index in the eval's examples, the example
+id and repeat, score, metrics, extracted and correct answer, category, usage, the
+remaining example-level metadata as JSON and a reference to its conversation.
+Conversations are kept in a sidecar file keyed by a hash of their content, so
+analysis that only needs scores never reads them and repeated conversations are
+stored once. Both files are Parquet with zstd compression and are written one row
+group at a time, so a run never holds its serialized results in memory, and row
+group statistics let readers skip everything a filter such as [("score", "<", 0.5)]
+rules out.
+
+Requires pyarrow (pip install pyarrow).
+"""
+
+import hashlib
+import json
+from collections.abc import Sequence
+from typing import Any
+
+from . import common
+from .eval_types import MessageList, SingleEvalResult
+
+DEFAULT_ROW_GROUP_SIZE = 1000
+
+
+def pyarrow_available() -> bool:
+    try:
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("The result store requires pyarrow: pip install pyarrow") from e
+    return pa, pq
+
+
+def _results_schema():
+    pa, _ = _pyarrow()
+    return pa.schema(
+        [
+            ("index", pa.int64()),
+            ("example_id", pa.int64()),
+            ("repeat", pa.int64()),
+            ("score", pa.float64()),
+            ("metrics", pa.map_(pa.string(), pa.float64())),
+            ("extracted_answer", pa.string()),
+            ("correct_answer", pa.string()),
+            ("category", pa.string()),
+            ("usage", pa.string()),
+            ("metadata", pa.string()),
+            ("convo_ref", pa.string()),
+        ]
+    )
+
+
+def _convos_schema():
+    pa, _ = _pyarrow()
+    return pa.schema([("convo_ref", pa.string()), ("convo", pa.string())])
+
+
+def convos_path(path: str) -> str:
+    """
+    Path of the conversation sidecar of the store at path.
+    """
+    return path.removesuffix(".parquet") + "_convos.parquet"
+
+
+def _to_json(obj: Any) -> str | None:
+    if obj is None:
+        return None
+    return json.dumps(obj, default=common._json_default)
+
+
+def _answer_str(answer: Any) -> str | None:
+    if answer is None or isinstance(answer, str):
+        return answer
+    return _to_json(answer)
+
+
+def _locate(examples: Sequence[Any] | None, index: int) -> tuple[int, int]:
+    if isinstance(examples, common.RepeatedExamples):
+        return examples.locate(index)
+    return index, 0
+
+
+class ResultStoreWriter:
+    """
+    Appends per-example results to a store, flushing a row group every
+    row_group_size rows. Call close() (or use it as a context manager) to finish the
+    files; optional run-level metadata is stored in the file's key-value metadata.
+    """
+
+    def __init__(self, path: str, row_group_size: int = DEFAULT_ROW_GROUP_SIZE):
+        _, pq = _pyarrow()
+        self.path = path
+        self.row_group_size = row_group_size
+        self._results = pq.ParquetWriter(path, _results_schema(), compression="zstd")
+        self._convos = pq.ParquetWriter(
+            convos_path(path), _convos_schema(), compression="zstd"
+        )
+        self._rows: list[dict[str, Any]] = []
+        self._convo_rows: list[dict[str, Any]] = []
+        self._convo_refs: set[str] = set()
+
+    def write(
+        self,
+        results: list[SingleEvalResult],
+        indices: Sequence[int],
+        examples: Sequence[Any] | None = None,
+    ) -> None:
+        """
+        Add results for the given flat example indices. If examples is a
+        RepeatedExamples, the indices are split into example id and repeat.
+        """
+        for index, result in zip(indices, results, strict=True):
+            example_id, repeat = _locate(examples, index)
+            metadata = dict(result.example_level_metadata or {})
+            usage = metadata.pop("usage", None)
+            convo_ref = None
+            if result.convo is not None:
+                convo = _to_json(result.convo)
+                convo_ref = hashlib.sha256(convo.encode()).hexdigest()
+                if convo_ref not in self._convo_refs:
+                    self._convo_refs.add(convo_ref)
+                    self._convo_rows.append({"convo_ref": convo_ref, "convo": convo})
+            self._rows.append(
+                {
+                    "index": index,
+                    "example_id": example_id,
+                    "repeat": repeat,
+                    "score": None if result.score is None else float(result.score),
+                    "metrics": {
+                        name: None if value is None else float(value)
+                        for name, value in (result.metrics or {}).items()
+                    },
+                    "extracted_answer": _answer_str(result.extracted_answer),
+                    "correct_answer": _answer_str(result.correct_answer),
+                    "category": result.category,
+                    "usage": _to_json(usage),
+                    "metadata": _to_json(metadata) if metadata else None,
+                    "convo_ref": convo_ref,
+                }
+            )
+        if len(self._rows) >= self.row_group_size:
+            self.flush()
+
+    def flush(self) -> None:
+        pa, _ = _pyarrow()
+        if self._rows:
+            self._results.write_table(
+                pa.Table.from_pylist(self._rows, schema=_results_schema())
+            )
+            self._rows = []
+        if self._convo_rows:
+            self._convos.write_table(
+                pa.Table.from_pylist(self._convo_rows, schema=_convos_schema())
+            )
+            self._convo_rows = []
+
+    def close(self, metadata: dict[str, Any] | None = None) -> None:
+        self.flush()
+        if metadata is not None:
+            self._results.add_key_value_metadata(
+                {"simple_evals": _to_json(metadata)}
+            )
+        self._results.close()
+        self._convos.close()
+
+    def __enter__(self) -> "ResultStoreWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def read_results(
+    path: str,
+    columns: list[str] | None = None,
+    filters: list[tuple[str, str, Any]] | None = None,
+):
+    """
+    Read a store as a pyarrow Table. Filters use pyarrow's (column, op, value)
+    notation and are pushed down to skip row groups, e.g.
+    read_results(path, ["index", "score"], [("repeat", "==", 0)]).
+    """
+    _, pq = _pyarrow()
+    return pq.read_table(path, columns=columns, filters=filters)
+
+
+def read_run_metadata(path: str) -> dict[str, Any] | None:
+    """
+    Run-level metadata passed to ResultStoreWriter.close, if any.
+    """
+    _, pq = _pyarrow()
+    metadata = pq.read_metadata(path).metadata or {}
+    value = metadata.get(b"simple_evals")
+    return None if value is None else json.loads(value)
+
+
+def read_convos(path: str, convo_refs: list[str]) -> dict[str, MessageList]:
+    """
+    Conversations of the store at path for the given convo_ref values.
+    """
+    table = read_results(
+        convos_path(path), filters=[("convo_ref", "in", list(set(convo_refs)))]
+    )
+    return {
+        row["convo_ref"]: json.loads(row["convo"]) for row in table.to_pylist()
+    }
+
+
+def write_results(
+    writer: ResultStoreWriter,
+    results: list[SingleEvalResult],
+    examples: Sequence[Any] | None = None,
+) -> None:
+    """
+    Write the results of a whole eval to an open writer, one row group at a time,
+    in the order of its examples.
+    """
+    for indices in common.chunks(range(len(results)), writer.row_group_size):
+        writer.write([results[i] for i in indices], indices, examples)
+
+
+def write_result_store(
+    path: str,
+    results: list[SingleEvalResult],
+    examples: Sequence[Any] | None = None,
+    metadata: dict[str, Any] | None = None,
+) -> None:
+    """
+    Write the results of a whole eval, in the order of its examples.
+    """
+    writer = ResultStoreWriter(path)
+    write_results(writer, results, examples)
+    writer.close(metadata)
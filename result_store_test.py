@@ -0,0 +1,46 @@
+import os
+import tempfile
+
+import pytest
+
+from . import common, result_store
+from .eval_types import SingleEvalResult
+
+
+def test_result_store_round_trip_with_filters():
+    pytest.importorskip("pyarrow")
+    examples = common.RepeatedExamples([{}, {}, {}], n_repeats=2)
+    results = [
+        SingleEvalResult(
+            score=float(i % 2),
+            metrics={"chars": i * 10},
+            convo=[{"role": "assistant", "content": f"answer {i % 3}"}],
+            example_level_metadata={"usage": {"total_tokens": i}},
+            extracted_answer="A",
+            correct_answer=["A", "B"],
+        )
+        for i in range(len(examples))
+    ]
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "results.parquet")
+        writer = result_store.ResultStoreWriter(path, row_group_size=2)
+        writer.write(results[:4], range(4), examples)
+        writer.write(results[4:], range(4, 6), examples)
+        writer.close({"score": 0.5})
+
+        rows = result_store.read_results(path).to_pylist()
+        assert [row["index"] for row in rows] == list(range(6))
+        assert [(row["example_id"], row["repeat"]) for row in rows][3] == (0, 1)
+        assert rows[5]["metrics"] == [("chars", 50.0)]
+        assert rows[5]["extracted_answer"] == "A"
+        assert rows[5]["correct_answer"] == '["A", "B"]'
+        assert rows[5]["usage"] == '{"total_tokens": 5}'
+        assert rows[5]["metadata"] is None
+        assert result_store.read_run_metadata(path) == {"score": 0.5}
+
+        correct = result_store.read_results(path, ["index", "convo_ref"], [("score", "==", 1.0)])
+        assert correct.column("index").to_pylist() == [1, 3, 5]
+        convos = result_store.read_convos(path, correct.column("convo_ref").to_pylist())
+        # repeats of a conversation are stored once
+        assert len(result_store.read_results(result_store.convos_path(path))) == 3
+        assert convos[rows[1]["convo_ref"]] == results[1].convo
@@ -0,0 +1,264 @@
+"""
+Embedded database of eval runs, kept across invocations of simple_evals.
+
+Every run is a row of `runs`, indexed by eval, model, a hash of the sampler config
+and date, with its aggregate metrics in `run_metrics` and one row per example in
+`examples`. Leaderboards, per-category breakdowns and run-to-run diffs are then
+single indexed queries, however many historical runs the file holds. The database
+is a SQLite file in the local cache directory, like the grader verdict cache.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+from collections.abc import Sequence
+from datetime import datetime
+from typing import Any
+
+from . import common
+from .eval_types import EvalResult, SamplerBase, SingleEvalResult
+from .grader_cache import grader_fingerprint
+
+DEFAULT_DB_FILE = "results.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    eval_name TEXT NOT NULL,
+    model_name TEXT NOT NULL,
+    sampler_hash TEXT NOT NULL,
+    sampler_config TEXT NOT NULL,
+    date TEXT NOT NULL,
+    score REAL,
+    num_examples INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_by_key ON runs (eval_name, model_name, sampler_hash, date);
+CREATE INDEX IF NOT EXISTS runs_by_date ON runs (date);
+CREATE TABLE IF NOT EXISTS run_metrics (
+    run_id INTEGER NOT NULL REFERENCES runs (run_id),
+    name TEXT NOT NULL,
+    value REAL,
+    PRIMARY KEY (run_id, name)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS run_metrics_by_name ON run_metrics (name, run_id);
+CREATE TABLE IF NOT EXISTS examples (
+    run_id INTEGER NOT NULL REFERENCES runs (run_id),
+    idx INTEGER NOT NULL,
+    example_id INTEGER NOT NULL,
+    repeat INTEGER NOT NULL,
+    score REAL,
+    category TEXT,
+    extracted_answer TEXT,
+    correct_answer TEXT,
+    PRIMARY KEY (run_id, idx)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS examples_by_category ON examples (run_id, category);
+"""
+
+# latest run per (eval, model, sampler config)
+_LATEST_RUNS = """
+SELECT run_id FROM (
+    SELECT run_id, ROW_NUMBER() OVER (
+        PARTITION BY eval_name, model_name, sampler_hash ORDER BY date DESC, run_id DESC
+    ) AS recency
+    FROM runs
+) WHERE recency = 1
+"""
+
+
+def sampler_hash(sampler: SamplerBase | None) -> tuple[str, str]:
+    """
+    The config of a sampler as JSON, and a short hash of it.
+    """
+    config = json.dumps(
+        None if sampler is None else grader_fingerprint(sampler),
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(config.encode()).hexdigest()[:16], config
+
+
+def _answer_str(answer: Any) -> str | None:
+    if answer is None or isinstance(answer, str):
+        return answer
+    return json.dumps(answer, default=str)
+
+
+class ResultsDB:
+    """
+    Runs, their metrics and per-example results. All methods are thread-safe.
+    """
+
+    def __init__(self, path: str | None = None):
+        self.path = path or common.cache_path(DEFAULT_DB_FILE)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=60)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+
+    def record_run(
+        self,
+        eval_name: str,
+        model_name: str,
+        sampler: SamplerBase | None,
+        result: EvalResult,
+        results: list[SingleEvalResult] | None = None,
+        examples: Sequence[Any] | None = None,
+        date: datetime | None = None,
+    ) -> int:
+        """
+        Store a run and, if given, its per-example results in the order of
+        examples. Returns the new run_id.
+        """
+        hash_, config = sampler_hash(sampler)
+        metrics = (result.metrics or {}) | {"score": result.score}
+        with self._lock, self._conn:
+            run_id = self._conn.execute(
+                "INSERT INTO runs (eval_name, model_name, sampler_hash, sampler_config, "
+                "date, score, num_examples) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    eval_name,
+                    model_name,
+                    hash_,
+                    config,
+                    (date or datetime.now()).isoformat(timespec="seconds"),
+                    result.score,
+                    len(results) if results is not None else 0,
+                ),
+            ).lastrowid
+            self._conn.executemany(
+                "INSERT INTO run_metrics VALUES (?, ?, ?)",
+                (
+                    (run_id, name, None if value is None else float(value))
+                    for name, value in metrics.items()
+                ),
+            )
+            self._conn.executemany(
+                "INSERT INTO examples VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    (
+                        run_id,
+                        index,
+                        *(
+                            examples.locate(index)
+                            if isinstance(examples, common.RepeatedExamples)
+                            else (index, 0)
+                        ),
+                        None if r.score is None else float(r.score),
+                        r.category,
+                        _answer_str(r.extracted_answer),
+                        _answer_str(r.correct_answer),
+                    )
+                    for index, r in enumerate(results or [])
+                ),
+            )
+        return run_id
+
+    def runs(
+        self,
+        eval_name: str | None = None,
+        model_name: str | None = None,
+        latest: bool = False,
+    ) -> list[dict[str, Any]]:
+        """
+        Runs, newest first, optionally filtered and restricted to the latest run
+        per (eval, model, sampler config).
+        """
+        query = (
+            "SELECT run_id, eval_name, model_name, sampler_hash, date, score, "
+            "num_examples FROM runs WHERE 1"
+        )
+        params: list[Any] = []
+        if eval_name is not None:
+            query += " AND eval_name = ?"
+            params.append(eval_name)
+        if model_name is not None:
+            query += " AND model_name = ?"
+            params.append(model_name)
+        if latest:
+            query += f" AND run_id IN ({_LATEST_RUNS})"
+        query += " ORDER BY date DESC, run_id DESC"
+        with self._lock:
+            cursor = self._conn.execute(query, params)
+            columns = [column[0] for column in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def leaderboard(
+        self,
+        metrics: Sequence[str] = ("f1_score", "score"),
+        run_ids: Sequence[int] | None = None,
+    ) -> list[dict[str, Any]]:
+        """
+        One row per eval and model with the first of metrics that the run
+        reported. Uses the given runs, or else the latest run per (eval, model,
+        sampler config).
+        """
+        if run_ids is None:
+            runs_filter, params = _LATEST_RUNS, []
+        else:
+            runs_filter = ", ".join("?" * len(run_ids))
+            params = list(run_ids)
+        query = (
+            "SELECT runs.run_id, eval_name, model_name, name, value "
+            "FROM runs JOIN run_metrics USING (run_id) "
+            f"WHERE name IN ({', '.join('?' * len(metrics))}) "
+            f"AND runs.run_id IN ({runs_filter}) ORDER BY runs.run_id"
+        )
+        with self._lock:
+            rows = self._conn.execute(query, [*metrics, *params]).fetchall()
+        run2names: dict[int, tuple[str, str]] = {}
+        run2values: dict[int, dict[str, float | None]] = {}
+        for run_id, eval_name, model_name, name, value in rows:
+            run2names[run_id] = (eval_name, model_name)
+            run2values.setdefault(run_id, {})[name] = value
+        return [
+            {
+                "eval_name": eval_name,
+                "model_name": model_name,
+                "metric": next(
+                    (run2values[run_id][name] for name in metrics if name in run2values[run_id]),
+                    None,
+                ),
+            }
+            for run_id, (eval_name, model_name) in run2names.items()
+        ]
+
+    def category_breakdown(self, run_id: int) -> dict[str | None, tuple[int, float | None]]:
+        """
+        Number of examples and mean score per category of a run.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT category, COUNT(*), AVG(score) FROM examples "
+                "WHERE run_id = ? GROUP BY category ORDER BY category",
+                (run_id,),
+            ).fetchall()
+        return {category: (n, mean) for category, n, mean in rows}
+
+    def diff_runs(self, run_a: int, run_b: int) -> dict[str, Any]:
+        """
+        Metric deltas (b - a) between two runs, and the examples whose score
+        changed as (index, score_a, score_b).
+        """
+        with self._lock:
+            metric_rows = self._conn.execute(
+                "SELECT a.name, a.value, b.value FROM run_metrics a "
+                "JOIN run_metrics b ON b.run_id = ? AND b.name = a.name "
+                "WHERE a.run_id = ? ORDER BY a.name",
+                (run_b, run_a),
+            ).fetchall()
+            changed = self._conn.execute(
+                "SELECT a.idx, a.score, b.score FROM examples a "
+                "JOIN examples b ON b.run_id = ? AND b.idx = a.idx "
+                "WHERE a.run_id = ? AND a.score IS NOT b.score ORDER BY a.idx",
+                (run_b, run_a),
+            ).fetchall()
+        return {
+            "metrics": {
+                name: None if a is None or b is None else b - a
+                for name, a, b in metric_rows
+            },
+            "changed_examples": changed,
+        }
@@ -0,0 +1,49 @@
+import os
+import tempfile
+from datetime import datetime
+
+from . import common
+from .eval_types import EvalResult, SamplerBase, SingleEvalResult
+from .results_db import ResultsDB
+
+
+class FakeSampler(SamplerBase):
+    def __init__(self, temperature: float):
+        self.model = "model-a"
+        self.temperature = temperature
+
+
+def _run(scores: list[float]) -> tuple[EvalResult, list[SingleEvalResult]]:
+    results = [
+        SingleEvalResult(score=score, category="odd" if i % 2 else "even", extracted_answer="A")
+        for i, score in enumerate(scores)
+    ]
+    mean = sum(scores) / len(scores)
+    return EvalResult(mean, {"accuracy": mean}, [], [], None), results
+
+
+def test_results_db_leaderboard_breakdown_and_diff():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db = ResultsDB(os.path.join(tmpdir, "results.sqlite"))
+        examples = common.RepeatedExamples([{}, {}], n_repeats=2)
+        old = db.record_run(
+            "mmlu", "model-a", FakeSampler(0.5), *_run([0, 1, 0, 1]), examples, datetime(2025, 1, 1)
+        )
+        new = db.record_run(
+            "mmlu", "model-a", FakeSampler(0.5), *_run([1, 1, 0, 0]), examples, datetime(2025, 2, 1)
+        )
+        # another sampler config is another leaderboard entry
+        other = db.record_run(
+            "mmlu", "model-a", FakeSampler(1.0), *_run([1, 1, 1, 1]), examples, datetime(2025, 1, 1)
+        )
+
+        assert [run["run_id"] for run in db.runs(latest=True)] == [new, other]
+        assert sorted(row["metric"] for row in db.leaderboard()) == [0.5, 1.0]
+        assert db.leaderboard(metrics=("accuracy",), run_ids=[old]) == [
+            {"eval_name": "mmlu", "model_name": "model-a", "metric": 0.5}
+        ]
+        assert db.category_breakdown(new) == {"even": (2, 0.5), "odd": (2, 0.5)}
+
+        diff = db.diff_runs(old, new)
+        assert diff["metrics"] == {"accuracy": 0.0, "score": 0.0}
+        assert diff["changed_examples"] == [(0, 0.0, 1.0), (3, 1.0, 0.0)]
@@ -0,0 +1,332 @@
+"""
+Declarative run specs for simple_evals.
+
+A spec is a TOML (or, with pyyaml installed, YAML) file declaring the samplers and
+evals of a sweep, repeats and example limits per eval, per-provider concurrency and
+rate budgets, the cache policy and where results go:
+
+    debug = false
+
+    [samplers."gpt-4.1"]
+    type = "chat_completion"
+    model = "gpt-4.1-2025-04-14"
+    system_message = "You are a helpful assistant."
+    max_tokens = 2048
+
+    [samplers.o3_high]
+    preset = "o3_high"  # a model of simple_evals --list-models
+
+    [samplers.claude-3-7-sonnet]
+    type = "claude"
+    model = "claude-3-7-sonnet-20250219"
+
+    [evals.gpqa]
+    n_repeats = 4
+
+    [evals.healthbench_hard]
+    examples = 100
+    multi_rubric_grading = true
+
+    [budgets.openai]
+    max_concurrency = 64
+    requests_per_minute = 3000
+
+    [budgets.anthropic]
+    max_concurrency = 16
+
+    [cache]
+    grader_cache = true
+
+    [outputs]
+    directory = "/tmp/sweep"
+    results_db = true
+
+plan_jobs turns a spec into one lane of (eval, model) jobs per provider. Lanes run
+concurrently and every request to a provider, including grader requests, goes
+through that provider's budget, so a sweep keeps each provider as busy as its
+budget allows without exceeding it. Jobs run in spec order within a lane.
+"""
+
+import dataclasses
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any
+
+from .eval_types import MessageList, SamplerBase, SamplerResponse
+from .sampler_registry import MODELS, SAMPLER_TYPES, create_sampler
+
+# grader of SimpleQA, BrowseComp and HealthBench unless the spec declares one
+DEFAULT_GRADER = {"preset": "gpt-4.1"}
+DEFAULT_EQUALITY_CHECKER = {"type": "chat_completion", "model": "gpt-4-turbo-preview"}
+
+# per-eval settings passed on to the eval; everything else in [evals.<name>] is an error
+EVAL_OPTIONS = ("grader_batch_size", "multi_rubric_grading", "max_grading_attempts")
+
+
+@dataclass
+class SamplerSpec:
+    name: str
+    type: str
+    provider: str
+    options: dict[str, Any] = field(default_factory=dict)  # constructor arguments
+
+
+@dataclass
+class EvalSpec:
+    name: str  # used in output file names
+    eval: str  # eval to run, e.g. "gpqa"; defaults to name
+    num_examples: int | None = None
+    n_repeats: int | None = None
+    options: dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class ProviderBudget:
+    max_concurrency: int = 8  # requests in flight at once
+    requests_per_minute: float | None = None
+
+
+@dataclass
+class CachePolicy:
+    grader_cache: bool = False
+    grader_cache_path: str | None = None  # default: grader_verdicts.sqlite in the cache dir
+
+
+@dataclass
+class OutputSpec:
+    directory: str = "/tmp"
+    results_db: bool = False
+    results_db_path: str | None = None  # default: results.sqlite in the cache dir
+    report_page_size: int = 0
+    background_reports: bool = False
+
+
+@dataclass
+class RunSpec:
+    samplers: dict[str, SamplerSpec]
+    evals: dict[str, EvalSpec]
+    grader: SamplerSpec
+    equality_checker: SamplerSpec
+    budgets: dict[str, ProviderBudget] = field(default_factory=dict)
+    cache: CachePolicy = field(default_factory=CachePolicy)
+    outputs: OutputSpec = field(default_factory=OutputSpec)
+    debug: bool = False
+
+    def budget(self, provider: str) -> ProviderBudget:
+        return self.budgets.get(provider) or ProviderBudget()
+
+
+@dataclass
+class Job:
+    eval_name: str
+    model_name: str
+    provider: str
+
+
+def _sampler_spec(name: str, table: dict[str, Any]) -> SamplerSpec:
+    options = dict(table)
+    preset = options.pop("preset", None)
+    if preset is not None:
+        if preset not in MODELS:
+            raise ValueError(f"Sampler {name!r} has unknown preset {preset!r}")
+        # settings in the spec override those of the registered sampler
+        options = MODELS[preset] | options
+    sampler_type = options.pop("type", None)
+    if sampler_type not in SAMPLER_TYPES:
+        raise ValueError(
+            f"Sampler {name!r} needs a type, one of {sorted(SAMPLER_TYPES)}; got {sampler_type!r}"
+        )
+    provider = options.pop("provider", SAMPLER_TYPES[sampler_type][2])
+    return SamplerSpec(name, sampler_type, provider, options)
+
+
+def _eval_spec(name: str, table: dict[str, Any]) -> EvalSpec:
+    options = dict(table)
+    spec = EvalSpec(
+        name=name,
+        eval=options.pop("eval", name),
+        num_examples=options.pop("examples", None),
+        n_repeats=options.pop("n_repeats", None),
+    )
+    unknown = set(options) - set(EVAL_OPTIONS)
+    if unknown:
+        raise ValueError(f"Unknown settings for eval {name!r}: {sorted(unknown)}")
+    spec.options = options
+    return spec
+
+
+def _dataclass_from(cls, table: dict[str, Any], section: str):
+    names = {f.name for f in dataclasses.fields(cls)}
+    unknown = set(table) - names
+    if unknown:
+        raise ValueError(f"Unknown settings in [{section}]: {sorted(unknown)}")
+    return cls(**table)
+
+
+def parse_run_spec(data: dict[str, Any]) -> RunSpec:
+    """
+    RunSpec from the parsed contents of a spec file.
+    """
+    unknown = set(data) - {
+        "samplers", "evals", "grader", "equality_checker", "budgets", "cache", "outputs", "debug"
+    }
+    if unknown:
+        raise ValueError(f"Unknown sections in run spec: {sorted(unknown)}")
+    if not data.get("samplers") or not data.get("evals"):
+        raise ValueError("A run spec needs at least one sampler and one eval")
+    return RunSpec(
+        samplers={
+            name: _sampler_spec(name, table) for name, table in data["samplers"].items()
+        },
+        evals={name: _eval_spec(name, table or {}) for name, table in data["evals"].items()},
+        grader=_sampler_spec("grader", data.get("grader", DEFAULT_GRADER)),
+        equality_checker=_sampler_spec(
+            "equality_checker", data.get("equality_checker", DEFAULT_EQUALITY_CHECKER)
+        ),
+        budgets={
+            provider: _dataclass_from(ProviderBudget, table, f"budgets.{provider}")
+            for provider, table in data.get("budgets", {}).items()
+        },
+        cache=_dataclass_from(CachePolicy, data.get("cache", {}), "cache"),
+        outputs=_dataclass_from(OutputSpec, data.get("outputs", {}), "outputs"),
+        debug=data.get("debug", False),
+    )
+
+
+def load_run_spec(path: str) -> RunSpec:
+    """
+    Load a .toml, .yaml or .yml run spec.
+    """
+    if path.endswith((".yaml", ".yml")):
+        try:
+            import yaml
+        except ImportError as e:
+            raise ImportError("YAML run specs require pyyaml: pip install pyyaml") from e
+        with open(path) as f:
+            data = yaml.safe_load(f)
+    else:
+        import tomllib
+
+        with open(path, "rb") as f:
+            data = tomllib.load(f)
+    return parse_run_spec(data)
+
+
+def plan_jobs(spec: RunSpec) -> dict[str, list[Job]]:
+    """
+    Jobs of a spec, one lane per provider. Lanes can run concurrently; jobs within a
+    lane run in spec order.
+    """
+    lanes: dict[str, list[Job]] = {}
+    for model_name, sampler_spec in spec.samplers.items():
+        for eval_name in spec.evals:
+            lanes.setdefault(sampler_spec.provider, []).append(
+                Job(eval_name, model_name, sampler_spec.provider)
+            )
+    return lanes
+
+
+def format_plan(spec: RunSpec, lanes: dict[str, list[Job]]) -> str:
+    lines = []
+    for provider, jobs in lanes.items():
+        budget = spec.budget(provider)
+        rate = (
+            f", {budget.requests_per_minute:g} requests/min"
+            if budget.requests_per_minute
+            else ""
+        )
+        lines.append(f"{provider}: {budget.max_concurrency} concurrent requests{rate}")
+        lines.extend(f"  {job.eval_name} x {job.model_name}" for job in jobs)
+    return "\n".join(lines)
+
+
+def num_threads(spec: RunSpec) -> int:
+    """
+    Threads per eval that keep the largest provider budget busy.
+    """
+    providers = {s.provider for s in spec.samplers.values()}
+    providers |= {spec.grader.provider, spec.equality_checker.provider}
+    return max(spec.budget(provider).max_concurrency for provider in providers)
+
+
+class RateLimiter:
+    """
+    Caps the requests in flight at max_concurrency and spaces request starts at
+    least 60 / requests_per_minute seconds apart. Thread-safe.
+    """
+
+    def __init__(self, max_concurrency: int, requests_per_minute: float | None = None):
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._interval = 60.0 / requests_per_minute if requests_per_minute else 0.0
+        self._lock = threading.Lock()
+        self._next_start = 0.0
+
+    def __enter__(self) -> "RateLimiter":
+        self._slots.acquire()
+        if self._interval:
+            with self._lock:
+                now = time.monotonic()
+                start = max(now, self._next_start)
+                self._next_start = start + self._interval
+            time.sleep(start - now)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._slots.release()
+
+
+class BudgetedSampler(SamplerBase):
+    """
+    Sends every request of sampler through a provider's RateLimiter. Other
+    attributes are those of the wrapped sampler.
+    """
+
+    def __init__(self, sampler: SamplerBase, limiter: RateLimiter):
+        self.sampler = sampler
+        self.limiter = limiter
+
+    def __call__(self, message_list: MessageList) -> SamplerResponse:
+        with self.limiter:
+            return self.sampler(message_list)
+
+    def with_response_format(self, response_format: dict[str, Any]) -> SamplerBase:
+        return BudgetedSampler(self.sampler.with_response_format(response_format), self.limiter)
+
+    def __getattr__(self, name: str) -> Any:
+        if name == "sampler":
+            raise AttributeError(name)
+        return getattr(self.sampler, name)
+
+
+class ProviderBudgets:
+    """
+    One RateLimiter per provider, shared by all samplers of that provider.
+    """
+
+    def __init__(self, spec: RunSpec):
+        self.spec = spec
+        self._limiters: dict[str, RateLimiter] = {}
+
+    def limiter(self, provider: str) -> RateLimiter:
+        if provider not in self._limiters:
+            budget = self.spec.budget(provider)
+            self._limiters[provider] = RateLimiter(
+                budget.max_concurrency, budget.requests_per_minute
+            )
+        return self._limiters[provider]
+
+    def sampler(self, sampler_spec: SamplerSpec) -> BudgetedSampler:
+        return BudgetedSampler(
+            create_sampler(sampler_spec.type, sampler_spec.options),
+            self.limiter(sampler_spec.provider),
+        )
+
+
+def apply_thread_budget(spec: RunSpec) -> None:
+    """
+    Raise the eval thread pools to the largest provider budget, unless
+    SIMPLE_EVALS_NUM_THREADS is set.
+    """
+    os.environ.setdefault("SIMPLE_EVALS_NUM_THREADS", str(num_threads(spec)))
@@ -0,0 +1,103 @@
+import threading
+import time
+import tomllib
+
+from . import run_spec
+from .eval_types import SamplerBase, SamplerResponse
+from .grader_cache import grader_fingerprint
+
+SPEC = """
+debug = true
+
+[samplers."gpt-4.1"]
+type = "chat_completion"
+model = "gpt-4.1-2025-04-14"
+max_tokens = 2048
+
+[samplers.claude]
+type = "claude"
+model = "claude-3-7-sonnet-20250219"
+
+[samplers.o3]
+preset = "o3_high"
+reasoning_effort = "low"
+
+[evals.gpqa]
+n_repeats = 2
+
+[evals.healthbench_hard]
+examples = 20
+multi_rubric_grading = true
+
+[budgets.openai]
+max_concurrency = 32
+requests_per_minute = 600
+
+[outputs]
+directory = "/tmp/sweep"
+results_db = true
+"""
+
+
+class SlowSampler(SamplerBase):
+    def __init__(self):
+        self.model = "slow"
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, message_list):
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(0.01)
+        with self.lock:
+            self.in_flight -= 1
+        return SamplerResponse("ok", message_list, {})
+
+
+def test_run_spec_is_planned_per_provider():
+    spec = run_spec.parse_run_spec(tomllib.loads(SPEC))
+    assert spec.debug and spec.outputs.results_db
+    assert spec.evals["healthbench_hard"].num_examples == 20
+    assert spec.evals["healthbench_hard"].options == {"multi_rubric_grading": True}
+    # presets are models of the sampler registry, with settings overridden by the spec
+    assert spec.samplers["o3"].type == "responses"
+    assert spec.samplers["o3"].options == {
+        "model": "o3-2025-04-16",
+        "reasoning_model": True,
+        "reasoning_effort": "low",
+    }
+    assert spec.grader.options["model"] == "gpt-4.1-2025-04-14"
+
+    lanes = run_spec.plan_jobs(spec)
+    assert [(job.eval_name, job.model_name) for job in lanes["openai"]] == [
+        ("gpqa", "gpt-4.1"),
+        ("healthbench_hard", "gpt-4.1"),
+        ("gpqa", "o3"),
+        ("healthbench_hard", "o3"),
+    ]
+    assert [job.model_name for job in lanes["anthropic"]] == ["claude", "claude"]
+    # anthropic has no budget in the spec, so gets the default
+    assert spec.budget("anthropic").max_concurrency == 8
+    assert run_spec.num_threads(spec) == 32
+
+    try:
+        run_spec.parse_run_spec({**tomllib.loads(SPEC), "evals": {"gpqa": {"n_threads": 4}}})
+    except ValueError as e:
+        assert "n_threads" in str(e)
+    else:
+        raise AssertionError("unknown eval settings should be rejected")
+
+
+def test_budgeted_sampler_caps_concurrency():
+    inner = SlowSampler()
+    sampler = run_spec.BudgetedSampler(inner, run_spec.RateLimiter(max_concurrency=3))
+    threads = [threading.Thread(target=sampler, args=([],)) for _ in range(12)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert inner.max_in_flight == 3
+    assert sampler.model == "slow"
+    assert grader_fingerprint(sampler) == grader_fingerprint(inner)
@@ -1,3 +1,4 @@
+import copy
 import time
 from typing import Any
 
@@ -33,6 +34,14 @@ class ChatCompletionSampler(SamplerBase):
         self.temperature = temperature
         self.max_tokens = max_tokens
         self.image_format = "url"
+        self.response_format: dict[str, Any] | None = None
+
+    def with_response_format(
+        self, response_format: dict[str, Any]
+    ) -> "ChatCompletionSampler":
+        sampler = copy.copy(self)
+        sampler.response_format = response_format
+        return sampler
 
     def _handle_image(
         self,
@@ -100,6 +109,11 @@ class ChatCompletionSampler(SamplerBase):
                     messages=message_list,
                     temperature=self.temperature,
                     max_tokens=self.max_tokens,
+                    **(
+                        {"response_format": self.response_format}
+                        if self.response_format
+                        else {}
+                    ),
                 )
                 content = response.choices[0].message.content
                 if content is None:
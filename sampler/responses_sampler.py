@@ -1,3 +1,4 @@
+import copy
 import os
 import time
 from typing import Any
@@ -32,6 +33,12 @@ class ResponsesSampler(SamplerBase):
         self.image_format = "url"
         self.reasoning_model = reasoning_model
         self.reasoning_effort = reasoning_effort
+        self.response_format: dict[str, Any] | None = None
+
+    def with_response_format(self, response_format: dict[str, Any]) -> "ResponsesSampler":
+        sampler = copy.copy(self)
+        sampler.response_format = response_format
+        return sampler
 
     def _handle_image(
         self,
@@ -57,6 +64,8 @@ class ResponsesSampler(SamplerBase):
             message_list = [
                 self._pack_message("developer", self.system_message)
             ] + message_list
+        # the responses API takes the response format under text.format
+        text = {"format": self.response_format} if self.response_format else None
         trial = 0
         while True:
             try:
@@ -70,6 +79,7 @@ class ResponsesSampler(SamplerBase):
                         model=self.model,
                         input=message_list,
                         reasoning=reasoning,
+                        **({"text": text} if text else {}),
                     )
                 else:
                     response = self.client.responses.create(
@@ -77,6 +87,7 @@ class ResponsesSampler(SamplerBase):
                         input=message_list,
                         temperature=self.temperature,
                         max_output_tokens=self.max_tokens,
+                        **({"text": text} if text else {}),
                     )
                 return SamplerResponse(
                     response_text=response.output_text,
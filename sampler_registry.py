@@ -0,0 +1,264 @@
+"""
+Named samplers for simple_evals --model and run specs.
+
+Entries only describe a sampler: its type in SAMPLER_TYPES and its constructor
+arguments, as in a run spec's [samplers.<name>] table. A sampler module is imported
+and its API client constructed only when a sampler is built, so listing the models,
+or running one of them, does not import every provider SDK and construct a client
+for each of them.
+"""
+
+import importlib
+from dataclasses import dataclass
+from typing import Any
+
+from .eval_types import SamplerBase
+
+# sampler type -> (module in sampler/, class, provider)
+SAMPLER_TYPES = {
+    "chat_completion": ("chat_completion_sampler", "ChatCompletionSampler", "openai"),
+    "o_chat_completion": ("o_chat_completion_sampler", "OChatCompletionSampler", "openai"),
+    "responses": ("responses_sampler", "ResponsesSampler", "openai"),
+    "claude": ("claude_sampler", "ClaudeCompletionSampler", "anthropic"),
+}
+
+
+@dataclass(frozen=True)
+class SamplerConstant:
+    """
+    A constant of the sampler's module, such as a system message, looked up when the
+    sampler is built.
+    """
+
+    name: str
+
+
+MODELS: dict[str, dict[str, Any]] = {
+    # Reasoning Models
+    "o3": {
+        "type": "responses",
+        "model": "o3-2025-04-16",
+        "reasoning_model": True,
+    },
+    "o3-temp-1": {
+        "type": "responses",
+        "model": "o3-2025-04-16",
+        "reasoning_model": True,
+        "temperature": 1.0,
+    },
+    "o3_high": {
+        "type": "responses",
+        "model": "o3-2025-04-16",
+        "reasoning_model": True,
+        "reasoning_effort": "high",
+    },
+    "o3_low": {
+        "type": "responses",
+        "model": "o3-2025-04-16",
+        "reasoning_model": True,
+        "reasoning_effort": "low",
+    },
+    # Default == Medium
+    "o4-mini": {
+        "type": "responses",
+        "model": "o4-mini-2025-04-16",
+        "reasoning_model": True,
+    },
+    "o4-mini_high": {
+        "type": "responses",
+        "model": "o4-mini-2025-04-16",
+        "reasoning_model": True,
+        "reasoning_effort": "high",
+    },
+    "o4-mini_low": {
+        "type": "responses",
+        "model": "o4-mini-2025-04-16",
+        "reasoning_model": True,
+        "reasoning_effort": "low",
+    },
+    "o1-pro": {
+        "type": "responses",
+        "model": "o1-pro",
+        "reasoning_model": True,
+    },
+    "o1": {
+        "type": "o_chat_completion",
+        "model": "o1",
+    },
+    "o1_high": {
+        "type": "o_chat_completion",
+        "model": "o1",
+        "reasoning_effort": "high",
+    },
+    "o1_low": {
+        "type": "o_chat_completion",
+        "model": "o1",
+        "reasoning_effort": "low",
+    },
+    "o1-preview": {
+        "type": "o_chat_completion",
+        "model": "o1-preview",
+    },
+    "o1-mini": {
+        "type": "o_chat_completion",
+        "model": "o1-mini",
+    },
+    # Default == Medium
+    "o3-mini": {
+        "type": "o_chat_completion",
+        "model": "o3-mini",
+    },
+    "o3-mini_high": {
+        "type": "o_chat_completion",
+        "model": "o3-mini",
+        "reasoning_effort": "high",
+    },
+    "o3-mini_low": {
+        "type": "o_chat_completion",
+        "model": "o3-mini",
+        "reasoning_effort": "low",
+    },
+    # GPT-4.1 models
+    "gpt-4.1": {
+        "type": "chat_completion",
+        "model": "gpt-4.1-2025-04-14",
+        "system_message": SamplerConstant("OPENAI_SYSTEM_MESSAGE_API"),
+        "max_tokens": 2048,
+    },
+    "gpt-4.1-temp-1": {
+        "type": "chat_completion",
+        "model": "gpt-4.1-2025-04-14",
+        "system_message": SamplerConstant("OPENAI_SYSTEM_MESSAGE_API"),
+        "max_tokens": 2048,
+        "temperature": 1.0,
+    },
+    "gpt-4.1-mini": {
+        "type": "chat_completion",
+        "model": "gpt-4.1-mini-2025-04-14",
+        "system_message": SamplerConstant("OPENAI_SYSTEM_MESSAGE_API"),
+        "max_tokens": 2048,
+    },
+    "gpt-4.1-nano": {
+        "type": "chat_completion",
+        "model": "gpt-4.1-nano-2025-04-14",
+        "system_message": SamplerConstant("OPENAI_SYSTEM_MESSAGE_API"),
+        "max_tokens": 2048,
+    },
+    # GPT-4o models
+    "gpt-4o": {
+        "type": "chat_completion",
+        "model": "gpt-4o",
+        "system_message": SamplerConstant("OPENAI_SYSTEM_MESSAGE_API"),
+        "max_tokens": 2048,
+    },
+    "gpt-4o-2024-11-20": {
+        "type": "chat_completion",
+        "model": "gpt-4o-2024-11-20",
+        "system_message": SamplerConstant("OPENAI_SYSTEM_MESSAGE_API"),
+        "max_tokens": 2048,
+    },
+    "gpt-4o-2024-08-06": {
+        "type": "chat_completion",
+        "model": "gpt-4o-2024-08-06",
+        "system_message": SamplerConstant("OPENAI_SYSTEM_MESSAGE_API"),
+        "max_tokens": 2048,
+    },
+    "gpt-4o-2024-08-06-temp-1": {
+        "type": "chat_completion",
+        "model": "gpt-4o-2024-08-06",
+        "system_message": SamplerConstant("OPENAI_SYSTEM_MESSAGE_API"),
+        "max_tokens": 2048,
+        "temperature": 1.0,
+    },
+    "gpt-4o-2024-05-13": {
+        "type": "chat_completion",
+        "model": "gpt-4o-2024-05-13",
+        "system_message": SamplerConstant("OPENAI_SYSTEM_MESSAGE_API"),
+        "max_tokens": 2048,
+    },
+    "gpt-4o-mini": {
+        "type": "chat_completion",
+        "model": "gpt-4o-mini-2024-07-18",
+        "system_message": SamplerConstant("OPENAI_SYSTEM_MESSAGE_API"),
+        "max_tokens": 2048,
+    },
+    # GPT-4.5 model
+    "gpt-4.5-preview": {
+        "type": "chat_completion",
+        "model": "gpt-4.5-preview-2025-02-27",
+        "system_message": SamplerConstant("OPENAI_SYSTEM_MESSAGE_API"),
+        "max_tokens": 2048,
+    },
+    # GPT-4-turbo model
+    "gpt-4-turbo-2024-04-09": {
+        "type": "chat_completion",
+        "model": "gpt-4-turbo-2024-04-09",
+        "system_message": SamplerConstant("OPENAI_SYSTEM_MESSAGE_API"),
+    },
+    # GPT-4 model
+    "gpt-4-0613": {
+        "type": "chat_completion",
+        "model": "gpt-4-0613",
+        "system_message": SamplerConstant("OPENAI_SYSTEM_MESSAGE_API"),
+    },
+    # GPT-3.5 Turbo model
+    "gpt-3.5-turbo-0125": {
+        "type": "chat_completion",
+        "model": "gpt-3.5-turbo-0125",
+        "system_message": SamplerConstant("OPENAI_SYSTEM_MESSAGE_API"),
+    },
+    "gpt-3.5-turbo-0125-temp-1": {
+        "type": "chat_completion",
+        "model": "gpt-3.5-turbo-0125",
+        "system_message": SamplerConstant("OPENAI_SYSTEM_MESSAGE_API"),
+        "temperature": 1.0,
+    },
+    # Chatgpt models:
+    "chatgpt-4o-latest": {
+        "type": "chat_completion",
+        "model": "chatgpt-4o-latest",
+        "system_message": SamplerConstant("OPENAI_SYSTEM_MESSAGE_CHATGPT"),
+        "max_tokens": 2048,
+    },
+    "gpt-4-turbo-2024-04-09_chatgpt": {
+        "type": "chat_completion",
+        "model": "gpt-4-turbo-2024-04-09",
+        "system_message": SamplerConstant("OPENAI_SYSTEM_MESSAGE_CHATGPT"),
+    },
+    # Claude models:
+    "claude-3-opus-20240229_empty": {
+        "type": "claude",
+        "model": "claude-3-opus-20240229",
+        "system_message": SamplerConstant("CLAUDE_SYSTEM_MESSAGE_LMSYS"),
+    },
+    "claude-3-7-sonnet-20250219": {
+        "type": "claude",
+        "model": "claude-3-7-sonnet-20250219",
+        "system_message": SamplerConstant("CLAUDE_SYSTEM_MESSAGE_LMSYS"),
+    },
+    "claude-3-haiku-20240307": {
+        "type": "claude",
+        "model": "claude-3-haiku-20240307",
+    },
+}
+
+
+def create_sampler(sampler_type: str, options: dict[str, Any]) -> SamplerBase:
+    """
+    Import the module of a sampler type and construct the sampler.
+    """
+    module_name, class_name, _ = SAMPLER_TYPES[sampler_type]
+    module = importlib.import_module(f".sampler.{module_name}", __package__)
+    kwargs = {
+        key: getattr(module, value.name) if isinstance(value, SamplerConstant) else value
+        for key, value in options.items()
+    }
+    return getattr(module, class_name)(**kwargs)
+
+
+def build(name: str) -> SamplerBase:
+    """
+    Construct the sampler registered under name.
+    """
+    options = dict(MODELS[name])
+    return create_sampler(options.pop("type"), options)
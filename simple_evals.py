@@ -1,13 +1,18 @@
 import argparse
 import json
+import multiprocessing
+import os
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 import pandas as pd
 
-from . import common
+from . import common, result_store, run_spec, sampler_registry, work_queue
 from .browsecomp_eval import BrowseCompEval
 from .drop_eval import DropEval
+from .eval_types import Eval, EvalResult, SamplerBase, SingleEvalResult
+from .grader_cache import GraderCache
 from .gpqa_eval import GPQAEval
 from .healthbench_eval import HealthBenchEval
 from .healthbench_meta_eval import HealthBenchMetaEval
@@ -15,14 +20,7 @@ from .math_eval import MathEval
 from .mgsm_eval import MGSMEval
 from .mmlu_eval import MMLUEval
 from .humaneval_eval import HumanEval
-from .sampler.chat_completion_sampler import (
-    OPENAI_SYSTEM_MESSAGE_API,
-    OPENAI_SYSTEM_MESSAGE_CHATGPT,
-    ChatCompletionSampler,
-)
-from .sampler.claude_sampler import ClaudeCompletionSampler, CLAUDE_SYSTEM_MESSAGE_LMSYS
-from .sampler.o_chat_completion_sampler import OChatCompletionSampler
-from .sampler.responses_sampler import ResponsesSampler
+from .results_db import ResultsDB
 from .simpleqa_eval import SimpleQAEval
 
 
@@ -59,279 +57,200 @@ def main():
     parser.add_argument(
         "--examples", type=int, help="Number of examples to use (overrides default)"
     )
+    parser.add_argument(
+        "--grader-batch-size",
+        type=int,
+        default=1,
+        help="Examples graded per grader request for SimpleQA and BrowseComp.",
+    )
+    parser.add_argument(
+        "--multi-rubric-grading",
+        action="store_true",
+        help="Grade all rubric items of a HealthBench example in one grader request.",
+    )
+    parser.add_argument(
+        "--max-grading-attempts",
+        type=int,
+        default=3,
+        help="Grader requests per HealthBench rubric item before it is left out of the score.",
+    )
+    parser.add_argument(
+        "--grader-cache",
+        action="store_true",
+        help="Reuse grader verdicts across runs from a SQLite cache in SIMPLE_EVALS_CACHE_DIR.",
+    )
+    parser.add_argument(
+        "--results-db",
+        action="store_true",
+        help="Record runs in a SQLite results database in SIMPLE_EVALS_CACHE_DIR and summarize from it.",
+    )
+    parser.add_argument(
+        "--leaderboard",
+        action="store_true",
+        help="Print the latest result of every eval and model in the results database and exit.",
+    )
+    parser.add_argument(
+        "--background-reports",
+        action="store_true",
+        help="Render HTML reports in separate processes while the next eval runs.",
+    )
+    parser.add_argument(
+        "--report-page-size",
+        type=int,
+        default=0,
+        help="Write each report as an index page plus pages of this many examples.",
+    )
+    parser.add_argument(
+        "--num-shards",
+        type=int,
+        default=1,
+        help="Split each eval into this many shards, e.g. to run on several machines.",
+    )
+    parser.add_argument(
+        "--shard-index",
+        type=int,
+        default=0,
+        help="Which shard to run when --num-shards > 1.",
+    )
+    parser.add_argument(
+        "--merge-shards",
+        type=str,
+        help="Comma-separated list of shard files to merge into full results.",
+    )
+    parser.add_argument(
+        "--coordinator",
+        type=str,
+        help="Serve the examples of one eval to workers at this address (host:port or a socket path).",
+    )
+    parser.add_argument(
+        "--worker",
+        type=str,
+        help="Pull examples from the coordinator at this address (host:port or a socket path).",
+    )
+    parser.add_argument(
+        "--spec",
+        type=str,
+        help="Run the samplers and evals declared in a TOML or YAML run spec (see run_spec.py).",
+    )
+    parser.add_argument(
+        "--lease-timeout",
+        type=float,
+        default=600.0,
+        help="Seconds before the coordinator re-queues examples leased by a worker.",
+    )
+    parser.add_argument(
+        "--lease-size",
+        type=int,
+        help="Examples per worker lease (default: the eval's thread count).",
+    )
+    parser.add_argument(
+        "--leases-in-flight",
+        type=int,
+        default=2,
+        help="Leases each worker runs at once.",
+    )
 
     args = parser.parse_args()
+    if args.max_grading_attempts < 1:
+        parser.error("--max-grading-attempts must be at least 1")
 
-    models = {
-        # Reasoning Models
-        "o3": ResponsesSampler(
-            model="o3-2025-04-16",
-            reasoning_model=True,
-        ),
-        "o3-temp-1": ResponsesSampler(
-            model="o3-2025-04-16",
-            reasoning_model=True,
-            temperature=1.0,
-        ),
-        "o3_high": ResponsesSampler(
-            model="o3-2025-04-16",
-            reasoning_model=True,
-            reasoning_effort="high",
-        ),
-        "o3_low": ResponsesSampler(
-            model="o3-2025-04-16",
-            reasoning_model=True,
-            reasoning_effort="low",
-        ),
-        # Default == Medium
-        "o4-mini": ResponsesSampler(
-            model="o4-mini-2025-04-16",
-            reasoning_model=True,
-        ),
-        "o4-mini_high": ResponsesSampler(
-            model="o4-mini-2025-04-16",
-            reasoning_model=True,
-            reasoning_effort="high",
-        ),
-        "o4-mini_low": ResponsesSampler(
-            model="o4-mini-2025-04-16",
-            reasoning_model=True,
-            reasoning_effort="low",
-        ),
-        "o1-pro": ResponsesSampler(
-            model="o1-pro",
-            reasoning_model=True,
-        ),
-        "o1": OChatCompletionSampler(
-            model="o1",
-        ),
-        "o1_high": OChatCompletionSampler(
-            model="o1",
-            reasoning_effort="high",
-        ),
-        "o1_low": OChatCompletionSampler(
-            model="o1",
-            reasoning_effort="low",
-        ),
-        "o1-preview": OChatCompletionSampler(
-            model="o1-preview",
-        ),
-        "o1-mini": OChatCompletionSampler(
-            model="o1-mini",
-        ),
-        # Default == Medium
-        "o3-mini": OChatCompletionSampler(
-            model="o3-mini",
-        ),
-        "o3-mini_high": OChatCompletionSampler(
-            model="o3-mini",
-            reasoning_effort="high",
-        ),
-        "o3-mini_low": OChatCompletionSampler(
-            model="o3-mini",
-            reasoning_effort="low",
-        ),
-        # GPT-4.1 models
-        "gpt-4.1": ChatCompletionSampler(
-            model="gpt-4.1-2025-04-14",
-            system_message=OPENAI_SYSTEM_MESSAGE_API,
-            max_tokens=2048,
-        ),
-        "gpt-4.1-temp-1": ChatCompletionSampler(
-            model="gpt-4.1-2025-04-14",
-            system_message=OPENAI_SYSTEM_MESSAGE_API,
-            max_tokens=2048,
-            temperature=1.0,
-        ),
-        "gpt-4.1-mini": ChatCompletionSampler(
-            model="gpt-4.1-mini-2025-04-14",
-            system_message=OPENAI_SYSTEM_MESSAGE_API,
-            max_tokens=2048,
-        ),
-        "gpt-4.1-nano": ChatCompletionSampler(
-            model="gpt-4.1-nano-2025-04-14",
-            system_message=OPENAI_SYSTEM_MESSAGE_API,
-            max_tokens=2048,
-        ),
-        # GPT-4o models
-        "gpt-4o": ChatCompletionSampler(
-            model="gpt-4o",
-            system_message=OPENAI_SYSTEM_MESSAGE_API,
-            max_tokens=2048,
-        ),
-        "gpt-4o-2024-11-20": ChatCompletionSampler(
-            model="gpt-4o-2024-11-20",
-            system_message=OPENAI_SYSTEM_MESSAGE_API,
-            max_tokens=2048,
-        ),
-        "gpt-4o-2024-08-06": ChatCompletionSampler(
-            model="gpt-4o-2024-08-06",
-            system_message=OPENAI_SYSTEM_MESSAGE_API,
-            max_tokens=2048,
-        ),
-        "gpt-4o-2024-08-06-temp-1": ChatCompletionSampler(
-            model="gpt-4o-2024-08-06",
-            system_message=OPENAI_SYSTEM_MESSAGE_API,
-            max_tokens=2048,
-            temperature=1.0,
-        ),
-        "gpt-4o-2024-05-13": ChatCompletionSampler(
-            model="gpt-4o-2024-05-13",
-            system_message=OPENAI_SYSTEM_MESSAGE_API,
-            max_tokens=2048,
-        ),
-        "gpt-4o-mini": ChatCompletionSampler(
-            model="gpt-4o-mini-2024-07-18",
-            system_message=OPENAI_SYSTEM_MESSAGE_API,
-            max_tokens=2048,
-        ),
-        # GPT-4.5 model
-        "gpt-4.5-preview": ChatCompletionSampler(
-            model="gpt-4.5-preview-2025-02-27",
-            system_message=OPENAI_SYSTEM_MESSAGE_API,
-            max_tokens=2048,
-        ),
-        # GPT-4-turbo model
-        "gpt-4-turbo-2024-04-09": ChatCompletionSampler(
-            model="gpt-4-turbo-2024-04-09",
-            system_message=OPENAI_SYSTEM_MESSAGE_API,
-        ),
-        # GPT-4 model
-        "gpt-4-0613": ChatCompletionSampler(
-            model="gpt-4-0613",
-            system_message=OPENAI_SYSTEM_MESSAGE_API,
-        ),
-        # GPT-3.5 Turbo model
-        "gpt-3.5-turbo-0125": ChatCompletionSampler(
-            model="gpt-3.5-turbo-0125",
-            system_message=OPENAI_SYSTEM_MESSAGE_API,
-        ),
-        "gpt-3.5-turbo-0125-temp-1": ChatCompletionSampler(
-            model="gpt-3.5-turbo-0125",
-            system_message=OPENAI_SYSTEM_MESSAGE_API,
-            temperature=1.0,
-        ),
-        # Chatgpt models:
-        "chatgpt-4o-latest": ChatCompletionSampler(
-            model="chatgpt-4o-latest",
-            system_message=OPENAI_SYSTEM_MESSAGE_CHATGPT,
-            max_tokens=2048,
-        ),
-        "gpt-4-turbo-2024-04-09_chatgpt": ChatCompletionSampler(
-            model="gpt-4-turbo-2024-04-09",
-            system_message=OPENAI_SYSTEM_MESSAGE_CHATGPT,
-        ),
-        # Claude models:
-        "claude-3-opus-20240229_empty": ClaudeCompletionSampler(
-            model="claude-3-opus-20240229",
-            system_message=CLAUDE_SYSTEM_MESSAGE_LMSYS,
-        ),
-        "claude-3-7-sonnet-20250219": ClaudeCompletionSampler(
-            model="claude-3-7-sonnet-20250219",
-            system_message=CLAUDE_SYSTEM_MESSAGE_LMSYS,
-        ),
-        "claude-3-haiku-20240307": ClaudeCompletionSampler(
-            model="claude-3-haiku-20240307",
-        ),
-    }
+    if args.spec:
+        return run_from_spec(run_spec.load_run_spec(args.spec))
+
+    if args.leaderboard:
+        return summarize_runs(ResultsDB())
 
     if args.list_models:
         print("Available models:")
-        for model_name in models.keys():
+        for model_name in sampler_registry.MODELS:
             print(f" - {model_name}")
         return
 
-    if args.model:
-        models_chosen = args.model.split(",")
-        for model_name in models_chosen:
-            if model_name not in models:
-                print(f"Error: Model '{model_name}' not found.")
-                return
-        models = {model_name: models[model_name] for model_name in models_chosen}
+    models_chosen = (
+        args.model.split(",") if args.model else list(sampler_registry.MODELS)
+    )
+    for model_name in models_chosen:
+        if model_name not in sampler_registry.MODELS:
+            print(f"Error: Model '{model_name}' not found.")
+            return
+    # only the chosen samplers are constructed
+    models = {
+        model_name: sampler_registry.build(model_name) for model_name in models_chosen
+    }
 
     print(f"Running with args {args}")
 
-    grading_sampler = ChatCompletionSampler(
-        model="gpt-4.1-2025-04-14",
-        system_message=OPENAI_SYSTEM_MESSAGE_API,
-        max_tokens=2048,
+    grading_sampler = sampler_registry.build("gpt-4.1")
+    grader_cache = GraderCache() if args.grader_cache else None
+    results_db = ResultsDB() if args.results_db else None
+    equality_checker = sampler_registry.create_sampler(
+        "chat_completion", {"model": "gpt-4-turbo-preview"}
     )
-    equality_checker = ChatCompletionSampler(model="gpt-4-turbo-preview")
     # ^^^ used for fuzzy matching, just for math
 
     def get_evals(eval_name, debug_mode):
-        num_examples = (
-            args.examples if args.examples is not None else (5 if debug_mode else None)
+        return get_eval(
+            eval_name,
+            debug_mode,
+            num_examples=args.examples,
+            n_repeats=args.n_repeats,
+            n_threads=args.n_threads,
+            grading_sampler=grading_sampler,
+            equality_checker=equality_checker,
+            grader_cache=grader_cache,
+            grader_batch_size=args.grader_batch_size,
+            multi_rubric_grading=args.multi_rubric_grading,
+            max_grading_attempts=args.max_grading_attempts,
         )
-        # Set num_examples = None to reproduce full evals
-        match eval_name:
-            case "mmlu":
-                return MMLUEval(num_examples=1 if debug_mode else num_examples)
-            case "math":
-                return MathEval(
-                    equality_checker=equality_checker,
-                    num_examples=num_examples,
-                    n_repeats=1 if debug_mode else args.n_repeats or 10,
-                )
-            case "gpqa":
-                return GPQAEval(
-                    n_repeats=1 if debug_mode else args.n_repeats or 10,
-                    num_examples=num_examples,
-                )
-            case "mgsm":
-                return MGSMEval(
-                    num_examples_per_lang=10 if debug_mode else num_examples or 250
-                )
-            case "drop":
-                return DropEval(
-                    num_examples=10 if debug_mode else num_examples,
-                    train_samples_per_prompt=3,
-                )
-            case "humaneval":
-                return HumanEval(num_examples=10 if debug_mode else num_examples)
-            case "simpleqa":
-                return SimpleQAEval(
-                    grader_model=grading_sampler,
-                    num_examples=10 if debug_mode else num_examples,
-                )
-            case "browsecomp":
-                return BrowseCompEval(
-                    grader_model=grading_sampler,
-                    num_examples=10 if debug_mode else num_examples,
-                )
-            case "healthbench":
-                return HealthBenchEval(
-                    grader_model=grading_sampler,
-                    num_examples=10 if debug_mode else num_examples,
-                    n_repeats=args.n_repeats or 1,
-                    n_threads=args.n_threads or 1,
-                    subset_name=None,
-                )
-            case "healthbench_hard":
-                return HealthBenchEval(
-                    grader_model=grading_sampler,
-                    num_examples=10 if debug_mode else num_examples,
-                    n_repeats=args.n_repeats or 1,
-                    n_threads=args.n_threads or 1,
-                    subset_name="hard",
-                )
-            case "healthbench_consensus":
-                return HealthBenchEval(
-                    grader_model=grading_sampler,
-                    num_examples=10 if debug_mode else num_examples,
-                    n_repeats=args.n_repeats or 1,
-                    n_threads=args.n_threads or 1,
-                    subset_name="consensus",
-                )
-            case "healthbench_meta":
-                return HealthBenchMetaEval(
-                    grader_model=grading_sampler,
-                    num_examples=10 if debug_mode else num_examples,
-                    n_repeats=args.n_repeats or 1,
-                    n_threads=args.n_threads or 1,
+
+    debug_suffix = "_DEBUG" if args.debug else ""
+    now = datetime.now()
+    date_str = now.strftime("%Y%m%d_%H%M%S")
+
+    writer = ResultWriter(
+        debug_suffix=debug_suffix,
+        report_page_size=args.report_page_size,
+        background_reports=args.background_reports,
+    )
+    run_ids: list[int] = []
+
+    def record_run(
+        eval_name: str, model_name: str, result: EvalResult, results: list, examples
+    ) -> None:
+        if results_db is not None:
+            run_ids.append(
+                results_db.record_run(
+                    eval_name,
+                    model_name,
+                    models.get(model_name),
+                    result,
+                    results,
+                    examples,
+                    date=now,
                 )
-            case _:
-                raise Exception(f"Unrecognized eval type: {eval_name}")
+            )
+
+    def summarize(mergekey2resultpath: dict[str, str]) -> list[dict]:
+        writer.wait_for_reports()
+        if results_db is not None:
+            return summarize_runs(results_db, run_ids)
+        return summarize_results(mergekey2resultpath)
+
+    if args.merge_shards:
+        mergekey2resultpath = {}
+        merged = common.merge_shard_results(args.merge_shards.split(","))
+        for (eval_name, model_name), (num_examples, results) in merged.items():
+            eval_obj = get_evals(eval_name, args.debug)
+            assert len(eval_obj.examples) == num_examples, (
+                f"Shards have {num_examples} examples but {eval_name} has "
+                f"{len(eval_obj.examples)}; use the same --examples/--n-repeats/--debug"
+            )
+            result = eval_obj.aggregate(results)
+            file_stem = f"{eval_name}_{model_name}_{date_str}"
+            store = writer.store_results(file_stem, results, eval_obj.examples)
+            mergekey2resultpath[file_stem] = writer.write(file_stem, result, store)
+            record_run(eval_name, model_name, result, results, eval_obj.examples)
+        return summarize(mergekey2resultpath)
 
     if args.eval:
         evals_list = args.eval.split(",")
@@ -361,49 +280,370 @@ def main():
             ]
         }
 
+    if args.coordinator or args.worker:
+        if len(models) != 1 or len(evals) != 1:
+            print("Error: --coordinator and --worker need exactly one --model and one --eval.")
+            return
+        ((model_name, sampler),) = models.items()
+        ((eval_name, eval_obj),) = evals.items()
+        if args.worker:
+            work_queue.run_worker(
+                eval_obj,
+                sampler,
+                args.worker,
+                lease_size=args.lease_size,
+                leases_in_flight=args.leases_in_flight,
+            )
+            return []
+        results = work_queue.run_coordinator(
+            eval_obj, args.coordinator, lease_timeout=args.lease_timeout
+        )
+        result = eval_obj.aggregate(results)
+        file_stem = f"{eval_name}_{model_name}_{date_str}"
+        store = writer.store_results(file_stem, results, eval_obj.examples)
+        result_filename = writer.write(file_stem, result, store)
+        record_run(eval_name, model_name, result, results, eval_obj.examples)
+        return summarize({file_stem: result_filename})
+
     print(evals)
-    debug_suffix = "_DEBUG" if args.debug else ""
     print(debug_suffix)
     mergekey2resultpath = {}
     print(f"Running the following evals: {list(evals.keys())}")
     print(f"Running evals for the following models: {list(models.keys())}")
 
-    now = datetime.now()
-    date_str = now.strftime("%Y%m%d_%H%M%S")
     for model_name, sampler in models.items():
         for eval_name, eval_obj in evals.items():
-            result = eval_obj(sampler)
-            # ^^^ how to use a sampler
             file_stem = f"{eval_name}_{model_name}"
             # file stem should also include the year, month, day, and time in hours and minutes
             file_stem += f"_{date_str}"
-            report_filename = f"/tmp/{file_stem}{debug_suffix}.html"
-            print(f"Writing report to {report_filename}")
-            with open(report_filename, "w") as fh:
-                fh.write(common.make_report(result))
-            assert result.metrics is not None
-            metrics = result.metrics | {"score": result.score}
-            # Sort metrics by key
-            metrics = dict(sorted(metrics.items()))
-            print(metrics)
-            result_filename = f"/tmp/{file_stem}{debug_suffix}.json"
-            with open(result_filename, "w") as f:
-                f.write(json.dumps(metrics, indent=2))
-            print(f"Writing results to {result_filename}")
-
-            full_result_filename = f"/tmp/{file_stem}{debug_suffix}_allresults.json"
-            with open(full_result_filename, "w") as f:
-                result_dict = {
-                    "score": result.score,
-                    "metrics": result.metrics,
-                    "htmls": result.htmls,
-                    "convos": result.convos,
-                    "metadata": result.metadata,
-                }
-                f.write(json.dumps(result_dict, indent=2))
-                print(f"Writing all results to {full_result_filename}")
-
-            mergekey2resultpath[f"{file_stem}"] = result_filename
+            if args.num_shards > 1:
+                indices = common.shard_indices(
+                    len(eval_obj.examples), args.shard_index, args.num_shards
+                )
+                results = eval_obj.run(
+                    sampler, [eval_obj.examples[i] for i in indices]
+                )
+                shard_filename = f"/tmp/{file_stem}{debug_suffix}_shard{args.shard_index}of{args.num_shards}.json"
+                common.write_shard_results(
+                    shard_filename,
+                    results,
+                    indices,
+                    eval_name=eval_name,
+                    model_name=model_name,
+                    shard_index=args.shard_index,
+                    num_shards=args.num_shards,
+                    num_examples=len(eval_obj.examples),
+                )
+                print(f"Writing shard results to {shard_filename}")
+                continue
+            store = writer.open_store(file_stem)
+            result, results = run_eval(eval_obj, sampler, store)
+            mergekey2resultpath[f"{file_stem}"] = writer.write(file_stem, result, store)
+            record_run(eval_name, model_name, result, results, eval_obj.examples)
+    if args.num_shards > 1:
+        print("Merge the shard files with --merge-shards to get the final results.")
+        return []
+    return summarize(mergekey2resultpath)
+
+
+class ResultWriter:
+    """
+    Writes the metrics, per-example results and report of each run to directory.
+    With background_reports, reports are rendered by separate processes; call
+    wait_for_reports() before relying on them.
+    """
+
+    def __init__(
+        self,
+        directory: str = "/tmp",
+        debug_suffix: str = "",
+        report_page_size: int = 0,
+        background_reports: bool = False,
+    ):
+        self.directory = directory
+        self.debug_suffix = debug_suffix
+        self.report_page_size = report_page_size
+        self.background_reports = background_reports
+        self.report_processes: list[multiprocessing.Process] = []
+
+    def path(self, file_stem: str, suffix: str) -> str:
+        return os.path.join(self.directory, f"{file_stem}{self.debug_suffix}{suffix}")
+
+    def wait_for_reports(self) -> None:
+        for process in self.report_processes:
+            process.join()
+
+    def open_store(self, file_stem: str) -> result_store.ResultStoreWriter | None:
+        if not result_store.pyarrow_available():
+            return None
+        return result_store.ResultStoreWriter(self.path(file_stem, "_allresults.parquet"))
+
+    def store_results(
+        self, file_stem: str, results: list, examples
+    ) -> result_store.ResultStoreWriter | None:
+        store = self.open_store(file_stem)
+        if store is not None:
+            result_store.write_results(store, results, examples)
+        return store
+
+    def write(
+        self,
+        file_stem: str,
+        result: EvalResult,
+        store: result_store.ResultStoreWriter | None = None,
+    ) -> str:
+        if self.report_page_size:
+            report_filename = self.path(file_stem, "_report/index.html")
+            write_report = common.write_paginated_report
+            write_report_args = (
+                os.path.dirname(report_filename),
+                result,
+                self.report_page_size,
+            )
+        else:
+            report_filename = self.path(file_stem, ".html")
+            write_report = common.write_report
+            write_report_args = (report_filename, result)
+        print(f"Writing report to {report_filename}")
+        if self.background_reports:
+            # example HTML is only rendered here, so this moves all of it off the run
+            process = multiprocessing.Process(
+                target=write_report, args=write_report_args
+            )
+            process.start()
+            self.report_processes.append(process)
+        else:
+            write_report(*write_report_args)
+        assert result.metrics is not None
+        metrics = result.metrics | {"score": result.score}
+        # Sort metrics by key
+        metrics = dict(sorted(metrics.items()))
+        print(metrics)
+        result_filename = self.path(file_stem, ".json")
+        with open(result_filename, "w") as f:
+            f.write(json.dumps(metrics, indent=2))
+        print(f"Writing results to {result_filename}")
+
+        if store is not None:
+            # per-example rows are in the store; keep the run-level metadata with them
+            metadata = {
+                k: v
+                for k, v in (result.metadata or {}).items()
+                if k != "example_level_metadata"
+            }
+            store.close({"score": result.score, "metrics": result.metrics, **metadata})
+            print(f"Writing all results to {store.path}")
+            return result_filename
+
+        full_result_filename = self.path(file_stem, "_allresults.json")
+        with open(full_result_filename, "w") as f:
+            result_dict = {
+                "score": result.score,
+                "metrics": result.metrics,
+                "htmls": list(result.htmls),
+                "convos": result.convos,
+                "metadata": result.metadata,
+            }
+            f.write(json.dumps(result_dict, indent=2))
+            print(f"Writing all results to {full_result_filename}")
+        return result_filename
+
+
+def run_eval(
+    eval_obj: Eval,
+    sampler: SamplerBase,
+    store: result_store.ResultStoreWriter | None = None,
+) -> tuple[EvalResult, list[SingleEvalResult]]:
+    """
+    Run an eval on all of its examples in one call, so its thread pool schedules
+    them as it would without a store. With a store, the results are then written
+    one row group at a time.
+    """
+    results = eval_obj.run(sampler, eval_obj.examples)
+    # ^^^ how to use a sampler
+    if store is not None:
+        result_store.write_results(store, results, eval_obj.examples)
+    return eval_obj.aggregate(results), results
+
+
+def run_from_spec(spec: run_spec.RunSpec) -> list[dict]:
+    """
+    Run every (eval, model) job of a spec. Each provider's jobs run in a thread of
+    their own, and every request goes through the spec's budget for its provider.
+    """
+    lanes = run_spec.plan_jobs(spec)
+    print(f"Running plan:\n{run_spec.format_plan(spec, lanes)}")
+    run_spec.apply_thread_budget(spec)
+    budgets = run_spec.ProviderBudgets(spec)
+    samplers = {name: budgets.sampler(s) for name, s in spec.samplers.items()}
+    grading_sampler = budgets.sampler(spec.grader)
+    equality_checker = budgets.sampler(spec.equality_checker)
+    grader_cache = (
+        GraderCache(spec.cache.grader_cache_path) if spec.cache.grader_cache else None
+    )
+    results_db = (
+        ResultsDB(spec.outputs.results_db_path) if spec.outputs.results_db else None
+    )
+    os.makedirs(spec.outputs.directory, exist_ok=True)
+    writer = ResultWriter(
+        spec.outputs.directory,
+        debug_suffix="_DEBUG" if spec.debug else "",
+        report_page_size=spec.outputs.report_page_size,
+        background_reports=spec.outputs.background_reports,
+    )
+    now = datetime.now()
+    date_str = now.strftime("%Y%m%d_%H%M%S")
+    mergekey2resultpath: dict[str, str] = {}
+    run_ids: list[int] = []
+
+    def run_job(job: run_spec.Job) -> None:
+        eval_spec = spec.evals[job.eval_name]
+        eval_obj = get_eval(
+            eval_spec.eval,
+            spec.debug,
+            num_examples=eval_spec.num_examples,
+            n_repeats=eval_spec.n_repeats,
+            n_threads=run_spec.num_threads(spec),
+            grading_sampler=grading_sampler,
+            equality_checker=equality_checker,
+            grader_cache=grader_cache,
+            **eval_spec.options,
+        )
+        sampler = samplers[job.model_name]
+        file_stem = f"{job.eval_name}_{job.model_name}_{date_str}"
+        store = writer.open_store(file_stem)
+        result, results = run_eval(eval_obj, sampler, store)
+        mergekey2resultpath[file_stem] = writer.write(file_stem, result, store)
+        if results_db is not None:
+            run_ids.append(
+                results_db.record_run(
+                    job.eval_name,
+                    job.model_name,
+                    sampler,
+                    result,
+                    results,
+                    eval_obj.examples,
+                    date=now,
+                )
+            )
+
+    def run_lane(jobs: list[run_spec.Job]) -> None:
+        for job in jobs:
+            run_job(job)
+
+    with ThreadPoolExecutor(len(lanes)) as pool:
+        for future in [pool.submit(run_lane, jobs) for jobs in lanes.values()]:
+            future.result()
+    writer.wait_for_reports()
+    if results_db is not None:
+        return summarize_runs(results_db, run_ids)
+    return summarize_results(mergekey2resultpath)
+
+
+def get_eval(
+    eval_name: str,
+    debug_mode: bool = False,
+    num_examples: int | None = None,
+    n_repeats: int | None = None,
+    n_threads: int = 120,
+    grading_sampler: SamplerBase | None = None,
+    equality_checker: SamplerBase | None = None,
+    grader_cache: GraderCache | None = None,
+    grader_batch_size: int = 1,
+    multi_rubric_grading: bool = False,
+    max_grading_attempts: int = 3,
+) -> Eval:
+    num_examples = (
+        num_examples if num_examples is not None else (5 if debug_mode else None)
+    )
+    # Set num_examples = None to reproduce full evals
+    match eval_name:
+        case "mmlu":
+            return MMLUEval(num_examples=1 if debug_mode else num_examples)
+        case "math":
+            return MathEval(
+                equality_checker=equality_checker,
+                num_examples=num_examples,
+                n_repeats=1 if debug_mode else n_repeats or 10,
+            )
+        case "gpqa":
+            return GPQAEval(
+                n_repeats=1 if debug_mode else n_repeats or 10,
+                num_examples=num_examples,
+            )
+        case "mgsm":
+            return MGSMEval(
+                num_examples_per_lang=10 if debug_mode else num_examples or 250
+            )
+        case "drop":
+            return DropEval(
+                num_examples=10 if debug_mode else num_examples,
+                train_samples_per_prompt=3,
+            )
+        case "humaneval":
+            return HumanEval(num_examples=10 if debug_mode else num_examples)
+        case "simpleqa":
+            return SimpleQAEval(
+                grader_model=grading_sampler,
+                num_examples=10 if debug_mode else num_examples,
+                grader_batch_size=grader_batch_size,
+                grader_cache=grader_cache,
+            )
+        case "browsecomp":
+            return BrowseCompEval(
+                grader_model=grading_sampler,
+                num_examples=10 if debug_mode else num_examples,
+                grader_batch_size=grader_batch_size,
+                grader_cache=grader_cache,
+            )
+        case "healthbench":
+            return HealthBenchEval(
+                grader_model=grading_sampler,
+                num_examples=10 if debug_mode else num_examples,
+                n_repeats=n_repeats or 1,
+                n_threads=n_threads or 1,
+                subset_name=None,
+                multi_rubric_grading=multi_rubric_grading,
+                max_grading_attempts=max_grading_attempts,
+                grader_cache=grader_cache,
+            )
+        case "healthbench_hard":
+            return HealthBenchEval(
+                grader_model=grading_sampler,
+                num_examples=10 if debug_mode else num_examples,
+                n_repeats=n_repeats or 1,
+                n_threads=n_threads or 1,
+                subset_name="hard",
+                multi_rubric_grading=multi_rubric_grading,
+                max_grading_attempts=max_grading_attempts,
+                grader_cache=grader_cache,
+            )
+        case "healthbench_consensus":
+            return HealthBenchEval(
+                grader_model=grading_sampler,
+                num_examples=10 if debug_mode else num_examples,
+                n_repeats=n_repeats or 1,
+                n_threads=n_threads or 1,
+                subset_name="consensus",
+                multi_rubric_grading=multi_rubric_grading,
+                max_grading_attempts=max_grading_attempts,
+                grader_cache=grader_cache,
+            )
+        case "healthbench_meta":
+            return HealthBenchMetaEval(
+                grader_model=grading_sampler,
+                num_examples=10 if debug_mode else num_examples,
+                n_repeats=n_repeats or 1,
+                n_threads=n_threads or 1,
+                multi_rubric_grading=multi_rubric_grading,
+                max_grading_attempts=max_grading_attempts,
+                grader_cache=grader_cache,
+            )
+        case _:
+            raise Exception(f"Unrecognized eval type: {eval_name}")
+
+
+def summarize_results(mergekey2resultpath: dict[str, str]) -> list[dict]:
     merge_metrics = []
     for eval_model_name, result_filename in mergekey2resultpath.items():
         try:
@@ -425,5 +665,21 @@ def main():
     return merge_metrics
 
 
+def summarize_runs(results_db: ResultsDB, run_ids: list[int] | None = None) -> list[dict]:
+    """
+    Leaderboard of the given runs, or of the latest run of every eval and model.
+    """
+    merge_metrics = results_db.leaderboard(run_ids=run_ids)
+    if not merge_metrics:
+        print("No runs recorded")
+        return merge_metrics
+    merge_metrics_df = pd.DataFrame(merge_metrics).pivot_table(
+        index="model_name", columns="eval_name", values="metric", aggfunc="last"
+    )
+    print("\nAll results: ")
+    print(merge_metrics_df.to_markdown())
+    return merge_metrics
+
+
 if __name__ == "__main__":
     main()
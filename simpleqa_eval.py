@@ -9,6 +9,7 @@ import re
 import pandas
 from . import common
 from .eval_types import Eval, EvalResult, SamplerBase, SingleEvalResult
+from .grader_cache import GraderCache
 
 GRADER_TEMPLATE = """
 Your job is to look at a question, a gold target, and a predicted answer, and then assign a grade of either ["CORRECT", "INCORRECT", "NOT_ATTEMPTED"].
@@ -92,12 +93,33 @@ Just return the letters "A", "B", or "C", with no text around it.
 """.strip()
 
 
+BATCH_GRADER_TEMPLATE = GRADER_TEMPLATE[: GRADER_TEMPLATE.index("Here is a new example.")] + """
+Here are {num_items} new examples, each with an ID. Grade each one on its own, exactly as if it were the only example. Don't apologize or correct yourself if there was a mistake; we are just trying to grade the answers.
+
+{items}
+
+Grade the predicted answer of each new question as one of:
+A: CORRECT
+B: INCORRECT
+C: NOT_ATTEMPTED
+
+Return a JSON object mapping every ID to its letter, for example {{"1": "A", "2": "C"}}, with no text around it.
+""".strip()
+
+
 CHOICE_LETTERS = ["A", "B", "C"]
 CHOICE_STRINGS = ["CORRECT", "INCORRECT", "NOT_ATTEMPTED"]
 CHOICE_LETTER_TO_STRING = dict(zip(CHOICE_LETTERS, CHOICE_STRINGS))
 
 class SimpleQAEval(Eval):
-    def __init__(self, grader_model: SamplerBase, num_examples: int | None = None, n_repeats: int = 1):
+    def __init__(
+        self,
+        grader_model: SamplerBase,
+        num_examples: int | None = None,
+        n_repeats: int = 1,
+        grader_batch_size: int = 1,  # examples graded per grader request
+        grader_cache: GraderCache | None = None,  # reuse verdicts from earlier runs
+    ):
         df = pandas.read_csv(
             "https://openaipublic.blob.core.windows.net/simple-evals/simple_qa_test_set.csv"
         )
@@ -106,10 +128,19 @@ class SimpleQAEval(Eval):
             assert n_repeats == 1, "n_repeats only supported when max_examples = None"
             rng = random.Random(0)
             examples = rng.sample(examples, num_examples)
-        self.examples = examples * n_repeats
+        self.examples = common.RepeatedExamples(examples, n_repeats)
         self.grader_model = grader_model
+        self.grader_batch_size = grader_batch_size
+        self.grader_cache = grader_cache
 
     def grade_sample(self, question: str, target: str, predicted_answer: str) -> str:
+        cache_key = GraderCache.key(
+            self.grader_model, GRADER_TEMPLATE, question, target, predicted_answer
+        )
+        if self.grader_cache is not None:
+            cached = self.grader_cache.get(cache_key)
+            if cached is not None:
+                return cached
         grader_prompt = GRADER_TEMPLATE.format(
             question=question,
             target=target,
@@ -123,18 +154,78 @@ class SimpleQAEval(Eval):
         grading_response = sampler_response.response_text
         
         match = re.search(r"(A|B|C)", grading_response)
+        if match and self.grader_cache is not None:
+            self.grader_cache.set(cache_key, match.group(0))
         return match.group(0) if match else "C"  # Default to "NOT_ATTEMPTED" if no match
 
-    def __call__(self, sampler: SamplerBase) -> EvalResult:
+    def grade_samples(self, samples: list[tuple[str, str, str]]) -> list[str]:
+        """
+        Grade (question, target, predicted_answer) triples in one grader request,
+        falling back to grade_sample for every item without a valid verdict.
+        """
+        if len(samples) == 1:
+            return [self.grade_sample(*samples[0])]
+        cache_keys = [
+            GraderCache.key(self.grader_model, BATCH_GRADER_TEMPLATE, *sample)
+            for sample in samples
+        ]
+        grades = [
+            self.grader_cache.get(cache_key) if self.grader_cache is not None else None
+            for cache_key in cache_keys
+        ]
+        indices = [i for i, grade in enumerate(grades) if grade is None]
+        if not indices:
+            return grades
+        items = [
+            f"Question: {question}\nGold target: {target}\nPredicted answer: {predicted_answer}"
+            for question, target, predicted_answer in (samples[i] for i in indices)
+        ]
+        grader_prompt = BATCH_GRADER_TEMPLATE.format(
+            num_items=len(items), items=common.format_grading_items(items)
+        )
+        prompt_messages = [
+            self.grader_model._pack_message(content=grader_prompt, role="user")
+        ]
+        grading_response = self.grader_model(prompt_messages).response_text
+        verdicts = common.parse_grading_verdicts(grading_response, len(items))
+        for item_id, i in enumerate(indices, start=1):
+            verdict = verdicts.get(item_id)
+            if verdict in CHOICE_LETTERS:
+                grades[i] = verdict
+                if self.grader_cache is not None:
+                    self.grader_cache.set(cache_keys[i], verdict)
+            else:
+                grades[i] = self.grade_sample(*samples[i])
+        return grades
+
+    def run(self, sampler: SamplerBase, examples: list[dict]) -> list[SingleEvalResult]:
             def fn(row: dict):
                 prompt_messages = [
                     sampler._pack_message(content=row.get("problem", ""), role="user")
                 ]
-                sampler_response = sampler(prompt_messages)
+                return sampler(prompt_messages)
+
+            sampler_responses = common.map_with_progress(fn, examples)
+            # grade grader_batch_size examples per grader request
+            samples = [
+                (row.get("problem", ""), row.get("answer", ""), sampler_response.response_text)
+                for row, sampler_response in zip(examples, sampler_responses)
+            ]
+            grade_letters = [
+                grade_letter
+                for batch in common.map_with_progress(
+                    self.grade_samples, common.chunks(samples, self.grader_batch_size)
+                )
+                for grade_letter in batch
+            ]
+
+            results = []
+            for row, sampler_response, grade_letter in zip(
+                examples, sampler_responses, grade_letters, strict=True
+            ):
                 response_text = sampler_response.response_text
                 actual_queried_prompt_messages = sampler_response.actual_queried_message_list
-                grade_letter = self.grade_sample(row.get("problem", ""), row.get("answer", ""), response_text)
-                
+
                 # Metrics based on grading response
                 is_correct = grade_letter == "A"
                 is_incorrect = grade_letter == "B"
@@ -142,24 +233,17 @@ class SimpleQAEval(Eval):
                 
                 score = is_correct
 
-                # Create HTML for each sample result
-                html = common.jinja_env.from_string(common.HTML_JINJA).render(
-                    prompt_messages=actual_queried_prompt_messages,
-                    next_message=dict(content=response_text, role="assistant"),
-                    score=score,
-                    correct_answer=row["answer"],
-                    extracted_answer=response_text,
-                )
                 convo = actual_queried_prompt_messages + [dict(content=response_text, role="assistant")]
-                return SingleEvalResult(html=html, score=score, convo=convo, metrics={
+                results.append(SingleEvalResult(score=score, convo=convo, metrics={
                     "is_correct": is_correct,
                     "is_incorrect": is_incorrect,
                     "is_not_attempted": is_not_attempted
-                })
+                }, prompt=actual_queried_prompt_messages, response=response_text,
+                extracted_answer=response_text, correct_answer=row["answer"]))
 
-            # Run evaluation and collect results
-            results = common.map_with_progress(fn, self.examples)
+            return results
 
+    def aggregate(self, results: list[SingleEvalResult]) -> EvalResult:
             # Aggregate metrics
             aggregate_metrics = {
                 "is_correct": sum(result.metrics["is_correct"] for result in results) / len(results),
@@ -191,6 +275,8 @@ class SimpleQAEval(Eval):
             print(f"Accuracy Given Attempted: {output_d['accuracy_given_attempted']:.3f}")
             print(f"F1 Score: {output_d['f1']:.3f}")
             
-            return common.aggregate_results(results)
+            eval_result = common.aggregate_results(results)
+            eval_result.metrics.update(common.repeat_metrics(results, self.examples))
+            return eval_result
     
 
@@ -0,0 +1,281 @@
+"""
+Work queue for scaling a single (eval, sampler) pair across worker processes.
+
+The coordinator owns the queue of example indices and hands out leases. Workers on
+the same or other hosts lease a few indices at a time, run them through the eval and
+push back the SingleEvalResults. Leases that are not completed within `lease_timeout`
+seconds are re-queued, so work lost to a crashed or stuck worker is picked up by
+another one. The queue is served with multiprocessing.managers over a TCP address
+("host:port") or a Unix socket path, so no external service is needed.
+
+The manager protocol unpickles what peers send, so every connection must present
+the key in SIMPLE_EVALS_AUTHKEY. Without it, a coordinator on a loopback address or
+socket path makes up a random key and prints it, and one on any other address
+refuses to start.
+"""
+
+import dataclasses
+import ipaddress
+import os
+import secrets
+import socket
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing.connection import Client
+from multiprocessing.managers import BaseManager, Server
+from typing import Any, Callable
+
+from tqdm import tqdm
+
+from . import common
+from .eval_types import Eval, SamplerBase, SingleEvalResult
+
+AUTHKEY_ENV = "SIMPLE_EVALS_AUTHKEY"
+
+
+class WorkQueue:
+    """
+    Queue of example indices with leases. All methods are thread-safe.
+    """
+
+    def __init__(
+        self,
+        num_examples: int,
+        lease_timeout: float = 600.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._num_examples = num_examples
+        self._lease_timeout = lease_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._pending = deque(range(num_examples))
+        self._leases: dict[int, float] = {}  # index -> lease deadline
+        self._results: dict[int, dict[str, Any]] = {}
+        self.num_requeued = 0
+
+    def _requeue_expired(self) -> None:
+        now = self._clock()
+        for index, deadline in list(self._leases.items()):
+            if deadline < now:
+                del self._leases[index]
+                self._pending.append(index)
+                self.num_requeued += 1
+
+    def num_examples(self) -> int:
+        return self._num_examples
+
+    def lease(self, max_items: int = 1) -> list[int]:
+        """
+        Lease up to max_items example indices. Returns an empty list if nothing is
+        pending right now; check is_done() to tell whether more work may appear.
+        """
+        with self._lock:
+            self._requeue_expired()
+            indices = []
+            while self._pending and len(indices) < max_items:
+                index = self._pending.popleft()
+                if index in self._results:
+                    continue
+                self._leases[index] = self._clock() + self._lease_timeout
+                indices.append(index)
+            return indices
+
+    def complete(self, index: int, result: dict[str, Any]) -> None:
+        """
+        Record the result for a leased index. Duplicate completions of re-queued
+        work are ignored.
+        """
+        with self._lock:
+            self._leases.pop(index, None)
+            if index not in self._results:
+                self._results[index] = result
+
+    def num_completed(self) -> int:
+        with self._lock:
+            return len(self._results)
+
+    def is_done(self) -> bool:
+        with self._lock:
+            return len(self._results) == self._num_examples
+
+    def results(self) -> list[dict[str, Any]]:
+        with self._lock:
+            assert len(self._results) == self._num_examples, "Queue is not done yet"
+            return [self._results[i] for i in range(self._num_examples)]
+
+
+class _CoordinatorManager(BaseManager):
+    pass
+
+
+class _WorkerManager(BaseManager):
+    pass
+
+
+_WorkerManager.register("get_queue")
+
+
+def parse_address(address: str) -> tuple[str, int] | str:
+    """
+    Parse "host:port" into a TCP address; anything else is a Unix socket path.
+    """
+    host, sep, port = address.rpartition(":")
+    if sep and port.isdigit():
+        return (host or "localhost", int(port))
+    return address
+
+
+def is_loopback(address: tuple[str, int] | str) -> bool:
+    """
+    Whether a parsed address is only reachable from this host.
+    """
+    if isinstance(address, str):
+        return True  # Unix socket
+    try:
+        return ipaddress.ip_address(socket.gethostbyname(address[0])).is_loopback
+    except (OSError, ValueError):
+        return False
+
+
+def coordinator_authkey(address: tuple[str, int] | str) -> bytes:
+    """
+    The key from SIMPLE_EVALS_AUTHKEY or, on a loopback address, a random one that
+    is printed for the workers.
+    """
+    authkey = os.environ.get(AUTHKEY_ENV, "")
+    if authkey:
+        return authkey.encode()
+    if not is_loopback(address):
+        raise ValueError(
+            f"Set {AUTHKEY_ENV} to serve on {address}: anyone who can connect with the "
+            "key can run code in the coordinator"
+        )
+    authkey = secrets.token_hex(16)
+    print(f"Start workers with {AUTHKEY_ENV}={authkey}")
+    return authkey.encode()
+
+
+def worker_authkey() -> bytes:
+    authkey = os.environ.get(AUTHKEY_ENV, "")
+    if not authkey:
+        raise ValueError(f"Set {AUTHKEY_ENV} to the coordinator's key")
+    return authkey.encode()
+
+
+def _serve(server: Server, stop: threading.Event) -> None:
+    """
+    Accept and serve connections until stop is set. Server.serve_forever cannot be
+    stopped from another thread, and its accept thread spins once the listener is
+    closed.
+    """
+    server.stop_event = stop
+    while True:
+        try:
+            connection = server.listener.accept()
+        except OSError:
+            if stop.is_set():
+                return
+            continue
+        if stop.is_set():
+            connection.close()
+            return
+        threading.Thread(target=server.handle_request, args=(connection,), daemon=True).start()
+
+
+def run_coordinator(
+    eval_obj: Eval,
+    address: str,
+    lease_timeout: float = 600.0,
+    poll_interval: float = 1.0,
+    authkey: bytes | None = None,
+) -> list[SingleEvalResult]:
+    """
+    Serve the examples of eval_obj to workers and collect their results, in the
+    order of eval_obj.examples. authkey defaults to coordinator_authkey(address).
+    """
+    queue = WorkQueue(len(eval_obj.examples), lease_timeout=lease_timeout)
+    _CoordinatorManager.register("get_queue", callable=lambda: queue)
+    parsed_address = parse_address(address)
+    authkey = authkey or coordinator_authkey(parsed_address)
+    server = _CoordinatorManager(address=parsed_address, authkey=authkey).get_server()
+    stop = threading.Event()
+    serve_thread = threading.Thread(target=_serve, args=(server, stop), daemon=True)
+    serve_thread.start()
+    print(f"Coordinator serving {len(eval_obj.examples)} examples on {address}")
+
+    try:
+        with tqdm(total=len(eval_obj.examples)) as pbar:
+            while not queue.is_done():
+                time.sleep(poll_interval)
+                pbar.update(queue.num_completed() - pbar.n)
+            pbar.update(queue.num_completed() - pbar.n)
+    finally:
+        stop.set()
+        # wake the accept loop, then close the listener (and its socket file)
+        try:
+            Client(server.address).close()
+        except OSError:
+            pass
+        else:
+            serve_thread.join()
+        server.listener.close()
+    if queue.num_requeued:
+        print(f"Re-queued {queue.num_requeued} expired leases")
+
+    return [SingleEvalResult(**result) for result in queue.results()]
+
+
+def run_worker(
+    eval_obj: Eval,
+    sampler: SamplerBase,
+    address: str,
+    lease_size: int | None = None,
+    leases_in_flight: int = 2,
+    poll_interval: float = 1.0,
+    authkey: bytes | None = None,
+) -> int:
+    """
+    Pull examples from the coordinator at address until all work is done.
+    Each of leases_in_flight threads leases lease_size examples (default: the
+    eval's thread count) at a time and runs them, so a slow example holds up only
+    its own lease. authkey defaults to SIMPLE_EVALS_AUTHKEY.
+    Returns the number of examples this worker completed.
+    """
+    lease_size = lease_size or getattr(eval_obj, "n_threads", None) or common.default_num_threads()
+    manager = _WorkerManager(address=parse_address(address), authkey=authkey or worker_authkey())
+    manager.connect()
+    queue = manager.get_queue()
+    assert queue.num_examples() == len(eval_obj.examples), (
+        f"Coordinator has {queue.num_examples()} examples but this worker has "
+        f"{len(eval_obj.examples)}; use the same eval flags on every host"
+    )
+
+    lock = threading.Lock()
+    num_completed = 0
+
+    def run_leases() -> None:
+        nonlocal num_completed
+        try:
+            while not queue.is_done():
+                indices = queue.lease(lease_size)
+                if not indices:
+                    # everything is leased; wait in case a lease expires and is re-queued
+                    time.sleep(poll_interval)
+                    continue
+                results = eval_obj.run(sampler, [eval_obj.examples[i] for i in indices])
+                for index, result in zip(indices, results, strict=True):
+                    queue.complete(index, dataclasses.asdict(result))
+                with lock:
+                    num_completed += len(indices)
+        except (EOFError, ConnectionError):
+            # the coordinator shuts down as soon as every example is done
+            pass
+
+    # the queue proxy opens a connection per thread
+    with ThreadPoolExecutor(leases_in_flight) as pool:
+        for future in [pool.submit(run_leases) for _ in range(leases_in_flight)]:
+            future.result()
+    print(f"Worker done after completing {num_completed} examples")
+    return num_completed
@@ -0,0 +1,120 @@
+import os
+import random
+import tempfile
+import threading
+import time
+
+from .eval_types import Eval, EvalResult, SamplerBase, SamplerResponse, SingleEvalResult
+from .work_queue import (
+    AUTHKEY_ENV,
+    WorkQueue,
+    coordinator_authkey,
+    parse_address,
+    run_coordinator,
+    run_worker,
+)
+
+
+class EchoSampler(SamplerBase):
+    def __call__(self, message_list):
+        time.sleep(random.random() * 0.01)
+        return SamplerResponse(message_list[0]["content"], message_list, {})
+
+
+class EchoEval(Eval):
+    def __init__(self, num_examples: int):
+        self.examples = list(range(num_examples))
+
+    def run(self, sampler, examples):
+        return [
+            SingleEvalResult(
+                score=float(sampler([{"role": "user", "content": str(x)}]).response_text)
+            )
+            for x in examples
+        ]
+
+    def aggregate(self, results):
+        return EvalResult(None, None, [], [], None)
+
+
+def test_expired_leases_are_requeued():
+    now = [0.0]
+    queue = WorkQueue(3, lease_timeout=10.0, clock=lambda: now[0])
+    assert queue.lease(2) == [0, 1]
+    queue.complete(0, {"score": 1.0})
+    assert queue.lease(2) == [2]
+    assert queue.lease(2) == []
+
+    # the open leases expire and are handed to another worker
+    now[0] = 11.0
+    assert queue.lease(2) == [1, 2]
+    assert queue.num_requeued == 2
+    queue.complete(1, {"score": 0.0})
+    queue.complete(2, {"score": 1.0})
+    # a late duplicate completion is ignored
+    queue.complete(1, {"score": 1.0})
+    assert queue.is_done()
+    assert [r["score"] for r in queue.results()] == [1.0, 0.0, 1.0]
+
+
+def test_parse_address():
+    assert parse_address("localhost:5000") == ("localhost", 5000)
+    assert parse_address(":5000") == ("localhost", 5000)
+    assert parse_address("/tmp/simple_evals.sock") == "/tmp/simple_evals.sock"
+
+
+def test_non_loopback_coordinator_needs_authkey():
+    env = os.environ.pop(AUTHKEY_ENV, None)
+    try:
+        assert len(coordinator_authkey(("127.0.0.1", 5000))) == 32
+        assert coordinator_authkey("/tmp/simple_evals.sock") != coordinator_authkey(
+            "/tmp/simple_evals.sock"
+        )
+        try:
+            coordinator_authkey(("0.0.0.0", 5000))
+        except ValueError as e:
+            assert AUTHKEY_ENV in str(e)
+        else:
+            raise AssertionError("a public coordinator should need an explicit key")
+    finally:
+        if env is not None:
+            os.environ[AUTHKEY_ENV] = env
+
+
+def test_coordinator_and_workers_over_loopback():
+    eval_obj = EchoEval(50)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        address = os.path.join(tmp_dir, "queue.sock")
+        results = []
+        coordinator = threading.Thread(
+            target=lambda: results.extend(
+                run_coordinator(eval_obj, address, poll_interval=0.01, authkey=b"test")
+            )
+        )
+        coordinator.start()
+        while not os.path.exists(address):
+            time.sleep(0.01)
+
+        num_completed = []
+        workers = [
+            threading.Thread(
+                target=lambda: num_completed.append(
+                    run_worker(
+                        eval_obj,
+                        EchoSampler(),
+                        address,
+                        lease_size=3,
+                        poll_interval=0.01,
+                        authkey=b"test",
+                    )
+                )
+            )
+            for _ in range(2)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers + [coordinator]:
+            worker.join(timeout=30)
+
+    assert [r.score for r in results] == [float(x) for x in range(50)]
+    assert sum(num_completed) == 50